@@ -2,6 +2,8 @@ import { streamText, tool, convertToModelMessages, UIMessage } from "ai"
 import { z } from "zod"
 import { getSupabaseServerClient } from "@/lib/supabase/server"
 import { checkAIQuota, incrementAIUsage } from "@/lib/quotas/check"
+import { fuseRankings, inRankOrder, searchService, semanticSearch } from "@/lib/search-service"
+import { parseEnglishTranslation } from "@/lib/hadith-utils"
 
 export const maxDuration = 30
 
@@ -160,33 +162,35 @@ export async function POST(req: Request) {
           execute: async ({ query, limit }) => {
             try {
               const supabase = await getSupabaseServerClient()
-              const { data, error } = await supabase
-                .from("hadiths")
-                .select(
-                  "id, hadith_number, collection, arabic_text, english_translation, narrator, grade, reference",
-                )
-                .or(
-                  `english_translation.ilike.%${query}%,narrator.ilike.%${query}%,arabic_text.ilike.%${query}%`,
-                )
-                .limit(limit ?? 5)
+              const columns = "id, hadith_number, collection, arabic_text, english_translation, narrator, grade, reference"
+              // BM25 and embedding neighbours, fused, from whichever services are running
+              const n = limit ?? 5
+              const ranked = fuseRankings(
+                await Promise.all([searchService(query, { limit: n * 2 }), semanticSearch(query, n * 2)]),
+                n,
+              )
+              const { data, error } = ranked
+                ? await supabase
+                    .from("hadiths")
+                    .select(columns)
+                    .in("id", ranked)
+                    .then((r) => ({ ...r, data: inRankOrder(ranked, r.data || []) }))
+                : await supabase
+                    .from("hadiths")
+                    .select(columns)
+                    .or(
+                      `english_translation.ilike.%${query}%,narrator.ilike.%${query}%,arabic_text.ilike.%${query}%`,
+                    )
+                    .limit(n)
 
               if (error) {
                 return { results: [], error: error.message }
               }
 
+              // Rows not yet repaired by scripts/repair_translations.py (121) still hold JSON
               const cleaned = (data || []).map((h) => {
-                let text = h.english_translation || ""
-                let narrator = h.narrator || ""
-                if (text.startsWith("{") && text.includes('"text"')) {
-                  try {
-                    const parsed = JSON.parse(text)
-                    text = parsed.text || text
-                    if (!narrator && parsed.narrator) narrator = parsed.narrator
-                  } catch {
-                    // keep original
-                  }
-                }
-                return { ...h, english_translation: text, narrator }
+                const parsed = parseEnglishTranslation(h.english_translation)
+                return { ...h, english_translation: parsed.text, narrator: h.narrator || parsed.narrator }
               })
 
               return { results: cleaned }
@@ -1,66 +1,55 @@
 import { getSupabaseServerClient } from "@/lib/supabase/server"
 
+const COLUMNS = "id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade, reference"
+
 /**
  * GET /api/daily-hadith
  *
- * Returns a deterministic "hadith of the day" based on the current date.
- * Uses a hash of the date string to pick a consistent hadith for the entire day.
- * Only returns sahih-graded hadiths for maximum authenticity.
+ * Returns the "hadith of the day" for the current UTC date, precomputed into
+ * daily_hadith_schedule by scripts/daily_schedule.py (122): one primary-key
+ * lookup, cached by the CDN until midnight. Dates not yet scheduled fall back
+ * to the first sahih hadith at or after an id derived from the date, which is
+ * an index seek rather than a count(*) plus OFFSET scan.
  */
 export async function GET() {
   try {
     const supabase = await getSupabaseServerClient()
 
-    // Create a deterministic seed from the date
-    const today = new Date()
-    const dateString = `${today.getFullYear()}-${today.getMonth() + 1}-${today.getDate()}`
-
-    // Simple hash function for the date
-    let hash = 0
-    for (let i = 0; i < dateString.length; i++) {
-      const char = dateString.charCodeAt(i)
-      hash = (hash << 5) - hash + char
-      hash |= 0
-    }
-    const seed = Math.abs(hash)
+    const now = new Date()
+    const date = now.toISOString().slice(0, 10)
+    const headers = { "Cache-Control": `public, s-maxage=${secondsUntilMidnight(now)}, stale-while-revalidate=300` }
 
-    // Get total count of sahih hadiths
-    const { count } = await supabase
-      .from("hadiths")
-      .select("id", { count: "exact", head: true })
-      .eq("grade", "sahih")
+    const { data: scheduled } = await supabase
+      .from("daily_hadith_schedule")
+      .select(`hadith:hadiths(${COLUMNS})`)
+      .eq("date", date)
+      .maybeSingle()
 
-    if (!count || count === 0) {
-      return Response.json({ error: "No hadiths available" }, { status: 404 })
+    const picked = Array.isArray(scheduled?.hadith) ? scheduled.hadith[0] : scheduled?.hadith
+    if (picked) {
+      return Response.json({ hadith: cleanHadith(picked), date }, { headers })
     }
 
-    // Use the seed to pick an offset
-    const offset = seed % count
-
-    const { data: hadith, error } = await supabase
+    const cursor = dateCursor(date)
+    const { data: after } = await supabase
       .from("hadiths")
-      .select("id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade, reference")
+      .select(COLUMNS)
       .eq("grade", "sahih")
-      .range(offset, offset)
-      .single()
+      .gte("id", cursor)
+      .order("id")
+      .limit(1)
+      .maybeSingle()
 
-    if (error || !hadith) {
-      // Fallback: just get a random one
-      const { data: fallback } = await supabase
-        .from("hadiths")
-        .select("id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade, reference")
-        .eq("grade", "sahih")
-        .limit(1)
-        .single()
-
-      if (!fallback) {
-        return Response.json({ error: "Could not fetch daily hadith" }, { status: 500 })
-      }
+    // Past the last id: wrap around to the first
+    const hadith =
+      after ??
+      (await supabase.from("hadiths").select(COLUMNS).eq("grade", "sahih").order("id").limit(1).maybeSingle()).data
 
-      return Response.json({ hadith: cleanHadith(fallback), date: dateString })
+    if (!hadith) {
+      return Response.json({ error: "No hadiths available" }, { status: 404 })
     }
 
-    return Response.json({ hadith: cleanHadith(hadith), date: dateString })
+    return Response.json({ hadith: cleanHadith(hadith), date }, { headers })
   } catch (error) {
     console.error("[DailyHadith] Error:", error)
     return Response.json(
@@ -70,6 +59,25 @@ export async function GET() {
   }
 }
 
+function secondsUntilMidnight(now: Date) {
+  const midnight = Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate() + 1)
+  return Math.max(60, Math.floor((midnight - now.getTime()) / 1000))
+}
+
+/**
+ * A uuid spread over the id space by hashing the date, so each day starts the
+ * fallback seek at a different hadith.
+ */
+function dateCursor(date: string) {
+  let hash = 0
+  for (let i = 0; i < date.length; i++) {
+    hash = (hash << 5) - hash + date.charCodeAt(i)
+    hash |= 0
+  }
+  const hex = (hash >>> 0).toString(16).padStart(8, "0")
+  return `${hex}-0000-0000-0000-000000000000`
+}
+
 function cleanHadith(h: any) {
   let text = h.english_translation || ""
   let narrator = h.narrator || ""
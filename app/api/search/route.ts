@@ -1,4 +1,8 @@
 import { getSupabaseServerClient } from "@/lib/supabase/server"
+import { isArabicQuery, normaliseArabic } from "@/lib/arabic-search"
+import { inRankOrder, searchService } from "@/lib/search-service"
+
+const HADITH_COLUMNS = "id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade"
 
 export async function GET(req: Request) {
   const { searchParams } = new URL(req.url)
@@ -47,7 +51,7 @@ export async function GET(req: Request) {
 
     const { data: hadiths } = await supabase
       .from("hadiths")
-      .select("id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade")
+      .select(HADITH_COLUMNS)
       .in("id", ids)
 
     const enriched = await attachEnrichments(supabase, hadiths || [])
@@ -64,6 +68,16 @@ export async function GET(req: Request) {
 
     if (!catRow) return Response.json({ results: [] })
 
+    // Ranked text search within the category, when the search service is running
+    if (query.length >= 2) {
+      const ranked = await searchService(query, { category, limit: 30 })
+      if (ranked) {
+        const { data: hadiths } = await fetchRanked(supabase, ranked)
+        const enriched = await attachEnrichments(supabase, hadiths || [])
+        return Response.json({ results: enriched })
+      }
+    }
+
     const { data: enrichments } = await supabase
       .from("hadith_enrichment")
       .select("hadith_id")
@@ -76,7 +90,7 @@ export async function GET(req: Request) {
     const ids = enrichments.map((e: { hadith_id: string }) => e.hadith_id)
     let hadithQuery = supabase
       .from("hadiths")
-      .select("id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade")
+      .select(HADITH_COLUMNS)
       .in("id", ids)
 
     // Further filter by text query if provided
@@ -91,24 +105,32 @@ export async function GET(req: Request) {
     return Response.json({ results: enriched })
   }
 
-  // Standard text search: search hadiths + summary_lines
-  const { data: directResults, error } = await supabase
-    .from("hadiths")
-    .select("id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade")
-    .or(`english_translation.ilike.%${query}%,narrator.ilike.%${query}%,arabic_text.ilike.%${query}%`)
-    .limit(20)
+  // Standard text search: BM25-ranked ids from the search service (which also
+  // indexes summary lines), else ILIKE on hadiths + summary_lines
+  const ranked = await searchService(query, { limit: 20 })
+  const { data: directResults, error } = ranked
+    ? await fetchRanked(supabase, ranked)
+    : isArabicQuery(query)
+      ? await searchArabic(supabase, query)
+      : await supabase
+          .from("hadiths")
+          .select(HADITH_COLUMNS)
+          .or(`english_translation.ilike.%${query}%,narrator.ilike.%${query}%`)
+          .limit(20)
 
   if (error) {
     return Response.json({ results: [], error: error.message }, { status: 500 })
   }
 
   // Also search by summary_line in enrichments
-  const { data: summaryMatches } = await supabase
-    .from("hadith_enrichment")
-    .select("hadith_id")
-    .eq("status", "published")
-    .ilike("summary_line", `%${query}%`)
-    .limit(10)
+  const { data: summaryMatches } = ranked
+    ? { data: [] }
+    : await supabase
+        .from("hadith_enrichment")
+        .select("hadith_id")
+        .eq("status", "published")
+        .ilike("summary_line", `%${query}%`)
+        .limit(10)
 
   const directIds = new Set((directResults || []).map((h: { id: string }) => h.id))
   const extraIds = (summaryMatches || [])
@@ -121,7 +143,7 @@ export async function GET(req: Request) {
   if (extraIds.length > 0) {
     const { data: extras } = await supabase
       .from("hadiths")
-      .select("id, hadith_number, collection, book_number, arabic_text, english_translation, narrator, grade")
+      .select(HADITH_COLUMNS)
       .in("id", extraIds)
 
     if (extras) {
@@ -151,6 +173,37 @@ export async function GET(req: Request) {
   return Response.json({ results: enriched, facets })
 }
 
+// Helper: load hadiths for ids ranked by the search service, keeping its order
+async function fetchRanked(supabase: Awaited<ReturnType<typeof getSupabaseServerClient>>, ids: string[]) {
+  if (ids.length === 0) return { data: [], error: null }
+  const { data, error } = await supabase.from("hadiths").select(HADITH_COLUMNS).in("id", ids)
+  return { data: inRankOrder(ids, data || []), error }
+}
+
+// Helper: Arabic text search against the precomputed, diacritic-free keys in
+// hadith_search_keys (trigram-indexed), so "الاعمال بالنيات" also matches
+// "الأَعْمَالُ بِالنِّيَّاتِ". Falls back to ILIKE on the raw text if the keys
+// table is not there yet.
+async function searchArabic(
+  supabase: Awaited<ReturnType<typeof getSupabaseServerClient>>,
+  query: string,
+) {
+  const norm = normaliseArabic(query)
+  const { data: keys, error } = await supabase
+    .from("hadith_search_keys")
+    .select("hadith_id")
+    .ilike("arabic_norm", `%${norm}%`)
+    .limit(20)
+
+  if (error) {
+    return supabase.from("hadiths").select(HADITH_COLUMNS).ilike("arabic_text", `%${query}%`).limit(20)
+  }
+
+  const ids = (keys || []).map((k: { hadith_id: string }) => k.hadith_id)
+  if (ids.length === 0) return { data: [], error: null }
+  return supabase.from("hadiths").select(HADITH_COLUMNS).in("id", ids)
+}
+
 // Helper: attach enrichment data to hadith results
 async function attachEnrichments(
   supabase: Awaited<ReturnType<typeof getSupabaseServerClient>>,
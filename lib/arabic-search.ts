@@ -0,0 +1,45 @@
+/**
+ * Arabic query normalisation, mirroring scripts/enrichment/arabic.py.
+ *
+ * hadith_search_keys.arabic_norm is built with the Python rules; queries must be
+ * normalised identically to match it. Keep both in sync (and bump VERSION there).
+ */
+
+// Harakat/tashkeel, Quranic marks, superscript alef, tatweel
+const DIACRITICS = /[ؐ-ًؚ-ٰٟۖ-ۭـ]/g
+
+const FOLD: Record<string, string> = {
+  "آ": "ا", // آ -> ا
+  "أ": "ا", // أ -> ا
+  "إ": "ا", // إ -> ا
+  "ٱ": "ا", // ٱ -> ا
+  "ى": "ي", // ى -> ي
+  "ة": "ه", // ة -> ه
+  "ؤ": "ء", // ؤ -> ء
+  "ئ": "ء", // ئ -> ء
+  "ک": "ك", // ک -> ك
+  "ی": "ي", // ی -> ي
+}
+
+const FOLD_RE = new RegExp(`[${Object.keys(FOLD).join("")}]`, "g")
+const ARABIC_DIGITS = /[٠-٩۰-۹]/g
+const NON_LETTER = /[^ء-ي0-9a-z]+/g
+
+export function normaliseArabic(text: string | null | undefined): string {
+  if (!text) return ""
+  return text
+    .replace(DIACRITICS, "")
+    .replace(FOLD_RE, (c) => FOLD[c])
+    .replace(ARABIC_DIGITS, (d) => String((d.charCodeAt(0) - 0x0660) % 0x90))
+    .toLowerCase()
+    .replace(NON_LETTER, " ")
+    .trim()
+}
+
+/**
+ * True when the query contains Arabic letters (and so should be matched
+ * against the normalised Arabic keys rather than the English columns).
+ */
+export function isArabicQuery(text: string): boolean {
+  return /[ء-ي]/.test(text)
+}
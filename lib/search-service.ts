@@ -0,0 +1,81 @@
+/**
+ * Clients for the BM25 search service (scripts/search_service.py) and the
+ * embedding index (scripts/embed_index.py).
+ *
+ * Enabled by SEARCH_SERVICE_URL (e.g. http://127.0.0.1:8790) and
+ * EMBED_SERVICE_URL (e.g. http://127.0.0.1:8791). Each returns ranked hadith
+ * ids, or null when the service is not configured or does not answer in time,
+ * so callers can fall back to querying Supabase directly.
+ */
+
+export interface SearchServiceFilters {
+  collection?: string
+  grade?: string
+  category?: string
+  tag?: string
+  limit?: number
+}
+
+const TIMEOUT_MS = 500
+// Semantic lookups embed the query first (a model call when remote)
+const EMBED_TIMEOUT_MS = 1500
+
+async function rankedIds(url: string, timeout: number): Promise<string[] | null> {
+  try {
+    const res = await fetch(url, { signal: AbortSignal.timeout(timeout), cache: "no-store" })
+    if (!res.ok) return null
+    const body = (await res.json()) as { results: Array<{ id: string; score: number }> }
+    return body.results.map((r) => r.id)
+  } catch {
+    return null
+  }
+}
+
+export async function searchService(query: string, filters: SearchServiceFilters = {}): Promise<string[] | null> {
+  const base = process.env.SEARCH_SERVICE_URL
+  if (!base) return null
+
+  const params = new URLSearchParams({ q: query, limit: String(filters.limit ?? 20) })
+  for (const key of ["collection", "grade", "category", "tag"] as const) {
+    const value = filters[key]
+    if (value) params.set(key, value)
+  }
+
+  return rankedIds(`${base.replace(/\/$/, "")}/search?${params}`, TIMEOUT_MS)
+}
+
+/**
+ * Nearest hadiths by meaning, for questions phrased differently from the text.
+ */
+export async function semanticSearch(query: string, k = 10): Promise<string[] | null> {
+  const base = process.env.EMBED_SERVICE_URL
+  if (!base) return null
+
+  const params = new URLSearchParams({ q: query, k: String(k) })
+  return rankedIds(`${base.replace(/\/$/, "")}/neighbours?${params}`, EMBED_TIMEOUT_MS)
+}
+
+/**
+ * Reciprocal rank fusion of several rankings (null ones skipped); null when
+ * every ranking is null.
+ */
+export function fuseRankings(rankings: Array<string[] | null>, limit: number): string[] | null {
+  const present = rankings.filter((r): r is string[] => r !== null)
+  if (present.length === 0) return null
+  const score = new Map<string, number>()
+  for (const ids of present) {
+    ids.forEach((id, i) => score.set(id, (score.get(id) ?? 0) + 1 / (60 + i)))
+  }
+  return [...score.entries()]
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, limit)
+    .map(([id]) => id)
+}
+
+/**
+ * Reorders rows fetched with `.in("id", ids)` back into the service's ranking.
+ */
+export function inRankOrder<T extends { id: string }>(ids: string[], rows: T[]): T[] {
+  const byId = new Map(rows.map((r) => [r.id, r]))
+  return ids.map((id) => byId.get(id)).filter((r): r is T => r !== undefined)
+}
@@ -0,0 +1,94 @@
+-- Lease-based work queue for the enrichment scripts.
+-- Workers call claim_unenriched_hadiths() to atomically take a disjoint batch
+-- instead of downloading every enriched hadith_id and diffing client-side.
+-- A lease that is not completed (worker crashed) expires and the hadith
+-- becomes claimable again.
+
+CREATE TABLE IF NOT EXISTS enrichment_leases (
+  hadith_id uuid PRIMARY KEY REFERENCES hadiths(id) ON DELETE CASCADE,
+  worker_id text NOT NULL,
+  leased_until timestamptz NOT NULL,
+  attempts int NOT NULL DEFAULT 1,
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_enrichment_leases_worker ON enrichment_leases(worker_id);
+CREATE INDEX IF NOT EXISTS idx_enrichment_leases_until ON enrichment_leases(leased_until);
+
+-- Service role only; no public policies
+ALTER TABLE enrichment_leases ENABLE ROW LEVEL SECURITY;
+
+-- claim_unenriched_hadiths: hand out up to n unenriched hadiths to one worker.
+-- FOR UPDATE SKIP LOCKED keeps concurrent claims from blocking on each other,
+-- and the conditional upsert only takes rows whose previous lease has expired,
+-- so two workers never receive the same hadith.
+CREATE OR REPLACE FUNCTION claim_unenriched_hadiths(
+  p_worker_id text,
+  n int DEFAULT 20,
+  lease_seconds int DEFAULT 600
+)
+RETURNS TABLE(id uuid, english_translation text, narrator text, grade text, hadith_number int)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT h.id
+    FROM hadiths h
+    WHERE NOT EXISTS (SELECT 1 FROM hadith_enrichment he WHERE he.hadith_id = h.id)
+      AND NOT EXISTS (
+        SELECT 1 FROM enrichment_leases l
+        WHERE l.hadith_id = h.id AND l.leased_until > now()
+      )
+      AND h.english_translation IS NOT NULL
+      AND length(h.english_translation) > 10
+    ORDER BY h.hadith_number ASC
+    LIMIT n
+    FOR UPDATE OF h SKIP LOCKED
+  ),
+  leased AS (
+    INSERT INTO enrichment_leases AS l (hadith_id, worker_id, leased_until)
+    SELECT c.id, p_worker_id, now() + make_interval(secs => lease_seconds)
+    FROM candidates c
+    ON CONFLICT (hadith_id) DO UPDATE
+      SET worker_id = EXCLUDED.worker_id,
+          leased_until = EXCLUDED.leased_until,
+          attempts = l.attempts + 1
+      WHERE l.leased_until <= now()
+    RETURNING l.hadith_id
+  )
+  SELECT h.id, h.english_translation, h.narrator, h.grade, h.hadith_number
+  FROM hadiths h
+  JOIN leased ON leased.hadith_id = h.id
+  ORDER BY h.hadith_number ASC;
+END;
+$$;
+
+-- release_hadith_leases: give back a worker's unfinished leases (e.g. on Ctrl-C)
+CREATE OR REPLACE FUNCTION release_hadith_leases(p_worker_id text)
+RETURNS int
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+  WITH d AS (
+    DELETE FROM enrichment_leases WHERE worker_id = p_worker_id RETURNING 1
+  )
+  SELECT count(*)::int FROM d;
+$$;
+
+-- Once a hadith is enriched its lease is no longer needed
+CREATE OR REPLACE FUNCTION clear_enrichment_lease()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  DELETE FROM enrichment_leases WHERE hadith_id = NEW.hadith_id;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS hadith_enrichment_clear_lease ON hadith_enrichment;
+CREATE TRIGGER hadith_enrichment_clear_lease
+AFTER INSERT ON hadith_enrichment
+FOR EACH ROW EXECUTE FUNCTION clear_enrichment_lease();
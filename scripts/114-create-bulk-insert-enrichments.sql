@@ -0,0 +1,115 @@
+-- insert_enrichments_bulk: upsert a batch of enrichments and their tag links
+-- in one round trip. Replaces per-hadith POSTs to hadith_enrichment/hadith_tags
+-- and the per-slug lookups inside insert_enrichment().
+--
+-- p_rows is a JSON array of objects:
+--   { hadith_id, summary_line, summary_ar, key_teaching_en, key_teaching_ar,
+--     category_slug, tag_slugs: [..], confidence, rationale, suggested_by,
+--     methodology_version, status }
+-- Slugs are resolved with set-based joins against categories, tags and
+-- tag_aliases. Unknown categories fall back to 'daily-life', unknown tags are
+-- skipped.
+--
+-- An existing enrichment is only replaced while it is an unreviewed 'suggested'
+-- draft, so a late or replayed write cannot clobber reviewed or published rows.
+-- Returns {"written": n, "skipped": [hadith_id, ...]}.
+
+-- The return type changed from int, so the old definition has to go first
+DROP FUNCTION IF EXISTS insert_enrichments_bulk(jsonb);
+CREATE FUNCTION insert_enrichments_bulk(p_rows jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_result jsonb;
+BEGIN
+  WITH input AS (
+    SELECT *
+    FROM jsonb_to_recordset(p_rows) AS r(
+      hadith_id uuid,
+      summary_line text,
+      summary_ar text,
+      key_teaching_en text,
+      key_teaching_ar text,
+      category_slug text,
+      tag_slugs text[],
+      confidence numeric,
+      rationale text,
+      suggested_by text,
+      methodology_version text,
+      status text
+    )
+  ),
+  resolved AS (
+    SELECT i.*, COALESCE(c.id, fallback.id) AS category_id
+    FROM input i
+    LEFT JOIN categories c ON c.slug = i.category_slug
+    CROSS JOIN (SELECT id FROM categories WHERE slug = 'daily-life') fallback
+  ),
+  upserted AS (
+    INSERT INTO hadith_enrichment (
+      hadith_id, summary_line, summary_ar,
+      key_teaching_en, key_teaching_ar,
+      category_id, status, confidence, rationale,
+      suggested_by, methodology_version, published_at
+    )
+    SELECT
+      r.hadith_id, r.summary_line, r.summary_ar,
+      r.key_teaching_en, r.key_teaching_ar,
+      r.category_id,
+      COALESCE(r.status, 'published')::enrichment_status,
+      r.confidence, r.rationale,
+      COALESCE(r.suggested_by, 'deepinfra-llama-3.3-70b'),
+      COALESCE(r.methodology_version, 'v1.1'),
+      CASE WHEN COALESCE(r.status, 'published') = 'published' THEN now() END
+    FROM resolved r
+    ON CONFLICT (hadith_id) DO UPDATE SET
+      summary_line = EXCLUDED.summary_line,
+      summary_ar = EXCLUDED.summary_ar,
+      key_teaching_en = EXCLUDED.key_teaching_en,
+      key_teaching_ar = EXCLUDED.key_teaching_ar,
+      category_id = EXCLUDED.category_id,
+      status = EXCLUDED.status,
+      confidence = EXCLUDED.confidence,
+      rationale = EXCLUDED.rationale,
+      suggested_by = EXCLUDED.suggested_by,
+      methodology_version = EXCLUDED.methodology_version,
+      published_at = EXCLUDED.published_at
+    -- Only unreviewed drafts are replaced; approved, published (including
+    -- propagated) and rejected rows are left alone and reported as skipped
+    WHERE hadith_enrichment.status = 'suggested'
+    RETURNING id, hadith_id, status
+  ),
+  slugs AS (
+    SELECT DISTINCT i.hadith_id, s.slug
+    FROM input i
+    CROSS JOIN LATERAL unnest(COALESCE(i.tag_slugs, '{}')) AS s(slug)
+  ),
+  tag_ids AS (
+    SELECT DISTINCT s.hadith_id, COALESCE(t.id, a.tag_id) AS tag_id
+    FROM slugs s
+    LEFT JOIN tags t ON t.slug = s.slug
+    LEFT JOIN tag_aliases a ON a.alias_slug = s.slug
+    WHERE COALESCE(t.id, a.tag_id) IS NOT NULL
+  ),
+  linked AS (
+    INSERT INTO hadith_tags (hadith_id, tag_id, enrichment_id, status)
+    SELECT ti.hadith_id, ti.tag_id, u.id, u.status
+    FROM tag_ids ti
+    JOIN upserted u ON u.hadith_id = ti.hadith_id
+    ON CONFLICT (hadith_id, tag_id) DO NOTHING
+    RETURNING 1
+  )
+  SELECT jsonb_build_object(
+    'written', (SELECT count(*) FROM upserted),
+    'skipped', COALESCE((
+      SELECT jsonb_agg(DISTINCT i.hadith_id)
+      FROM input i
+      WHERE NOT EXISTS (SELECT 1 FROM upserted u WHERE u.hadith_id = i.hadith_id)
+    ), '[]'::jsonb)
+  ) INTO v_result;
+
+  RETURN v_result;
+END;
+$$;
@@ -0,0 +1,133 @@
+-- Keyset access to unenriched hadiths.
+-- get_unenriched_hadiths() used LEFT JOIN hadith_enrichment ... WHERE e.id IS NULL
+-- ORDER BY hadith_number, which walks past every already-enriched row on each
+-- call. hadiths.enriched_at is now a marker maintained by trigger, and a partial
+-- index over the rows that still need work keeps each call the same cost no
+-- matter how much of the corpus is done.
+
+ALTER TABLE hadiths ADD COLUMN IF NOT EXISTS enriched_at timestamptz;
+
+-- Backfill from existing enrichments
+UPDATE hadiths h SET enriched_at = e.created_at
+FROM hadith_enrichment e
+WHERE e.hadith_id = h.id AND h.enriched_at IS NULL;
+
+-- (hadith_number, id) is the cursor: hadith_number alone repeats across collections.
+-- Hadiths without a number sort last (NULLS LAST) and are walked by id alone:
+-- a cursor with a NULL hadith_number and a non-NULL id is inside that tail.
+CREATE INDEX IF NOT EXISTS idx_hadiths_unenriched
+  ON hadiths(hadith_number, id)
+  WHERE enriched_at IS NULL;
+
+CREATE OR REPLACE FUNCTION mark_hadith_enriched()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    UPDATE hadiths SET enriched_at = NULL WHERE id = OLD.hadith_id;
+    RETURN OLD;
+  END IF;
+  UPDATE hadiths SET enriched_at = now() WHERE id = NEW.hadith_id AND enriched_at IS NULL;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS hadith_enrichment_mark_enriched ON hadith_enrichment;
+CREATE TRIGGER hadith_enrichment_mark_enriched
+AFTER INSERT OR DELETE ON hadith_enrichment
+FOR EACH ROW EXECUTE FUNCTION mark_hadith_enriched();
+
+-- Same signature as before so existing callers keep working
+CREATE OR REPLACE FUNCTION get_unenriched_hadiths(lim int DEFAULT 5)
+RETURNS TABLE(id uuid, english_translation text, narrator text, grade text)
+LANGUAGE sql STABLE SECURITY DEFINER AS $$
+  SELECT h.id, h.english_translation, h.narrator, h.grade
+  FROM hadiths h
+  WHERE h.enriched_at IS NULL
+    AND h.english_translation IS NOT NULL
+    AND length(h.english_translation) > 10
+  ORDER BY h.hadith_number ASC NULLS LAST, h.id ASC
+  LIMIT lim;
+$$;
+
+-- Cursor-based variant: pass the last (hadith_number, id) seen, both NULL to start over
+CREATE OR REPLACE FUNCTION get_unenriched_hadiths_after(
+  after_hadith_number int DEFAULT NULL,
+  after_id uuid DEFAULT NULL,
+  lim int DEFAULT 20
+)
+RETURNS TABLE(id uuid, english_translation text, narrator text, grade text, hadith_number int)
+LANGUAGE sql STABLE AS $$
+  SELECT h.id, h.english_translation, h.narrator, h.grade, h.hadith_number
+  FROM hadiths h
+  WHERE h.enriched_at IS NULL
+    AND (
+      (after_hadith_number IS NULL AND after_id IS NULL)
+      OR (after_hadith_number IS NOT NULL AND (
+        h.hadith_number IS NULL
+        OR (h.hadith_number, h.id) > (after_hadith_number, COALESCE(after_id, '00000000-0000-0000-0000-000000000000'::uuid))
+      ))
+      OR (after_hadith_number IS NULL AND h.hadith_number IS NULL AND h.id > after_id)
+    )
+    AND h.english_translation IS NOT NULL
+    AND length(h.english_translation) > 10
+  ORDER BY h.hadith_number ASC NULLS LAST, h.id ASC
+  LIMIT lim;
+$$;
+
+-- Claims take the same cursor so a worker moves forward through the corpus
+-- instead of re-scanning rows that keep failing at the head of the queue.
+DROP FUNCTION IF EXISTS claim_unenriched_hadiths(text, int, int);
+CREATE OR REPLACE FUNCTION claim_unenriched_hadiths(
+  p_worker_id text,
+  n int DEFAULT 20,
+  lease_seconds int DEFAULT 600,
+  p_after_hadith_number int DEFAULT NULL,
+  p_after_id uuid DEFAULT NULL
+)
+RETURNS TABLE(id uuid, english_translation text, narrator text, grade text, hadith_number int)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT h.id
+    FROM hadiths h
+    WHERE h.enriched_at IS NULL
+      AND (
+        (p_after_hadith_number IS NULL AND p_after_id IS NULL)
+        OR (p_after_hadith_number IS NOT NULL AND (
+          h.hadith_number IS NULL
+          OR (h.hadith_number, h.id) > (p_after_hadith_number, COALESCE(p_after_id, '00000000-0000-0000-0000-000000000000'::uuid))
+        ))
+        OR (p_after_hadith_number IS NULL AND h.hadith_number IS NULL AND h.id > p_after_id)
+      )
+      AND NOT EXISTS (
+        SELECT 1 FROM enrichment_leases l
+        WHERE l.hadith_id = h.id AND l.leased_until > now()
+      )
+      AND h.english_translation IS NOT NULL
+      AND length(h.english_translation) > 10
+    ORDER BY h.hadith_number ASC NULLS LAST, h.id ASC
+    LIMIT n
+    FOR UPDATE OF h SKIP LOCKED
+  ),
+  leased AS (
+    INSERT INTO enrichment_leases AS l (hadith_id, worker_id, leased_until)
+    SELECT c.id, p_worker_id, now() + make_interval(secs => lease_seconds)
+    FROM candidates c
+    ON CONFLICT (hadith_id) DO UPDATE
+      SET worker_id = EXCLUDED.worker_id,
+          leased_until = EXCLUDED.leased_until,
+          attempts = l.attempts + 1
+      WHERE l.leased_until <= now()
+    RETURNING l.hadith_id
+  )
+  SELECT h.id, h.english_translation, h.narrator, h.grade, h.hadith_number
+  FROM hadiths h
+  JOIN leased ON leased.hadith_id = h.id
+  ORDER BY h.hadith_number ASC NULLS LAST, h.id ASC;
+END;
+$$;
@@ -0,0 +1,283 @@
+-- Delta-maintained tag and category counters.
+-- get_tag_hadith_counts() / get_category_hadith_counts() (109) run COUNT(DISTINCT)
+-- scans over hadith_tag_weights on every call, and 109 recomputes
+-- categories.hadith_count the same way. Here the counters are kept up to date
+-- by statement-level triggers on hadith_tag_weights (one set-based update per
+-- statement, so bulk loads stay cheap), and the RPCs just read them.
+--
+-- Definitions match 109:
+--   tags.weighted_count     = rows in hadith_tag_weights for the tag
+--   categories.hadith_count = distinct hadiths with a weight on any tag in the category
+--
+-- tags.usage_count is left to 012's hadith_tags_usage_count_trigger (published
+-- hadith_tags links), and hadith_tag_weights stays the curated keyword weights:
+-- enrichment writes do not add rows to it.
+--
+-- The distinct count needs to know when a hadith gains its first / loses its
+-- last tag in a category, so category_hadith_refs keeps a per-(category, hadith)
+-- reference count.
+
+CREATE TABLE IF NOT EXISTS category_hadith_refs (
+  category_id uuid NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+  hadith_id uuid NOT NULL REFERENCES hadiths(id) ON DELETE CASCADE,
+  refs int NOT NULL,
+  PRIMARY KEY (category_id, hadith_id)
+);
+
+ALTER TABLE category_hadith_refs ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE tags ADD COLUMN IF NOT EXISTS weighted_count int NOT NULL DEFAULT 0;
+
+-- Apply a signed delta for a set of (hadith_id, tag_id) rows
+CREATE OR REPLACE FUNCTION apply_tag_weight_delta(p_rows jsonb, p_sign int)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  -- Tag counters
+  UPDATE tags t SET weighted_count = GREATEST(0, t.weighted_count + p_sign * d.n)
+  FROM (
+    SELECT (r->>'tag_id')::uuid AS tag_id, count(*) AS n
+    FROM jsonb_array_elements(p_rows) r
+    GROUP BY 1
+  ) d
+  WHERE t.id = d.tag_id;
+
+  IF p_sign > 0 THEN
+    WITH delta AS (
+      SELECT t.category_id, (r->>'hadith_id')::uuid AS hadith_id, count(*) AS n
+      FROM jsonb_array_elements(p_rows) r
+      JOIN tags t ON t.id = (r->>'tag_id')::uuid
+      WHERE t.category_id IS NOT NULL
+      GROUP BY 1, 2
+    ),
+    up AS (
+      INSERT INTO category_hadith_refs AS c (category_id, hadith_id, refs)
+      SELECT category_id, hadith_id, n FROM delta
+      ON CONFLICT (category_id, hadith_id) DO UPDATE SET refs = c.refs + EXCLUDED.refs
+      RETURNING c.category_id, (xmax = 0) AS is_new
+    )
+    UPDATE categories cat SET hadith_count = COALESCE(cat.hadith_count, 0) + x.n
+    FROM (SELECT category_id, count(*) AS n FROM up WHERE is_new GROUP BY 1) x
+    WHERE cat.id = x.category_id;
+  ELSE
+    WITH delta AS (
+      SELECT t.category_id, (r->>'hadith_id')::uuid AS hadith_id, count(*) AS n
+      FROM jsonb_array_elements(p_rows) r
+      JOIN tags t ON t.id = (r->>'tag_id')::uuid
+      WHERE t.category_id IS NOT NULL
+      GROUP BY 1, 2
+    ),
+    down AS (
+      UPDATE category_hadith_refs c SET refs = c.refs - d.n
+      FROM delta d
+      WHERE c.category_id = d.category_id AND c.hadith_id = d.hadith_id
+      RETURNING c.category_id, c.hadith_id, c.refs
+    ),
+    gone AS (
+      DELETE FROM category_hadith_refs c
+      USING down
+      WHERE down.refs <= 0 AND c.category_id = down.category_id AND c.hadith_id = down.hadith_id
+      RETURNING c.category_id
+    )
+    UPDATE categories cat SET hadith_count = GREATEST(0, COALESCE(cat.hadith_count, 0) - x.n)
+    FROM (SELECT category_id, count(*) AS n FROM gone GROUP BY 1) x
+    WHERE cat.id = x.category_id;
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION tag_weights_counts_ins()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM apply_tag_weight_delta(
+    (SELECT COALESCE(jsonb_agg(jsonb_build_object('hadith_id', hadith_id, 'tag_id', tag_id)), '[]') FROM new_rows), 1);
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION tag_weights_counts_del()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM apply_tag_weight_delta(
+    (SELECT COALESCE(jsonb_agg(jsonb_build_object('hadith_id', hadith_id, 'tag_id', tag_id)), '[]') FROM old_rows), -1);
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION tag_weights_counts_upd()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  -- Only re-keyed rows change the counts; weight/source edits do not
+  PERFORM apply_tag_weight_delta(
+    (SELECT COALESCE(jsonb_agg(jsonb_build_object('hadith_id', o.hadith_id, 'tag_id', o.tag_id)), '[]')
+     FROM old_rows o JOIN new_rows n ON n.id = o.id
+     WHERE n.hadith_id <> o.hadith_id OR n.tag_id <> o.tag_id), -1);
+  PERFORM apply_tag_weight_delta(
+    (SELECT COALESCE(jsonb_agg(jsonb_build_object('hadith_id', n.hadith_id, 'tag_id', n.tag_id)), '[]')
+     FROM old_rows o JOIN new_rows n ON n.id = o.id
+     WHERE n.hadith_id <> o.hadith_id OR n.tag_id <> o.tag_id), 1);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS hadith_tag_weights_counts_ins ON hadith_tag_weights;
+CREATE TRIGGER hadith_tag_weights_counts_ins
+AFTER INSERT ON hadith_tag_weights
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION tag_weights_counts_ins();
+
+DROP TRIGGER IF EXISTS hadith_tag_weights_counts_del ON hadith_tag_weights;
+CREATE TRIGGER hadith_tag_weights_counts_del
+AFTER DELETE ON hadith_tag_weights
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION tag_weights_counts_del();
+
+DROP TRIGGER IF EXISTS hadith_tag_weights_counts_upd ON hadith_tag_weights;
+CREATE TRIGGER hadith_tag_weights_counts_upd
+AFTER UPDATE ON hadith_tag_weights
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION tag_weights_counts_upd();
+
+-- Category-only half of apply_tag_weight_delta, for an explicit category
+CREATE OR REPLACE FUNCTION apply_category_refs(p_category_id uuid, p_rows jsonb, p_sign int)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_category_id IS NULL THEN
+    RETURN;
+  END IF;
+  IF p_sign > 0 THEN
+    WITH up AS (
+      INSERT INTO category_hadith_refs AS c (category_id, hadith_id, refs)
+      SELECT p_category_id, (r->>'hadith_id')::uuid, count(*)
+      FROM jsonb_array_elements(p_rows) r
+      GROUP BY 2
+      ON CONFLICT (category_id, hadith_id) DO UPDATE SET refs = c.refs + EXCLUDED.refs
+      RETURNING (xmax = 0) AS is_new
+    )
+    UPDATE categories SET hadith_count = COALESCE(hadith_count, 0) + (SELECT count(*) FROM up WHERE is_new)
+    WHERE id = p_category_id;
+  ELSE
+    WITH down AS (
+      UPDATE category_hadith_refs c SET refs = c.refs - d.n
+      FROM (
+        SELECT (r->>'hadith_id')::uuid AS hadith_id, count(*) AS n
+        FROM jsonb_array_elements(p_rows) r
+        GROUP BY 1
+      ) d
+      WHERE c.category_id = p_category_id AND c.hadith_id = d.hadith_id
+      RETURNING c.hadith_id, c.refs
+    ),
+    gone AS (
+      DELETE FROM category_hadith_refs c
+      USING down
+      WHERE down.refs <= 0 AND c.category_id = p_category_id AND c.hadith_id = down.hadith_id
+      RETURNING 1
+    )
+    UPDATE categories SET hadith_count = GREATEST(0, COALESCE(hadith_count, 0) - (SELECT count(*) FROM gone))
+    WHERE id = p_category_id;
+  END IF;
+END;
+$$;
+
+-- Moving a tag to another category moves its hadiths' category references
+CREATE OR REPLACE FUNCTION tags_category_moved()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  v_rows jsonb;
+BEGIN
+  SELECT COALESCE(jsonb_agg(jsonb_build_object('hadith_id', hadith_id, 'tag_id', tag_id)), '[]')
+  INTO v_rows FROM hadith_tag_weights WHERE tag_id = NEW.id;
+  IF v_rows = '[]' THEN
+    RETURN NULL;
+  END IF;
+  -- Undo under the old category, redo under the new one; weighted_count is unchanged
+  PERFORM apply_category_refs(OLD.category_id, v_rows, -1);
+  PERFORM apply_category_refs(NEW.category_id, v_rows, 1);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tags_category_moved ON tags;
+CREATE TRIGGER tags_category_moved
+AFTER UPDATE OF category_id ON tags
+FOR EACH ROW
+WHEN (OLD.category_id IS DISTINCT FROM NEW.category_id)
+EXECUTE FUNCTION tags_category_moved();
+
+-- verify_taxonomy_counts: counters that disagree with a full recount
+CREATE OR REPLACE FUNCTION verify_taxonomy_counts()
+RETURNS TABLE(kind text, id uuid, slug text, stored bigint, actual bigint)
+LANGUAGE sql STABLE
+AS $$
+  SELECT 'tag', t.id, t.slug, t.weighted_count::bigint, COALESCE(a.n, 0)
+  FROM tags t
+  LEFT JOIN (SELECT tag_id, count(*) AS n FROM hadith_tag_weights GROUP BY tag_id) a ON a.tag_id = t.id
+  WHERE t.weighted_count <> COALESCE(a.n, 0)
+  UNION ALL
+  SELECT 'category', c.id, c.slug, COALESCE(c.hadith_count, 0)::bigint, COALESCE(a.n, 0)
+  FROM categories c
+  LEFT JOIN (
+    SELECT t.category_id, count(DISTINCT htw.hadith_id) AS n
+    FROM hadith_tag_weights htw
+    JOIN tags t ON t.id = htw.tag_id
+    WHERE t.category_id IS NOT NULL
+    GROUP BY t.category_id
+  ) a ON a.category_id = c.id
+  WHERE COALESCE(c.hadith_count, 0) <> COALESCE(a.n, 0);
+$$;
+
+-- repair_taxonomy_counts: rebuild refs and counters from hadith_tag_weights.
+-- Returns how many counters were wrong before the repair.
+CREATE OR REPLACE FUNCTION repair_taxonomy_counts()
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_wrong int;
+BEGIN
+  LOCK TABLE hadith_tag_weights IN SHARE MODE;
+  SELECT count(*) INTO v_wrong FROM verify_taxonomy_counts();
+
+  TRUNCATE category_hadith_refs;
+  INSERT INTO category_hadith_refs (category_id, hadith_id, refs)
+  SELECT t.category_id, htw.hadith_id, count(*)
+  FROM hadith_tag_weights htw
+  JOIN tags t ON t.id = htw.tag_id
+  WHERE t.category_id IS NOT NULL
+  GROUP BY 1, 2;
+
+  UPDATE tags t SET weighted_count = COALESCE(a.n, 0)
+  FROM tags t2
+  LEFT JOIN (SELECT tag_id, count(*) AS n FROM hadith_tag_weights GROUP BY tag_id) a ON a.tag_id = t2.id
+  WHERE t.id = t2.id AND t.weighted_count <> COALESCE(a.n, 0);
+
+  UPDATE categories c SET hadith_count = COALESCE(a.n, 0)
+  FROM categories c2
+  LEFT JOIN (SELECT category_id, count(*) AS n FROM category_hadith_refs GROUP BY category_id) a ON a.category_id = c2.id
+  WHERE c.id = c2.id AND COALESCE(c.hadith_count, 0) <> COALESCE(a.n, 0);
+
+  RETURN v_wrong;
+END;
+$$;
+
+-- Read the maintained counters instead of aggregating on every call
+CREATE OR REPLACE FUNCTION get_tag_hadith_counts()
+RETURNS TABLE(tag_id uuid, hadith_count bigint)
+LANGUAGE sql STABLE
+AS $$
+  SELECT id, weighted_count::bigint FROM tags WHERE weighted_count > 0;
+$$;
+
+CREATE OR REPLACE FUNCTION get_category_hadith_counts()
+RETURNS TABLE(category_id uuid, hadith_count bigint)
+LANGUAGE sql STABLE
+AS $$
+  SELECT id, hadith_count::bigint FROM categories WHERE hadith_count > 0;
+$$;
+
+-- Bring the counters in line once after installing the triggers
+SELECT repair_taxonomy_counts();
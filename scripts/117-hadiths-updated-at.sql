@@ -0,0 +1,38 @@
+-- Keep hadiths.updated_at current so snapshot refreshes
+-- (scripts/export_snapshot.py) can pull only rows changed since the last export.
+-- hadith_tags and hadith_tag_weights get the same column: created_at missed
+-- status and weight edits to existing rows. set_updated_at() comes from
+-- 012-enrichment-schema.sql.
+
+DROP TRIGGER IF EXISTS set_hadiths_updated_at ON hadiths;
+CREATE TRIGGER set_hadiths_updated_at
+BEFORE UPDATE ON hadiths
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Backfilled from created_at before the triggers exist, so the backfill keeps it
+ALTER TABLE hadith_tags ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+UPDATE hadith_tags SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL;
+ALTER TABLE hadith_tags ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE hadith_tags ALTER COLUMN updated_at SET NOT NULL;
+
+ALTER TABLE hadith_tag_weights ADD COLUMN IF NOT EXISTS updated_at timestamptz;
+UPDATE hadith_tag_weights SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL;
+ALTER TABLE hadith_tag_weights ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE hadith_tag_weights ALTER COLUMN updated_at SET NOT NULL;
+
+DROP TRIGGER IF EXISTS set_hadith_tags_updated_at ON hadith_tags;
+CREATE TRIGGER set_hadith_tags_updated_at
+BEFORE UPDATE ON hadith_tags
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS set_hadith_tag_weights_updated_at ON hadith_tag_weights;
+CREATE TRIGGER set_hadith_tag_weights_updated_at
+BEFORE UPDATE ON hadith_tag_weights
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_hadiths_updated_at ON hadiths(updated_at);
+CREATE INDEX IF NOT EXISTS idx_hadith_enrichment_updated_at ON hadith_enrichment(updated_at);
+DROP INDEX IF EXISTS idx_hadith_tags_created_at;
+DROP INDEX IF EXISTS idx_htw_created_at;
+CREATE INDEX IF NOT EXISTS idx_hadith_tags_updated_at ON hadith_tags(updated_at);
+CREATE INDEX IF NOT EXISTS idx_htw_updated_at ON hadith_tag_weights(updated_at);
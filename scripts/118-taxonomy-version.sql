@@ -0,0 +1,192 @@
+-- Taxonomy version + id-based bulk writes.
+--
+-- Enrichment workers cache categories/tags/tag_aliases locally
+-- (scripts/enrichment/taxonomy.py) and only re-download them when
+-- taxonomy_version changes. Any insert/delete, or a change to a slug,
+-- is_active or category_id, bumps the version; counter updates
+-- (usage_count, weighted_count, hadith_count) do not.
+--
+-- With the vocabulary resolved client-side, insert_enrichments_bulk accepts
+-- category_id / tag_ids per row and skips the slug and alias joins for those
+-- rows. Rows that only carry category_slug / tag_slugs resolve as before.
+
+CREATE TABLE IF NOT EXISTS taxonomy_version (
+  id boolean PRIMARY KEY DEFAULT true CHECK (id),
+  version bigint NOT NULL DEFAULT 1,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO taxonomy_version (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE taxonomy_version ENABLE ROW LEVEL SECURITY;
+
+-- RLS with no policies: the trigger runs as the owner so edits to the
+-- taxonomy by other roles still bump the version.
+CREATE OR REPLACE FUNCTION bump_taxonomy_version()
+RETURNS trigger LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE taxonomy_version SET version = version + 1, updated_at = now();
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS categories_taxonomy_version ON categories;
+CREATE TRIGGER categories_taxonomy_version
+AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF slug, is_active ON categories
+FOR EACH STATEMENT EXECUTE FUNCTION bump_taxonomy_version();
+
+DROP TRIGGER IF EXISTS tags_taxonomy_version ON tags;
+CREATE TRIGGER tags_taxonomy_version
+AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF slug, is_active, category_id ON tags
+FOR EACH STATEMENT EXECUTE FUNCTION bump_taxonomy_version();
+
+DROP TRIGGER IF EXISTS tag_aliases_taxonomy_version ON tag_aliases;
+CREATE TRIGGER tag_aliases_taxonomy_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tag_aliases
+FOR EACH STATEMENT EXECUTE FUNCTION bump_taxonomy_version();
+
+CREATE OR REPLACE FUNCTION get_taxonomy_version()
+RETURNS bigint
+LANGUAGE sql STABLE
+AS $$
+  SELECT version FROM taxonomy_version;
+$$;
+
+-- The whole vocabulary in one round trip, stamped with its version
+CREATE OR REPLACE FUNCTION get_taxonomy()
+RETURNS jsonb
+LANGUAGE sql STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'version', (SELECT version FROM taxonomy_version),
+    'categories', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('id', id, 'slug', slug) ORDER BY slug)
+      FROM categories WHERE is_active IS NOT FALSE
+    ), '[]'),
+    'tags', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('id', id, 'slug', slug, 'category_id', category_id) ORDER BY slug)
+      FROM tags WHERE is_active IS NOT FALSE
+    ), '[]'),
+    'aliases', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('alias_slug', alias_slug, 'tag_id', tag_id) ORDER BY alias_slug)
+      FROM tag_aliases
+    ), '[]')
+  );
+$$;
+
+-- insert_enrichments_bulk (114) with optional pre-resolved ids per row:
+--   { ..., category_id, tag_ids: [..] }  -- used as-is
+--   { ..., category_slug, tag_slugs: [..] }  -- resolved via categories/tags/tag_aliases
+-- Same skip rule and return value as 114; dropped first for databases that
+-- still have the version returning int.
+DROP FUNCTION IF EXISTS insert_enrichments_bulk(jsonb);
+CREATE FUNCTION insert_enrichments_bulk(p_rows jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_result jsonb;
+BEGIN
+  WITH input AS (
+    SELECT *
+    FROM jsonb_to_recordset(p_rows) AS r(
+      hadith_id uuid,
+      summary_line text,
+      summary_ar text,
+      key_teaching_en text,
+      key_teaching_ar text,
+      category_slug text,
+      category_id uuid,
+      tag_slugs text[],
+      tag_ids uuid[],
+      confidence numeric,
+      rationale text,
+      suggested_by text,
+      methodology_version text,
+      status text
+    )
+  ),
+  resolved AS (
+    SELECT i.hadith_id, i.summary_line, i.summary_ar, i.key_teaching_en, i.key_teaching_ar,
+      i.confidence, i.rationale, i.suggested_by, i.methodology_version, i.status,
+      COALESCE(i.category_id, c.id, fallback.id) AS category_id
+    FROM input i
+    LEFT JOIN categories c ON i.category_id IS NULL AND c.slug = i.category_slug
+    CROSS JOIN (SELECT id FROM categories WHERE slug = 'daily-life') fallback
+  ),
+  upserted AS (
+    INSERT INTO hadith_enrichment (
+      hadith_id, summary_line, summary_ar,
+      key_teaching_en, key_teaching_ar,
+      category_id, status, confidence, rationale,
+      suggested_by, methodology_version, published_at
+    )
+    SELECT
+      r.hadith_id, r.summary_line, r.summary_ar,
+      r.key_teaching_en, r.key_teaching_ar,
+      r.category_id,
+      COALESCE(r.status, 'published')::enrichment_status,
+      r.confidence, r.rationale,
+      COALESCE(r.suggested_by, 'deepinfra-llama-3.3-70b'),
+      COALESCE(r.methodology_version, 'v1.1'),
+      CASE WHEN COALESCE(r.status, 'published') = 'published' THEN now() END
+    FROM resolved r
+    ON CONFLICT (hadith_id) DO UPDATE SET
+      summary_line = EXCLUDED.summary_line,
+      summary_ar = EXCLUDED.summary_ar,
+      key_teaching_en = EXCLUDED.key_teaching_en,
+      key_teaching_ar = EXCLUDED.key_teaching_ar,
+      category_id = EXCLUDED.category_id,
+      status = EXCLUDED.status,
+      confidence = EXCLUDED.confidence,
+      rationale = EXCLUDED.rationale,
+      suggested_by = EXCLUDED.suggested_by,
+      methodology_version = EXCLUDED.methodology_version,
+      published_at = EXCLUDED.published_at
+    -- Only unreviewed drafts are replaced; approved, published (including
+    -- propagated) and rejected rows are left alone and reported as skipped
+    WHERE hadith_enrichment.status = 'suggested'
+    RETURNING id, hadith_id, status
+  ),
+  slugs AS (
+    SELECT DISTINCT i.hadith_id, s.slug
+    FROM input i
+    CROSS JOIN LATERAL unnest(COALESCE(i.tag_slugs, '{}')) AS s(slug)
+    WHERE i.tag_ids IS NULL
+  ),
+  tag_ids AS (
+    SELECT DISTINCT s.hadith_id, COALESCE(t.id, a.tag_id) AS tag_id
+    FROM slugs s
+    LEFT JOIN tags t ON t.slug = s.slug
+    LEFT JOIN tag_aliases a ON a.alias_slug = s.slug
+    WHERE COALESCE(t.id, a.tag_id) IS NOT NULL
+    UNION
+    SELECT i.hadith_id, u.tag_id
+    FROM input i
+    CROSS JOIN LATERAL unnest(i.tag_ids) AS u(tag_id)
+    WHERE i.tag_ids IS NOT NULL
+  ),
+  linked AS (
+    INSERT INTO hadith_tags (hadith_id, tag_id, enrichment_id, status)
+    SELECT ti.hadith_id, ti.tag_id, u.id, u.status
+    FROM tag_ids ti
+    JOIN upserted u ON u.hadith_id = ti.hadith_id
+    ON CONFLICT (hadith_id, tag_id) DO NOTHING
+    RETURNING 1
+  )
+  SELECT jsonb_build_object(
+    'written', (SELECT count(*) FROM upserted),
+    'skipped', COALESCE((
+      SELECT jsonb_agg(DISTINCT i.hadith_id)
+      FROM input i
+      WHERE NOT EXISTS (SELECT 1 FROM upserted u WHERE u.hadith_id = i.hadith_id)
+    ), '[]'::jsonb)
+  ) INTO v_result;
+
+  RETURN v_result;
+END;
+$$;
@@ -0,0 +1,221 @@
+-- Near-duplicate clusters (parallel narrations of the same matn across
+-- collections), built by scripts/dedup_hadiths.py with MinHash/LSH over
+-- english_translation and normalised arabic_text.
+--
+-- Only one hadith per cluster (the representative) is sent to the LLM: the
+-- claim queue skips the other members, and propagate_cluster_enrichments()
+-- copies the representative's published enrichment, tags and weights to
+-- members within the similarity floor once it is written. similarity is each
+-- member's score against its representative. Hadiths not in any cluster
+-- behave exactly as before.
+--
+-- A member is claimed on its own when it is below the floor, when its
+-- representative was enriched but not published, or when the representative
+-- has been rejected by the quality gate (enrichment/quality.py) too often.
+
+CREATE TABLE IF NOT EXISTS hadith_clusters (
+  hadith_id uuid PRIMARY KEY REFERENCES hadiths(id) ON DELETE CASCADE,
+  cluster_id uuid NOT NULL,
+  representative_id uuid NOT NULL REFERENCES hadiths(id) ON DELETE CASCADE,
+  similarity numeric(4,3) NOT NULL DEFAULT 1,
+  method text NOT NULL DEFAULT 'minhash',
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_hadith_clusters_cluster ON hadith_clusters(cluster_id);
+CREATE INDEX IF NOT EXISTS idx_hadith_clusters_representative ON hadith_clusters(representative_id);
+
+ALTER TABLE hadith_clusters ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "hadith_clusters_select_all" ON hadith_clusters;
+CREATE POLICY "hadith_clusters_select_all" ON hadith_clusters
+  FOR SELECT TO authenticated, anon USING (true);
+
+-- Quality gate rejections per hadith, recorded by the enrichment runner
+CREATE TABLE IF NOT EXISTS enrichment_rejections (
+  hadith_id uuid PRIMARY KEY REFERENCES hadiths(id) ON DELETE CASCADE,
+  rejections int NOT NULL DEFAULT 1,
+  problems text[] NOT NULL DEFAULT '{}',
+  last_rejected_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Service role only; no public policies
+ALTER TABLE enrichment_rejections ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION record_enrichment_rejection(p_hadith_id uuid, p_problems text[])
+RETURNS int
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+  INSERT INTO enrichment_rejections AS r (hadith_id, problems)
+  VALUES (p_hadith_id, COALESCE(p_problems, '{}'))
+  ON CONFLICT (hadith_id) DO UPDATE
+    SET rejections = r.rejections + 1,
+        problems = EXCLUDED.problems,
+        last_rejected_at = now()
+  RETURNING rejections;
+$$;
+
+-- Drop functions whose signature changed so the new definitions replace them
+DROP FUNCTION IF EXISTS propagate_cluster_enrichments(uuid[]);
+
+-- propagate_cluster_enrichments: copy published enrichments from the given
+-- representatives (NULL = every representative) to unenriched members of their
+-- clusters whose similarity to the representative is at least p_min_similarity.
+-- Confidence is scaled by the member's similarity; the rationale names the source.
+-- Returns the number of hadiths enriched.
+CREATE OR REPLACE FUNCTION propagate_cluster_enrichments(
+  p_representative_ids uuid[] DEFAULT NULL,
+  p_min_similarity numeric DEFAULT 0.8
+)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_count int;
+BEGIN
+  WITH targets AS (
+    SELECT hc.hadith_id, hc.similarity, he.id AS source_id,
+      he.summary_line, he.summary_ar, he.key_teaching_en, he.key_teaching_ar,
+      he.category_id, he.status, he.confidence, he.suggested_by,
+      he.methodology_version, he.published_at
+    FROM hadith_clusters hc
+    JOIN hadith_enrichment he ON he.hadith_id = hc.representative_id
+    WHERE hc.hadith_id <> hc.representative_id
+      AND hc.similarity >= p_min_similarity
+      AND he.status = 'published'
+      AND (p_representative_ids IS NULL OR hc.representative_id = ANY(p_representative_ids))
+      AND NOT EXISTS (SELECT 1 FROM hadith_enrichment x WHERE x.hadith_id = hc.hadith_id)
+  ),
+  copied AS (
+    INSERT INTO hadith_enrichment (
+      hadith_id, summary_line, summary_ar,
+      key_teaching_en, key_teaching_ar,
+      category_id, status, confidence, rationale,
+      suggested_by, methodology_version, published_at
+    )
+    SELECT
+      t.hadith_id, t.summary_line, t.summary_ar,
+      t.key_teaching_en, t.key_teaching_ar,
+      t.category_id, t.status,
+      round(COALESCE(t.confidence, 0.8) * t.similarity, 2),
+      'Shared from parallel narration (enrichment ' || t.source_id::text || ')',
+      t.suggested_by, t.methodology_version, t.published_at
+    FROM targets t
+    ON CONFLICT (hadith_id) DO NOTHING
+    RETURNING id, hadith_id, status
+  ),
+  source_map AS (
+    SELECT c.id AS enrichment_id, c.hadith_id, c.status, hc.representative_id
+    FROM copied c
+    JOIN hadith_clusters hc ON hc.hadith_id = c.hadith_id
+  ),
+  linked AS (
+    INSERT INTO hadith_tags (hadith_id, tag_id, enrichment_id, status)
+    SELECT s.hadith_id, ht.tag_id, s.enrichment_id, s.status
+    FROM source_map s
+    JOIN hadith_tags ht ON ht.hadith_id = s.representative_id
+    ON CONFLICT (hadith_id, tag_id) DO NOTHING
+    RETURNING 1
+  ),
+  weighted AS (
+    INSERT INTO hadith_tag_weights (hadith_id, tag_id, weight, source)
+    SELECT s.hadith_id, w.tag_id, w.weight, w.source
+    FROM source_map s
+    JOIN hadith_tag_weights w ON w.hadith_id = s.representative_id
+    ON CONFLICT (hadith_id, tag_id) DO NOTHING
+    RETURNING 1
+  )
+  SELECT count(*) INTO v_count FROM copied;
+
+  RETURN v_count;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS claim_unenriched_hadiths(text, int, int, int, uuid);
+
+-- Claims skip cluster members while their representative covers them: it is
+-- published (propagation copies it), or still pending and not yet rejected
+-- p_max_rejections times. Hadiths rejected that often are not claimed again
+-- (see `enrich.py status`); their members are claimed instead.
+-- count_claimable_hadiths (124) repeats this WHERE clause for the ETA.
+CREATE OR REPLACE FUNCTION claim_unenriched_hadiths(
+  p_worker_id text,
+  n int DEFAULT 20,
+  lease_seconds int DEFAULT 600,
+  p_after_hadith_number int DEFAULT NULL,
+  p_after_id uuid DEFAULT NULL,
+  p_min_similarity numeric DEFAULT 0.8,
+  p_max_rejections int DEFAULT 3
+)
+RETURNS TABLE(id uuid, english_translation text, narrator text, grade text, hadith_number int)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT h.id
+    FROM hadiths h
+    WHERE h.enriched_at IS NULL
+      AND (
+        (p_after_hadith_number IS NULL AND p_after_id IS NULL)
+        OR (p_after_hadith_number IS NOT NULL AND (
+          h.hadith_number IS NULL
+          OR (h.hadith_number, h.id) > (p_after_hadith_number, COALESCE(p_after_id, '00000000-0000-0000-0000-000000000000'::uuid))
+        ))
+        OR (p_after_hadith_number IS NULL AND h.hadith_number IS NULL AND h.id > p_after_id)
+      )
+      AND NOT EXISTS (
+        SELECT 1 FROM enrichment_leases l
+        WHERE l.hadith_id = h.id AND l.leased_until > now()
+      )
+      AND NOT EXISTS (
+        SELECT 1 FROM enrichment_rejections r
+        WHERE r.hadith_id = h.id AND r.rejections >= p_max_rejections
+      )
+      AND NOT EXISTS (
+        SELECT 1
+        FROM hadith_clusters hc
+        JOIN hadiths rep ON rep.id = hc.representative_id
+        WHERE hc.hadith_id = h.id
+          AND hc.representative_id <> h.id
+          AND hc.similarity >= p_min_similarity
+          AND (
+            EXISTS (
+              SELECT 1 FROM hadith_enrichment he
+              WHERE he.hadith_id = rep.id AND he.status = 'published'
+            )
+            OR (
+              rep.enriched_at IS NULL
+              AND NOT EXISTS (
+                SELECT 1 FROM enrichment_rejections r
+                WHERE r.hadith_id = rep.id AND r.rejections >= p_max_rejections
+              )
+            )
+          )
+      )
+      AND h.english_translation IS NOT NULL
+      AND length(h.english_translation) > 10
+    ORDER BY h.hadith_number ASC NULLS LAST, h.id ASC
+    LIMIT n
+    FOR UPDATE OF h SKIP LOCKED
+  ),
+  leased AS (
+    INSERT INTO enrichment_leases AS l (hadith_id, worker_id, leased_until)
+    SELECT c.id, p_worker_id, now() + make_interval(secs => lease_seconds)
+    FROM candidates c
+    ON CONFLICT (hadith_id) DO UPDATE
+      SET worker_id = EXCLUDED.worker_id,
+          leased_until = EXCLUDED.leased_until,
+          attempts = l.attempts + 1
+      WHERE l.leased_until <= now()
+    RETURNING l.hadith_id
+  )
+  SELECT h.id, h.english_translation, h.narrator, h.grade, h.hadith_number
+  FROM hadiths h
+  JOIN leased ON leased.hadith_id = h.id
+  ORDER BY h.hadith_number ASC NULLS LAST, h.id ASC;
+END;
+$$;
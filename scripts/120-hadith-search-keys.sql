@@ -0,0 +1,75 @@
+-- Precomputed Arabic search keys. hadiths.arabic_text is stored as published,
+-- with tashkeel and inconsistent alef/hamza/ta-marbuta spellings, so a runtime
+-- ILIKE on it misses most real queries and scans the whole table.
+--
+-- scripts/search_keys.py fills hadith_search_keys with the normalised text and
+-- its distinct tokens (enrichment/arabic.py). The search route normalises the
+-- query the same way (lib/arabic-search.ts) and matches against arabic_norm,
+-- which the trigram index serves for ILIKE '%...%', or arabic_tokens with @>.
+-- Keys are invalidated when arabic_text changes and rebuilt on the next run.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE IF NOT EXISTS hadith_search_keys (
+  hadith_id uuid PRIMARY KEY REFERENCES hadiths(id) ON DELETE CASCADE,
+  arabic_norm text NOT NULL DEFAULT '',
+  arabic_tokens text[] NOT NULL DEFAULT '{}',
+  source_hash text NOT NULL,
+  normaliser_version int NOT NULL DEFAULT 1,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_hadith_search_keys_norm_trgm
+  ON hadith_search_keys USING gin (arabic_norm gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_hadith_search_keys_tokens
+  ON hadith_search_keys USING gin (arabic_tokens);
+
+DROP TRIGGER IF EXISTS hadith_search_keys_updated_at ON hadith_search_keys;
+CREATE TRIGGER hadith_search_keys_updated_at
+  BEFORE UPDATE ON hadith_search_keys
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+ALTER TABLE hadith_search_keys ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "hadith_search_keys_select_all" ON hadith_search_keys;
+CREATE POLICY "hadith_search_keys_select_all" ON hadith_search_keys
+  FOR SELECT TO authenticated, anon USING (true);
+
+-- Drop the key when the source text changes; search_keys.py recomputes it
+CREATE OR REPLACE FUNCTION invalidate_hadith_search_key()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  DELETE FROM hadith_search_keys WHERE hadith_id = NEW.id;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS hadiths_search_key_stale ON hadiths;
+CREATE TRIGGER hadiths_search_key_stale
+  AFTER UPDATE OF arabic_text ON hadiths
+  FOR EACH ROW
+  WHEN (OLD.arabic_text IS DISTINCT FROM NEW.arabic_text)
+  EXECUTE FUNCTION invalidate_hadith_search_key();
+
+-- get_stale_search_keys: hadiths with no key, or one built by an older
+-- normaliser, in id order after p_after_id (keyset paging for the backfill)
+CREATE OR REPLACE FUNCTION get_stale_search_keys(
+  p_version int,
+  p_after_id uuid DEFAULT NULL,
+  n int DEFAULT 1000
+)
+RETURNS TABLE(id uuid, arabic_text text)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+  SELECT h.id, h.arabic_text
+  FROM hadiths h
+  LEFT JOIN hadith_search_keys k ON k.hadith_id = h.id
+  WHERE (p_after_id IS NULL OR h.id > p_after_id)
+    AND (k.hadith_id IS NULL OR k.normaliser_version < p_version)
+  ORDER BY h.id
+  LIMIT n;
+$$;
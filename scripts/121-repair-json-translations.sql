@@ -0,0 +1,59 @@
+-- One-shot repair of english_translation values stored as JSON
+-- ('{"narrator": "Narrated Anas:", "text": "..."}') by some imports.
+-- scripts/repair_translations.py pages through them with
+-- get_json_translations(), splits each blob with enrichment/translation.py and
+-- writes the results back with repair_translations_bulk(), so the chat route and
+-- enrichment prompts read plain text without parsing per row.
+
+-- get_json_translations: hadiths whose english_translation looks like a JSON
+-- blob, in id order after p_after_id (keyset paging for the repair job)
+CREATE OR REPLACE FUNCTION get_json_translations(
+  p_after_id uuid DEFAULT NULL,
+  n int DEFAULT 1000
+)
+RETURNS TABLE(id uuid, english_translation text, narrator text)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+  SELECT h.id, h.english_translation, h.narrator
+  FROM hadiths h
+  WHERE (p_after_id IS NULL OR h.id > p_after_id)
+    AND h.english_translation LIKE '{%'
+    AND strpos(h.english_translation, '"text"') > 0
+  ORDER BY h.id
+  LIMIT n;
+$$;
+
+-- repair_translations_bulk: apply a batch of repaired rows in one statement.
+--
+-- p_rows is a JSON array of objects:
+--   { id, english_translation, narrator, source_hash }
+-- source_hash is md5 of the english_translation the job read; rows edited
+-- since then are left alone (re-run the job to pick them up). narrator only
+-- fills an empty column. Returns the number of hadiths updated.
+CREATE OR REPLACE FUNCTION repair_translations_bulk(p_rows jsonb)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_count int;
+BEGIN
+  UPDATE hadiths h
+  SET english_translation = r.english_translation,
+      narrator = COALESCE(NULLIF(h.narrator, ''), r.narrator)
+  FROM jsonb_to_recordset(p_rows) AS r(
+    id uuid,
+    english_translation text,
+    narrator text,
+    source_hash text
+  )
+  WHERE h.id = r.id
+    AND md5(h.english_translation) = r.source_hash
+    AND r.english_translation <> '';
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$;
+
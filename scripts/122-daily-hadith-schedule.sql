@@ -0,0 +1,22 @@
+-- Precomputed hadith of the day. /api/daily-hadith used to count every sahih
+-- hadith and then read one row at OFFSET hash(date) % count on each request;
+-- now it reads the row for today's date by primary key.
+--
+-- scripts/daily_schedule.py fills the table a year or more ahead with seeded,
+-- deterministic picks and no repeats within a window. Existing dates are kept
+-- unless it is run with --rebuild, so a published day never changes.
+
+CREATE TABLE IF NOT EXISTS daily_hadith_schedule (
+  date date PRIMARY KEY,
+  hadith_id uuid NOT NULL REFERENCES hadiths(id) ON DELETE CASCADE,
+  seed text NOT NULL DEFAULT '',
+  created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_daily_hadith_schedule_hadith ON daily_hadith_schedule(hadith_id);
+
+ALTER TABLE daily_hadith_schedule ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "daily_hadith_schedule_select_all" ON daily_hadith_schedule;
+CREATE POLICY "daily_hadith_schedule_select_all" ON daily_hadith_schedule
+  FOR SELECT TO authenticated, anon USING (true);
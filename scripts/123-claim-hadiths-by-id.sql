@@ -0,0 +1,56 @@
+-- Lease specific hadiths for a resumed enrichment run.
+-- The journal (scripts/enrichment/journal.py) remembers hadiths a killed run had
+-- claimed but not finished. Re-running them straight from the journal skipped
+-- the lease queue, so another worker could be enriching the same hadith, and
+-- ones enriched in the meantime were sent to the LLM again.
+--
+-- claim_hadiths_by_id() takes leases on the given ids only when they are still
+-- unenriched and not leased by another live worker. Leases held by the killed
+-- run (p_previous_workers) are taken over instead of waiting for them to expire.
+-- Ids that are not returned must be dropped by the caller.
+
+CREATE OR REPLACE FUNCTION claim_hadiths_by_id(
+  p_worker_id text,
+  p_ids uuid[],
+  lease_seconds int DEFAULT 600,
+  p_previous_workers text[] DEFAULT '{}'
+)
+RETURNS TABLE(id uuid, english_translation text, narrator text, grade text, hadith_number int)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT h.id
+    FROM hadiths h
+    WHERE h.id = ANY(p_ids)
+      AND h.enriched_at IS NULL
+      AND NOT EXISTS (
+        SELECT 1 FROM enrichment_leases l
+        WHERE l.hadith_id = h.id
+          AND l.leased_until > now()
+          AND l.worker_id <> p_worker_id
+          AND NOT l.worker_id = ANY(COALESCE(p_previous_workers, '{}'))
+      )
+    FOR UPDATE OF h SKIP LOCKED
+  ),
+  leased AS (
+    INSERT INTO enrichment_leases AS l (hadith_id, worker_id, leased_until)
+    SELECT c.id, p_worker_id, now() + make_interval(secs => lease_seconds)
+    FROM candidates c
+    ON CONFLICT (hadith_id) DO UPDATE
+      SET worker_id = EXCLUDED.worker_id,
+          leased_until = EXCLUDED.leased_until,
+          attempts = l.attempts + 1
+      WHERE l.leased_until <= now()
+         OR l.worker_id = p_worker_id
+         OR l.worker_id = ANY(COALESCE(p_previous_workers, '{}'))
+    RETURNING l.hadith_id
+  )
+  SELECT h.id, h.english_translation, h.narrator, h.grade, h.hadith_number
+  FROM hadiths h
+  JOIN leased ON leased.hadith_id = h.id
+  ORDER BY h.hadith_number ASC NULLS LAST, h.id ASC;
+END;
+$$;
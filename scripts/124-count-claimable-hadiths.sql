@@ -0,0 +1,49 @@
+-- Remaining work for the enrichment ETA.
+-- The runner counted hadiths?enriched_at=is.null, which includes hadiths the
+-- claim queue never hands out: too-short translations, cluster members covered
+-- by their representative, and hadiths rejected too often. The ETA never
+-- reached zero.
+--
+-- count_claimable_hadiths() uses the WHERE clause of claim_unenriched_hadiths
+-- (119) without the cursor; keep the two in step. Hadiths leased right now
+-- are counted: they are in flight, not done.
+
+CREATE OR REPLACE FUNCTION count_claimable_hadiths(
+  p_min_similarity numeric DEFAULT 0.8,
+  p_max_rejections int DEFAULT 3
+)
+RETURNS bigint
+LANGUAGE sql STABLE
+SECURITY DEFINER
+AS $$
+  SELECT count(*)
+  FROM hadiths h
+  WHERE h.enriched_at IS NULL
+    AND NOT EXISTS (
+      SELECT 1 FROM enrichment_rejections r
+      WHERE r.hadith_id = h.id AND r.rejections >= p_max_rejections
+    )
+    AND NOT EXISTS (
+      SELECT 1
+      FROM hadith_clusters hc
+      JOIN hadiths rep ON rep.id = hc.representative_id
+      WHERE hc.hadith_id = h.id
+        AND hc.representative_id <> h.id
+        AND hc.similarity >= p_min_similarity
+        AND (
+          EXISTS (
+            SELECT 1 FROM hadith_enrichment he
+            WHERE he.hadith_id = rep.id AND he.status = 'published'
+          )
+          OR (
+            rep.enriched_at IS NULL
+            AND NOT EXISTS (
+              SELECT 1 FROM enrichment_rejections r
+              WHERE r.hadith_id = rep.id AND r.rejections >= p_max_rejections
+            )
+          )
+        )
+    )
+    AND h.english_translation IS NOT NULL
+    AND length(h.english_translation) > 10;
+$$;
@@ -0,0 +1,125 @@
+import argparse, json, os, subprocess, sys, tempfile, time
+
+from enrichment.mock import MockLLM, MockPostgREST, sample_hadiths
+
+# Throughput benchmark for `enrich.py run` against local mocks (enrichment/mock.py).
+# Runs the real pipeline once per concurrency level over a fresh in-memory corpus
+# and reports items/s, claim-to-write latency and tokens per item.
+#
+#   python scripts/bench_enrich.py --hadiths 500 --concurrency 1,4,8,16
+#   python scripts/bench_enrich.py --rate-429 0.05 --tpm 200000
+#   python scripts/bench_enrich.py --save bench.json            # record a baseline
+#   python scripts/bench_enrich.py --baseline bench.json        # exit 1 on regression
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+ap = argparse.ArgumentParser(description="Benchmark the enrichment pipeline against a mock LLM and PostgREST")
+ap.add_argument("--hadiths", type=int, default=300, help="corpus size per run")
+ap.add_argument("--concurrency", default="1,4,8,16", help="comma-separated --workers levels")
+ap.add_argument("--per-request", type=int, default=10, help="max hadiths per LLM prompt (packed by tokens)")
+ap.add_argument("--write-batch", type=int, default=50)
+ap.add_argument("--rps", type=float, default=0, help="client-side LLM rate limit (0 = unlimited)")
+ap.add_argument("--latency", type=float, default=0.5, help="mock LLM base latency (s)")
+ap.add_argument("--per-token", type=float, default=0.0005, help="mock LLM extra latency per completion token (s)")
+ap.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to LLM latency")
+ap.add_argument("--rate-429", type=float, default=0.0, help="fraction of LLM requests answered with 429")
+ap.add_argument("--tpm", type=int, default=0, help="mock LLM tokens-per-minute budget (0 = none)")
+ap.add_argument("--db-latency", type=float, default=0.02, help="mock PostgREST latency per request (s)")
+ap.add_argument("--seed", type=int, default=0)
+ap.add_argument("--save", help="write results as JSON")
+ap.add_argument("--baseline", help="compare with a saved run; exit 1 on regression")
+ap.add_argument("--tolerance", type=float, default=0.15, help="allowed items/s drop or p99/tokens rise vs baseline")
+ap.add_argument("--verbose", action="store_true", help="show enrich.py output")
+args = ap.parse_args()
+
+
+def pct(xs, p):
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+
+def run(workers):
+    db = MockPostgREST(sample_hadiths(args.hadiths, args.seed), latency=args.db_latency).start()
+    llm = MockLLM(args.latency, args.per_token, args.jitter, args.rate_429, args.tpm, seed=args.seed).start()
+    tmp = tempfile.mkdtemp(prefix="enrich-bench-")
+    env = dict(
+        os.environ,
+        NEXT_PUBLIC_SUPABASE_URL=db.url,
+        SUPABASE_SERVICE_ROLE_KEY="bench",
+        ENRICH_LLM_KEY="bench",
+        ENRICH_LLM_URL=llm.url + "/v1/chat/completions",
+        ENRICH_LLM_MODEL="bench",
+        ENRICH_JOURNAL_FILE=os.path.join(tmp, "journal.jsonl"),
+        ENRICH_CURSOR_FILE=os.path.join(tmp, "cursor.json"),
+        ENRICH_CACHE_FILE=os.path.join(tmp, "cache.sqlite"),
+        ENRICH_TAXONOMY_FILE=os.path.join(tmp, "taxonomy.json"),
+        ENRICH_BUDGET_FILE=os.path.join(tmp, "budget.json"),
+    )
+    cmd = [
+        sys.executable, os.path.join(HERE, "enrich.py"), "run",
+        "--batch", "0", "--workers", str(workers), "--rps", str(args.rps),
+        "--per-request", str(args.per_request), "--write-batch", str(args.write_batch),
+        "--report", "0", "--no-cache", "--no-resume", "--provider", "openai-compatible",
+    ]
+    t0 = time.monotonic()
+    try:
+        subprocess.run(cmd, env=env, check=True, stdout=None if args.verbose else subprocess.DEVNULL)
+        elapsed = time.monotonic() - t0
+    finally:
+        db.stop()
+        llm.stop()
+    lat = db.latencies()
+    items = len(db.written_at)
+    tokens = llm.prompt_tokens + llm.completion_tokens
+    return {
+        "workers": workers,
+        "items": items,
+        "seconds": round(elapsed, 2),
+        "items_per_s": round(items / elapsed, 2) if elapsed else 0.0,
+        "p50_s": round(pct(lat, 50), 3),
+        "p99_s": round(pct(lat, 99), 3),
+        "tokens_per_item": round(tokens / items, 1) if items else 0.0,
+        "llm_requests": llm.requests,
+        "throttled": llm.throttled,
+    }
+
+
+levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+print(f"{args.hadiths} hadiths, {args.per_request}/prompt, LLM {args.latency}s +{args.per_token}s/token, 429 rate {args.rate_429}, tpm {args.tpm or 'unlimited'}")
+print(f"{'workers':>7} {'items':>6} {'secs':>7} {'items/s':>8} {'p50 s':>7} {'p99 s':>7} {'tok/item':>8} {'reqs':>5} {'429s':>5}")
+results = []
+for w in levels:
+    r = run(w)
+    results.append(r)
+    print(f"{r['workers']:>7} {r['items']:>6} {r['seconds']:>7} {r['items_per_s']:>8} {r['p50_s']:>7} {r['p99_s']:>7} {r['tokens_per_item']:>8} {r['llm_requests']:>5} {r['throttled']:>5}")
+    if r["items"] < args.hadiths:
+        print(f"  warning: only {r['items']}/{args.hadiths} hadiths written")
+
+if args.save:
+    with open(args.save, "w") as f:
+        json.dump({"args": vars(args), "results": results}, f, indent=2)
+    print(f"Saved to {args.save}")
+
+if args.baseline:
+    with open(args.baseline) as f:
+        base = {r["workers"]: r for r in json.load(f)["results"]}
+    worse = []
+    tol = args.tolerance
+    for r in results:
+        b = base.get(r["workers"])
+        if b is None:
+            continue
+        if r["items_per_s"] < b["items_per_s"] * (1 - tol):
+            worse.append(f"workers={r['workers']}: items/s {b['items_per_s']} -> {r['items_per_s']}")
+        if b["p99_s"] and r["p99_s"] > b["p99_s"] * (1 + tol):
+            worse.append(f"workers={r['workers']}: p99 {b['p99_s']}s -> {r['p99_s']}s")
+        if b["tokens_per_item"] and r["tokens_per_item"] > b["tokens_per_item"] * (1 + tol):
+            worse.append(f"workers={r['workers']}: tokens/item {b['tokens_per_item']} -> {r['tokens_per_item']}")
+    if worse:
+        print("REGRESSION vs " + args.baseline)
+        for w in worse:
+            print("  " + w)
+        sys.exit(1)
+    print(f"No regression vs {args.baseline} (tolerance {tol:.0%})")
@@ -0,0 +1,109 @@
+import argparse, datetime, random, sys, time
+from collections import deque
+
+from enrichment import client
+from enrichment.retry import RetryPolicy
+
+# Fill daily_hadith_schedule (122) with the hadith of the day for each date.
+#
+#   python scripts/daily_schedule.py                          # next 400 days from today (UTC)
+#   python scripts/daily_schedule.py --favour-enriched 2      # enriched hadiths up to 3x as likely
+#   python scripts/daily_schedule.py --start 2027-01-01 --days 365 --seed 2027
+#   python scripts/daily_schedule.py --rebuild --dry-run      # show what would replace existing dates
+#
+# Each date's pick depends only on --seed, the date, the candidate pool and the
+# picks of the preceding --window days, so re-running with the same inputs gives
+# the same schedule. A hadith is not repeated within --window days (including
+# already scheduled ones). Weighted sampling uses Efraimidis-Spirakis keys
+# u ** (1 / weight), with weight 1 + favour * confidence for hadiths that have
+# a published enrichment.
+
+ap = argparse.ArgumentParser(description="Precompute the daily hadith schedule")
+ap.add_argument("--start", help="first date, YYYY-MM-DD (default today, UTC)")
+ap.add_argument("--days", type=int, default=400)
+ap.add_argument("--seed", default="daily-hadith")
+ap.add_argument("--window", type=int, default=365, help="days before a hadith may be picked again")
+ap.add_argument("--grade", default="sahih", help="only hadiths with this grade")
+ap.add_argument("--favour-enriched", type=float, default=0, metavar="F",
+                help="weight enriched hadiths by 1 + F * confidence (0 = uniform)")
+ap.add_argument("--rebuild", action="store_true", help="replace dates that are already scheduled")
+ap.add_argument("--chunk", type=int, default=500, help="rows per upsert")
+ap.add_argument("--dry-run", action="store_true")
+args = ap.parse_args()
+
+sb = client.Supabase()
+policy = RetryPolicy()
+
+
+def get(path):
+    return policy.call(sb.get, path)
+
+
+def pages(path, key="id", page=1000):
+    # Keyset pagination: constant cost per page, unlike offset=
+    last = None
+    while True:
+        q = f"{path}&order={key}.asc&limit={page}" + (f"&{key}=gt.{last}" if last else "")
+        rows = get(q)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page:
+            return
+        last = rows[-1][key]
+
+
+start = datetime.date.fromisoformat(args.start) if args.start else datetime.datetime.now(datetime.timezone.utc).date()
+t0 = time.time()
+
+pool = [h["id"] for rows in pages(f"hadiths?select=id&grade=eq.{args.grade}") for h in rows]
+if not pool:
+    raise SystemExit(f"No hadiths with grade {args.grade!r}")
+weight = dict.fromkeys(pool, 1.0)
+if args.favour_enriched:
+    for rows in pages("hadith_enrichment?select=id,hadith_id,confidence&status=eq.published"):
+        for e in rows:
+            if e["hadith_id"] in weight:
+                weight[e["hadith_id"]] = 1 + args.favour_enriched * float(e.get("confidence") or 0)
+window = max(0, min(args.window, len(pool) - 1))
+
+since = start - datetime.timedelta(days=window)
+scheduled = {datetime.date.fromisoformat(r["date"]): r["hadith_id"]
+             for rows in pages(f"daily_hadith_schedule?select=date,hadith_id&date=gte.{since}", key="date") for r in rows}
+recent = deque((h for d, h in sorted(scheduled.items()) if d < start), maxlen=window or None)
+print(f"Pool: {len(pool)} {args.grade} hadiths, {sum(w > 1 for w in weight.values())} favoured; "
+      f"{len(scheduled)} dates already scheduled since {since}", file=sys.stderr)
+
+uniform = all(w == 1 for w in weight.values())
+rows = []
+kept = replaced = 0
+for i in range(args.days):
+    day = start + datetime.timedelta(days=i)
+    if day in scheduled and not args.rebuild:
+        pick = scheduled[day]
+        kept += 1
+    else:
+        rand = random.Random(f"{args.seed}:{day.isoformat()}")
+        blocked = set(recent) if window else ()
+        if uniform:
+            candidates = ((rand.random(), h) for h in pool)
+        else:
+            candidates = ((rand.random() ** (1 / weight[h]), h) for h in pool)
+        pick = max((c for c in candidates if c[1] not in blocked), default=(0, pool[0]))[1]
+        replaced += day in scheduled and scheduled[day] != pick
+        rows.append({"date": day.isoformat(), "hadith_id": pick, "seed": args.seed})
+    if window:
+        recent.append(pick)
+
+if args.dry_run:
+    for r in rows[:10]:
+        print(f"  {r['date']}  {r['hadith_id']}")
+else:
+    for i in range(0, len(rows), args.chunk):
+        policy.call(sb.post, "daily_hadith_schedule?on_conflict=date", rows[i:i + args.chunk],
+                    {"Prefer": "resolution=merge-duplicates,return=minimal"})
+
+verb = "Would schedule" if args.dry_run else "Scheduled"
+end = start + datetime.timedelta(days=args.days - 1)
+print(f"{verb} {len(rows)} days {start}..{end} ({kept} kept, {replaced} changed; "
+      f"no repeats within {window} days, {time.time() - t0:.1f}s)")
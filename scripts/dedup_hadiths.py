@@ -0,0 +1,154 @@
+import argparse, csv, sys, time
+
+from enrichment import arabic, client, minhash, snapshot
+from enrichment.retry import RetryPolicy
+
+# Cluster near-duplicate hadiths (parallel narrations across collections) with
+# MinHash/LSH over english_translation and normalised arabic_text, and store the
+# clusters in hadith_clusters (119). The enrichment queue then only claims one
+# representative per cluster; propagate_cluster_enrichments() copies its result
+# to the other members.
+#
+#   python scripts/dedup_hadiths.py --dry-run            # report cluster stats only
+#   python scripts/dedup_hadiths.py                      # upsert clusters
+#   python scripts/dedup_hadiths.py --replace --propagate
+#   python scripts/dedup_hadiths.py --snapshot           # read hadiths from export_snapshot.py output
+
+ap = argparse.ArgumentParser(description="Cluster near-duplicate hadiths with MinHash/LSH")
+ap.add_argument("--threshold", type=float, default=0.8, help="min estimated Jaccard similarity to join a cluster")
+ap.add_argument("--bands", type=int, default=16, help="LSH bands (bands x rows = signature length)")
+ap.add_argument("--rows", type=int, default=8, help="signature values per LSH band")
+ap.add_argument("--shingle", type=int, default=3, help="words per shingle")
+ap.add_argument("--min-tokens", type=int, default=12, help="skip texts shorter than this (short matns give false matches)")
+ap.add_argument("--page", type=int, default=1000, help="hadiths fetched per request")
+ap.add_argument("--chunk", type=int, default=1000, help="cluster rows per upsert")
+ap.add_argument("--snapshot", action="store_true", help="read hadiths from the local snapshot instead of the API")
+ap.add_argument("--replace", action="store_true", help="delete existing minhash clusters before writing")
+ap.add_argument("--propagate", action="store_true", help="copy existing representative enrichments to their members afterwards")
+ap.add_argument("--csv", help="also write hadith_id,cluster_id,representative_id,similarity here")
+ap.add_argument("--dry-run", action="store_true")
+args = ap.parse_args()
+
+num_perm = args.bands * args.rows
+sb = None if args.dry_run and args.snapshot else client.Supabase()
+policy = RetryPolicy()
+
+COLS = "id,collection,hadith_number,english_translation,arabic_text,enriched_at"
+
+
+def hadiths():
+    if args.snapshot:
+        yield from snapshot.rows_of(snapshot.load("hadiths"))
+        return
+    last = None
+    while True:
+        q = f"hadiths?select={COLS}&order=id.asc&limit={args.page}" + (f"&id=gt.{last}" if last else "")
+        rows = policy.call(sb.get, q)
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < args.page:
+            return
+        last = rows[-1]["id"]
+
+
+t0 = time.time()
+sigs = {"en": {}, "ar": {}}
+lsh = {"en": minhash.LSH(args.bands, args.rows), "ar": minhash.LSH(args.bands, args.rows)}
+meta = {}
+for h in hadiths():
+    meta[h["id"]] = h
+    for field, toks in (("en", minhash.english_tokens(h.get("english_translation"))), ("ar", arabic.tokens(h.get("arabic_text")))):
+        if len(toks) < args.min_tokens:
+            continue
+        sig = minhash.signature(minhash.shingles(toks, args.shingle), num_perm)
+        sigs[field][h["id"]] = sig
+        lsh[field].add(h["id"], sig)
+    if len(meta) % 5000 == 0:
+        print(f"  {len(meta)} hadiths signed ({len(meta) / (time.time() - t0):.0f}/s)", file=sys.stderr)
+print(f"Signed {len(meta)} hadiths: {len(sigs['en'])} English, {len(sigs['ar'])} Arabic ({time.time() - t0:.1f}s)")
+
+# Candidate pairs from either language; a pair joins if either text is close enough
+uf = minhash.UnionFind()
+pairs = joined = 0
+for field in ("en", "ar"):
+    s = sigs[field]
+    for a, b in lsh[field].candidates():
+        pairs += 1
+        sim = minhash.similarity(s[a], s[b])
+        if sim < args.threshold:
+            continue
+        joined += 1
+        uf.union(a, b)
+
+
+
+def representative(members):
+    # Prefer a member that is already enriched (its result can be shared right
+    # away), then the longest English text, then the lowest id for stability.
+    return min(members, key=lambda i: (
+        meta[i].get("enriched_at") is None,
+        -len(meta[i].get("english_translation") or ""),
+        i,
+    ))
+
+
+def similarity(a, b):
+    # Either language close enough joins a pair, so the score is the better of the two
+    return max((minhash.similarity(s[a], s[b]) for s in sigs.values() if a in s and b in s), default=0.0)
+
+
+def split(members):
+    """Union-find chains A~B~C even when A and C are far apart: keep only members
+    within --threshold of the representative, and re-cluster the rest around
+    a representative of their own. Yields (representative, {member: similarity})."""
+    left = sorted(members)
+    while len(left) > 1:
+        rep = representative(left)
+        sims = {m: similarity(m, rep) for m in left if m != rep}
+        close = {m: v for m, v in sims.items() if v >= args.threshold}
+        if close:
+            yield rep, dict(close, **{rep: 1.0})
+        left = [m for m in left if m != rep and m not in close]
+
+
+clusters = [c for group in uf.groups().values() if len(group) > 1 for c in split(group)]
+print(f"{pairs} candidate pairs, {joined} above {args.threshold}: {len(clusters)} clusters covering {sum(len(c[1]) for c in clusters)} hadiths")
+
+rows = []
+for rep, members in clusters:
+    cid = min(members)
+    for m, sim in sorted(members.items()):
+        rows.append({
+            "hadith_id": m,
+            "cluster_id": cid,
+            "representative_id": rep,
+            # Score against the representative, whose enrichment this member gets
+            "similarity": round(sim, 3),
+            "method": "minhash",
+        })
+
+saved = sum(len(c[1]) - 1 for c in clusters)
+print(f"LLM calls saved: {saved} of {len(meta)} hadiths ({100 * saved / max(1, len(meta)):.1f}%)")
+
+if args.csv:
+    with open(args.csv, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["hadith_id", "cluster_id", "representative_id", "similarity"])
+        w.writerows([r["hadith_id"], r["cluster_id"], r["representative_id"], r["similarity"]] for r in rows)
+    print(f"Wrote {len(rows)} rows to {args.csv}")
+
+if args.dry_run:
+    sys.exit(0)
+
+if args.replace:
+    policy.call(client.request, "DELETE", sb.url + "hadith_clusters?method=eq.minhash", headers=sb.headers)
+for i in range(0, len(rows), args.chunk):
+    policy.call(sb.post, "hadith_clusters?on_conflict=hadith_id", rows[i:i + args.chunk],
+                {"Prefer": "resolution=merge-duplicates,return=minimal"})
+print(f"Upserted {len(rows)} cluster rows")
+
+if args.propagate:
+    n = policy.call(sb.rpc, "propagate_cluster_enrichments",
+                    {"p_representative_ids": None, "p_min_similarity": args.threshold})
+    print(f"Propagated enrichments to {n or 0} cluster members")
@@ -0,0 +1,174 @@
+import argparse, json, sys, time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from enrichment import budget, client, embeddings, snapshot, translation
+from enrichment.retry import RetryPolicy
+
+# Semantic neighbours for the chat searchHadiths tool (enrichment/embeddings.py).
+# ILIKE and BM25 both need the question's words to appear in the hadith; this
+# matches on meaning instead.
+#
+#   python scripts/embed_index.py build                     # embed new/changed hadiths, drop deleted ones
+#   python scripts/embed_index.py build --snapshot          # ... reading export_snapshot.py output
+#   python scripts/embed_index.py build --retrain           # recluster the IVF lists after large changes
+#   python scripts/embed_index.py serve --port 8791
+#   python scripts/embed_index.py query "patience when a child dies"
+#
+# The text embedded per hadith is its published summary_line and
+# key_teaching_en plus the English translation (windowed to the model's input
+# size). Rows whose text hash is unchanged since the last build are skipped, so
+# re-running build after new enrichments only embeds those hadiths.
+#
+# serve answers GET /neighbours?q=...&k= and GET /similar?id=...&k= with
+# {"results": [{"id", "score"}], "took_ms"}. Set EMBED_SERVICE_URL for Next.js.
+
+TABLES = ("hadiths", "hadith_enrichment")
+# bge-small / MiniLM truncate at 512 / 256 word pieces
+TEXT_TOKENS = 256
+
+ap = argparse.ArgumentParser(description="Build and serve the hadith embedding index")
+ap.add_argument("command", choices=["build", "serve", "query"])
+ap.add_argument("query", nargs="?", help="query text (query command)")
+ap.add_argument("--dir", default=embeddings.DEFAULT_DIR)
+ap.add_argument("--embedder", default="local", choices=list(embeddings.EMBEDDERS))
+ap.add_argument("--model", help="embedding model (default depends on --embedder)")
+ap.add_argument("--snapshot", action="store_true", help="build from the local snapshot instead of the API")
+ap.add_argument("--workers", type=int, default=4, help="parallel range readers per table")
+ap.add_argument("--batch", type=int, default=64, help="texts per embedding call")
+ap.add_argument("--nlist", type=int, default=0, help="IVF lists (default sqrt(rows))")
+ap.add_argument("--nprobe", type=int, default=8, help="IVF lists scanned per query")
+ap.add_argument("--retrain", action="store_true", help="build: recluster even if the index is already trained")
+ap.add_argument("--host", default="127.0.0.1")
+ap.add_argument("--port", type=int, default=8791)
+ap.add_argument("-k", type=int, default=10)
+args = ap.parse_args()
+
+policy = RetryPolicy()
+
+
+def text_of(hadith, enrichment):
+    _, english = translation.split(hadith.get("english_translation"))
+    parts = []
+    if enrichment:
+        parts += [enrichment.get("summary_line") or "", enrichment.get("key_teaching_en") or ""]
+    parts.append(budget.window(english, TEXT_TOKENS))
+    return "\n".join(p.strip() for p in parts if p and p.strip())
+
+
+def load():
+    if args.snapshot:
+        return [snapshot.rows_of(snapshot.load(t)) for t in TABLES]
+    sb = client.Supabase()
+    get = lambda path: policy.call(sb.get, path)
+    return [snapshot.read_table(get, t, args.workers) for t in TABLES]
+
+
+def build():
+    t0 = time.time()
+    hadiths, enrichments = load()
+    enr = {e["hadith_id"]: e for e in enrichments if e.get("status") == "published"}
+    store = embeddings.Store(args.dir)
+    embedder = embeddings.get(args.embedder, model=args.model)
+    if store.model and store.model != embedder.model:
+        raise SystemExit(f"{args.dir} holds {store.model} vectors; use --model {store.model} or a new --dir")
+
+    todo = []
+    for h in hadiths:
+        text = text_of(h, enr.get(h["id"]))
+        if not text:
+            continue
+        digest = embeddings.content_hash(embedder.model, text)
+        row = store.row_of.get(h["id"])
+        if row is None or store.hashes[row] != digest:
+            todo.append((h["id"], digest, text))
+    gone = set(store.row_of) - {h["id"] for h in hadiths}
+    store.delete(gone)
+
+    for i in range(0, len(todo), args.batch):
+        chunk = todo[i:i + args.batch]
+        vectors = policy.call(embedder.embed, [t for _, _, t in chunk])
+        store.upsert([(hid, digest, v) for (hid, digest, _), v in zip(chunk, vectors)], embedder.model)
+        if (i // args.batch) % 20 == 19:
+            store.save()
+            print(f"  embedded {i + len(chunk)}/{len(todo)}")
+    if args.retrain or not store.centroids:
+        store.train(args.nlist or None)
+    store.save()
+    print(f"Embedded {len(todo)} hadiths, removed {len(gone)}; {len(store.row_of)} in {args.dir} "
+          f"({len(store.centroids)} lists, {time.time() - t0:.1f}s)")
+
+
+if args.command == "build":
+    build()
+    sys.exit(0)
+
+store = embeddings.Store(args.dir)
+if not store.model:
+    raise SystemExit(f"No vectors in {args.dir}; run `embed_index.py build` first")
+embedder = embeddings.get(args.embedder, model=store.model)
+
+if args.command == "query":
+    t0 = time.perf_counter()
+    hits = store.search(embedder.embed([args.query or ""])[0], args.k, args.nprobe)
+    print(f"{len(hits)} neighbours ({(time.perf_counter() - t0) * 1000:.1f}ms)")
+    for hid, score in hits:
+        print(f"  {score:6.3f}  {hid}")
+    sys.exit(0)
+
+latencies = deque(maxlen=1000)
+
+
+def pct(p):
+    xs = sorted(latencies)
+    return round(xs[min(len(xs) - 1, int(len(xs) * p))], 2) if xs else None
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *a):
+        pass
+
+    def reply(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        u = urlsplit(self.path)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        try:
+            k = min(50, int(q.get("k") or 10))
+        except ValueError:
+            return self.reply(400, {"error": "k must be an integer"})
+        t0 = time.perf_counter()
+        if u.path == "/neighbours":
+            if not q.get("q"):
+                return self.reply(400, {"error": "q is required"})
+            try:
+                vector = embedder.embed([q["q"]])[0]
+            except (client.HTTPError, OSError, ValueError) as e:
+                return self.reply(502, {"error": f"embedding failed: {e}"})
+            hits = store.search(vector, k, args.nprobe)
+        elif u.path == "/similar":
+            hits = store.similar(q.get("id") or "", k, args.nprobe)
+        elif u.path == "/health":
+            return self.reply(200, {"vectors": len(store.row_of), "model": store.model, "lists": len(store.centroids),
+                                    "p50_ms": pct(0.5), "p99_ms": pct(0.99)})
+        else:
+            return self.reply(404, {"error": "not found"})
+        took = (time.perf_counter() - t0) * 1000
+        latencies.append(took)
+        self.reply(200, {"results": [{"id": i, "score": s} for i, s in hits], "took_ms": round(took, 2)})
+
+
+httpd = ThreadingHTTPServer((args.host, args.port), Handler)
+httpd.daemon_threads = True
+print(f"Serving {len(store.row_of)} vectors ({store.model}) on http://{args.host}:{args.port}/neighbours")
+try:
+    httpd.serve_forever()
+except KeyboardInterrupt:
+    pass
@@ -0,0 +1,47 @@
+import argparse, sys
+from collections import Counter
+
+from enrichment import client, runner
+from enrichment.journal import MAX_REJECTIONS, load, paths, pending
+
+# Hadith enrichment CLI.
+#
+#   python scripts/enrich.py run --workers 8 --batch 0 --provider deepinfra
+#   python scripts/enrich.py run --provider groq --per-request 5
+#   ENRICH_LLM_URL=http://localhost:8000/v1/chat/completions ENRICH_LLM_MODEL=llama3 \
+#       python scripts/enrich.py run --provider openai-compatible
+#   python scripts/enrich.py status
+#
+# Provider keys come from DEEPINFRA_API_KEY / GROQ_API_KEY / ENRICH_LLM_KEY;
+# Supabase from NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY.
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="enrich", description="Enrich hadiths with summaries, categories and tags")
+    sub = ap.add_subparsers(dest="command", required=True)
+    runner.add_arguments(sub.add_parser("run", help="claim and enrich unenriched hadiths"))
+    sub.add_parser("status", help="show the unenriched backlog and unfinished journal entries")
+    args = ap.parse_args(argv)
+
+    if args.command == "status":
+        sb = client.Supabase()
+        journals = paths()
+        rows = hadiths = 0
+        for p in journals:
+            r, h = pending(p)
+            rows, hadiths = rows + len(r), hadiths + len(h)
+        print(f"Unenriched hadiths: {sb.count('hadiths?enriched_at=is.null')}")
+        print(f"Journals ({len(journals)} worker slots): {rows} rows waiting to be written, {hadiths} hadiths waiting for the LLM")
+        rejected = [e for p in journals for e in load(p).values() if e["state"] == "rejected"]
+        if rejected:
+            reasons = Counter(p for e in rejected for p in e.get("problems") or [])
+            given_up = sum(e.get("rejections", 0) >= MAX_REJECTIONS for e in rejected)
+            print(f"Quality gate: {len(rejected)} rejected ({given_up} after {MAX_REJECTIONS} tries): "
+                  + ", ".join(f"{k} {v}" for k, v in reasons.most_common()))
+        return 0
+
+    return 0 if runner.Runner(args).run() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import argparse
+
+from enrichment import client
+from enrichment.journal import Journal, compact, paths, pending
+from enrichment.writer import BatchWriter
+
+# Replay finished LLM output from an enrichment journal into the DB without
+# calling the LLM again (e.g. after a run died during writes, or to load a
+# journal produced on another machine).
+#
+# By default every worker slot's journal is replayed except those a live run
+# holds (enrichment/slots.py); --journal picks one file. Rows for hadiths that
+# are already enriched are journalled as dropped instead of written, and the
+# bulk RPC itself refuses to replace reviewed or published enrichments (114).
+
+ap = argparse.ArgumentParser(description="Replay an enrichment journal into hadith_enrichment/hadith_tags")
+ap.add_argument("--journal", help="journal file (default: the journals of idle worker slots)")
+ap.add_argument("--batch", type=int, default=100, help="rows per bulk insert")
+ap.add_argument("--dry-run", action="store_true", help="only report what would be written")
+ap.add_argument("--compact", action="store_true", help="drop finished entries from the journal afterwards")
+args = ap.parse_args()
+
+sb = None
+
+
+def rpc(fn, body):
+    try:
+        return sb.rpc(fn, body)
+    except client.HTTPError as e:
+        print(f"  HTTP {e.status}: {e.body[:200]}")
+        return None
+
+
+def enriched(ids):
+    out = set()
+    for i in range(0, len(ids), 100):
+        rows = sb.get(f"hadiths?select=id&enriched_at=not.is.null&id=in.({','.join(ids[i:i + 100])})") or []
+        out.update(r["id"] for r in rows)
+    return out
+
+
+def replay(path):
+    rows, hadiths = pending(path)
+    print(f"Journal {path}: {len(rows)} rows ready to write, {len(hadiths)} hadiths still need the LLM")
+    if not rows or args.dry_run:
+        return
+    journal = Journal(path)
+    done = enriched(sorted({r["hadith_id"] for r in rows}))
+    if done:
+        journal.record_many(sorted(done), "dropped")
+        rows = [r for r in rows if r["hadith_id"] not in done]
+        print(f"  {len(done)} hadiths already enriched, not replayed")
+
+    def flushed(good, bad, skipped=()):
+        ids = [r["hadith_id"] for r in good]
+        journal.record_many(ids, "db_written")
+        journal.record_many(ids, "tags_written")
+        journal.record_many([r["hadith_id"] for r in skipped], "skipped")
+        for r in bad:
+            journal.record(r["hadith_id"], "write_failed", row=r)
+        print(f"  wrote {len(good)}" + (f", {len(bad)} failed" if bad else "")
+              + (f", {len(skipped)} already enriched" if skipped else ""))
+
+    writer = BatchWriter(rpc, size=args.batch, on_flush=flushed)
+    for r in rows:
+        writer.add(r)
+    writer.close()
+    journal.close()
+    print(f"Done: {writer.written} written, {writer.failed} failed, {writer.skipped} skipped")
+
+
+journals = [args.journal] if args.journal else paths(idle=True)
+if not journals:
+    print("No journals to replay")
+if not args.dry_run:
+    sb = client.Supabase()
+for path in journals:
+    replay(path)
+    if args.compact and not args.dry_run:
+        print(f"Compacted journal: {compact(path)} unfinished entries kept")
@@ -0,0 +1,2 @@
+# Shared helpers for the hadith enrichment scripts.
+# Scripts in scripts/ import this package directly (python puts the script dir on sys.path).
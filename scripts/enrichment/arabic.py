@@ -0,0 +1,110 @@
+import hashlib, re
+
+# Arabic text normalisation for matching: strips harakat/tashkeel, tatweel and
+# Quranic annotation marks, and folds letter variants that are spelt
+# inconsistently across editions (alef forms, alef maqsura, ta marbuta).
+#
+# The same keys are precomputed per hadith into hadith_search_keys (120) by
+# scripts/search_keys.py; lib/arabic-search.ts mirrors the rules for queries.
+# Bump VERSION whenever the output changes so stored keys get rebuilt.
+
+VERSION = 1
+
+_DROP = dict.fromkeys(
+    list(range(0x0610, 0x061B))      # Quranic honorific signs
+    + list(range(0x064B, 0x0660))    # harakat, tanween, shadda, sukun, ...
+    + [0x0670]                       # superscript alef
+    + list(range(0x06D6, 0x06EE))    # Quranic annotation marks
+    + [0x0640]                       # tatweel
+)
+
+_FOLD = {
+    0x0622: 0x0627,  # آ -> ا
+    0x0623: 0x0627,  # أ -> ا
+    0x0625: 0x0627,  # إ -> ا
+    0x0671: 0x0627,  # ٱ -> ا
+    0x0649: 0x064A,  # ى -> ي
+    0x0629: 0x0647,  # ة -> ه
+    0x0624: 0x0621,  # ؤ -> ء
+    0x0626: 0x0621,  # ئ -> ء
+    0x06A9: 0x0643,  # ک -> ك (Persian keheh)
+    0x06CC: 0x064A,  # ی -> ي (Persian yeh)
+}
+
+# Arabic-Indic and Persian digits -> ASCII, so hadith/verse numbers match
+_DIGITS = {**{0x0660 + i: 0x30 + i for i in range(10)}, **{0x06F0 + i: 0x30 + i for i in range(10)}}
+
+# Every rule as one str.translate table (what lib/arabic-search.ts mirrors)
+TABLE = {**_DROP, **_FOLD, **_DIGITS}
+
+# normalise() applies TABLE as one regex deletion plus a handful of str.replace
+# calls: translate() does a dict lookup per character, which made whole-corpus
+# backfills ~4x slower. The output is identical.
+_DROP_RE = re.compile("[" + "".join(re.escape(chr(c)) for c in sorted(_DROP)) + "]+")
+_REPLACE = [(chr(k), chr(v)) for k, v in {**_FOLD, **_DIGITS}.items()]
+_JUNK = re.compile(r"[^ء-ي0-9a-z\s]+")
+
+
+def normalise(text):
+    """Diacritic-free, variant-folded Arabic with punctuation collapsed to spaces."""
+    if not text:
+        return ""
+    text = _DROP_RE.sub("", text)
+    for a, b in _REPLACE:
+        if a in text:
+            text = text.replace(a, b)
+    return " ".join(_JUNK.sub(" ", text.lower()).split())
+
+
+def tokens(text):
+    return normalise(text).split()
+
+
+def source_hash(text):
+    return hashlib.md5((text or "").encode("utf-8")).hexdigest()
+
+
+def search_key(text):
+    """Row for hadith_search_keys: normalised text, distinct tokens, source hash."""
+    norm = normalise(text)
+    return {
+        "arabic_norm": norm,
+        "arabic_tokens": list(dict.fromkeys(norm.split())),
+        "source_hash": source_hash(text),
+        "normaliser_version": VERSION,
+    }
+
+
+# Light stemming (after Larkey et al.'s "light10"): strip the common proclitic
+# (wa-, al-, bi-al-, ...) and one or more suffixes, keeping at least 2-3 letters.
+# Input is normalise()d, so ة is already ه.
+_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+_SUFFIXES = ("ها", "ان", "ات", "ون", "ين", "يه", "ه", "ي")
+
+STOPWORDS = frozenset(normalise(
+    "في من على إلى عن أن إن ما لا لم لن هو هي هم ذلك هذا هذه التي الذي الذين "
+    "كان كانت قال قالت ثم أو و يا قد كل بن مع إذا حتى فإن وإن فقال إنما"
+).split())
+
+
+def light_stem(token):
+    if len(token) > 3 and token.startswith("و"):
+        token = token[1:]
+    for p in _PREFIXES:
+        if token.startswith(p) and len(token) - len(p) >= 2:
+            token = token[len(p):]
+            break
+    changed = True
+    while changed and len(token) > 3:
+        changed = False
+        for s in _SUFFIXES:
+            if token.endswith(s) and len(token) - len(s) >= 3:
+                token = token[:-len(s)]
+                changed = True
+                break
+    return token
+
+
+def stems(text):
+    """Normalised, stopword-free, light-stemmed tokens for search indexing."""
+    return [light_stem(t) for t in normalise(text).split() if t not in STOPWORDS]
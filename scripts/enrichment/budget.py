@@ -0,0 +1,151 @@
+import json, math, os, re, threading
+from collections import deque
+
+# Token budgets for enrichment prompts.
+#
+# Input: each hadith gets a window of at most ITEM_TOKENS tokens, cut at the
+# last sentence (or word) boundary that fits, instead of a fixed character
+# slice. Batches are packed by tokens: short hadiths share a request, long
+# ones go in smaller groups.
+#
+# Output: max_tokens is derived from the completion sizes actually observed
+# (per hadith, p95 plus headroom) rather than a flat 800-1000, so requests stop
+# reserving budget they never use against the provider's token-per-minute limit.
+# Observations persist in scripts/.enrich_budget.json between runs.
+#
+# Token counts use tiktoken when it is installed; otherwise a character
+# heuristic, scaled by the ratio of the provider's reported prompt_tokens to
+# our estimate so it converges on the real tokenizer during a run.
+
+try:
+    import tiktoken
+    _enc = tiktoken.get_encoding("cl100k_base")
+except Exception:  # not installed, or the encoding file cannot be fetched
+    _enc = None
+
+DEFAULT_PATH = os.environ.get("ENRICH_BUDGET_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_budget.json"))
+
+ITEM_TOKENS = 600        # input window per hadith
+PRIOR_OUTPUT = 450       # completion tokens per hadith before anything is observed
+MIN_SAMPLES = 20
+HEADROOM = 1.25
+RESPONSE_OVERHEAD = 40   # array brackets, keys, code fences
+MAX_OUTPUT = 8000        # provider cap on max_tokens
+
+_SENTENCE_END = re.compile(r"[.!?؟।\n][\"')\]]*\s")
+
+
+def estimate(text):
+    """Approximate token count: ~4 chars/token for Latin text, ~2 for Arabic."""
+    if not text:
+        return 0
+    if _enc is not None:
+        return len(_enc.encode(text, disallowed_special=()))
+    ascii_chars = sum(c < "\x80" for c in text)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def window(text, limit=ITEM_TOKENS):
+    """text cut to about `limit` tokens, at a sentence boundary where possible."""
+    text = text or ""
+    n = estimate(text)
+    if n <= limit:
+        return text
+    cut = int(len(text) * limit / n)
+    head = text[:cut]
+    ends = [m.end() for m in _SENTENCE_END.finditer(head)]
+    # Prefer a sentence end in the last half of the window, else the last space
+    if ends and ends[-1] > cut // 2:
+        head = head[:ends[-1]]
+    elif " " in head:
+        head = head[:head.rindex(" ")]
+    return head.rstrip() + " ..."
+
+
+class Budget:
+    """Observed prompt/completion sizes, shared by all LLM workers."""
+
+    def __init__(self, item_tokens=ITEM_TOKENS, prompt_tokens=3000, max_items=10, path=DEFAULT_PATH, samples=500):
+        self.item_tokens = item_tokens
+        self.prompt_tokens = prompt_tokens
+        self.max_items = max(1, max_items)
+        self.path = path
+        self.outputs = deque(maxlen=samples)  # completion tokens per hadith
+        self.scale = 1.0                      # provider prompt_tokens / our estimate
+        self.truncated = 0
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    d = json.load(f)
+                self.outputs.extend(d.get("outputs") or [])
+                self.scale = float(d.get("scale") or 1.0)
+            except (ValueError, TypeError):
+                pass
+
+    def tokens(self, text):
+        return math.ceil(estimate(text) * self.scale)
+
+    def text(self, h):
+        # Windows use the unscaled estimate so a hadith's prompt (and its cache
+        # key) stays the same from run to run
+        return window(h.get("english_translation") or "", self.item_tokens)
+
+    def per_item(self):
+        with self.lock:
+            if len(self.outputs) < MIN_SAMPLES:
+                return PRIOR_OUTPUT
+            xs = sorted(self.outputs)
+        return xs[min(len(xs) - 1, int(len(xs) * 0.95))]
+
+    def max_tokens(self, n_items):
+        return min(MAX_OUTPUT, math.ceil(self.per_item() * n_items * HEADROOM) + RESPONSE_OVERHEAD)
+
+    def capacity(self):
+        # Items whose expected output still fits under the provider cap
+        return max(1, min(self.max_items, int((MAX_OUTPUT - RESPONSE_OVERHEAD) / (self.per_item() * HEADROOM))))
+
+    def pack(self, rows):
+        """Split rows into request-sized chunks by windowed input tokens."""
+        cap = self.capacity()
+        chunk, used = [], 0
+        for h in rows:
+            n = self.tokens(self.text(h)) + 30  # narrator/grade/key lines
+            if chunk and (len(chunk) >= cap or used + n > self.prompt_tokens):
+                yield chunk
+                chunk, used = [], 0
+            chunk.append(h)
+            used += n
+        if chunk:
+            yield chunk
+
+    def observe(self, prompt, usage, n_items, finish_reason=None, max_tokens=None):
+        """Record one completed request's usage."""
+        if not usage:
+            return
+        est = estimate(prompt)
+        with self.lock:
+            if est and usage.get("prompt_tokens"):
+                # Slow moving average so one odd response cannot swing the packing
+                self.scale = 0.9 * self.scale + 0.1 * (usage["prompt_tokens"] / est)
+            out = usage.get("completion_tokens")
+            if finish_reason == "length":
+                # Cut off: the true size is unknown but above the cap, so record
+                # the cap plus margin to push the p95 up
+                self.truncated += 1
+                out = int((max_tokens or out or 0) * 1.5)
+            if out and n_items:
+                self.outputs.append(math.ceil(out / n_items))
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            d = {"outputs": list(self.outputs), "scale": round(self.scale, 4)}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(d, f)
+        os.replace(tmp, self.path)
+
+    def format(self):
+        return f"per hadith p95 {self.per_item()} out, {self.capacity()} per request, scale {self.scale:.2f}, {self.truncated} truncated"
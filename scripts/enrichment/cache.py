@@ -0,0 +1,73 @@
+import hashlib, json, os, sqlite3, threading, time
+
+# Content-addressed cache of LLM completions.
+# Keyed by a hash of what determines the answer (model, messages, temperature,
+# methodology_version), so a re-run after a crash or a failed DB insert reuses
+# the paid-for response instead of calling the API again.
+#
+# The runner passes max_tokens=None: its token budget moves with observed output
+# sizes and would change the key run to run. A response cut off by the limit
+# fails to parse and is evicted, so it is never replayed.
+
+DEFAULT_PATH = os.environ.get("ENRICH_CACHE_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_cache.sqlite"))
+
+
+def key(model, messages, temperature, max_tokens=None, methodology_version=None):
+    blob = json.dumps({
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "methodology_version": methodology_version,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        db = self._db()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " content TEXT NOT NULL,"
+            " usage TEXT,"
+            " created_at REAL NOT NULL)"
+        )
+        db.commit()
+
+    def _db(self):
+        # sqlite3 connections are per thread; WAL lets readers and the writer overlap
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def get(self, k):
+        row = self._db().execute("SELECT content FROM responses WHERE key = ?", (k,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, k, content, model=None, usage=None):
+        db = self._db()
+        db.execute(
+            "INSERT OR REPLACE INTO responses (key, model, content, usage, created_at) VALUES (?, ?, ?, ?, ?)",
+            (k, model, content, json.dumps(usage) if usage else None, time.time()),
+        )
+        db.commit()
+
+    def delete(self, k):
+        # Drop an entry whose content turned out to be unusable
+        db = self._db()
+        db.execute("DELETE FROM responses WHERE key = ?", (k,))
+        db.commit()
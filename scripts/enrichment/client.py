@@ -0,0 +1,135 @@
+import http.client, json, os, ssl, threading
+from urllib.parse import urlsplit
+
+# Pooled keep-alive HTTP for the enrichment scripts.
+# urllib.request opens a new TCP+TLS connection for every call; here each thread
+# keeps one persistent HTTP/1.1 connection per host and reuses it, so the
+# handshake is paid once per worker instead of once per request.
+
+_ctx = ssl.create_default_context()
+_local = threading.local()
+
+# Errors that mean a pooled connection went stale (server closed it while idle)
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, body, headers=None, url=None):
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.url = url
+
+
+def _conn(scheme, host, port, timeout):
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = {}
+    key = (scheme, host, port)
+    c = pool.get(key)
+    if c is None:
+        if scheme == "https":
+            c = http.client.HTTPSConnection(host, port, timeout=timeout, context=_ctx)
+        else:
+            c = http.client.HTTPConnection(host, port, timeout=timeout)
+        pool[key] = c
+    return c
+
+
+def _drop(scheme, host, port):
+    c = getattr(_local, "pool", {}).pop((scheme, host, port), None)
+    if c is not None:
+        c.close()
+
+
+def close_all():
+    # Close this thread's pooled connections
+    for c in getattr(_local, "pool", {}).values():
+        c.close()
+    _local.pool = {}
+
+
+def _send(method, url, data=None, headers=None, timeout=60):
+    # Returns (status, response headers, body text) over a pooled connection
+    u = urlsplit(url)
+    port = u.port or (443 if u.scheme == "https" else 80)
+    path = u.path + ("?" + u.query if u.query else "")
+    hdrs = {"Connection": "keep-alive", "Accept": "application/json"}
+    hdrs.update(headers or {})
+    body = None
+    if data is not None:
+        body = json.dumps(data).encode("utf-8")
+        hdrs["Content-Type"] = "application/json"
+
+    for attempt in (0, 1):
+        c = _conn(u.scheme, u.hostname, port, timeout)
+        try:
+            c.request(method, path, body=body, headers=hdrs)
+            r = c.getresponse()
+            raw = r.read()
+            break
+        except _STALE:
+            # Server dropped the idle connection; reconnect once
+            _drop(u.scheme, u.hostname, port)
+            if attempt:
+                raise
+        except Exception:
+            _drop(u.scheme, u.hostname, port)
+            raise
+
+    if r.will_close:
+        _drop(u.scheme, u.hostname, port)
+    text = raw.decode("utf-8")
+    if r.status >= 400:
+        raise HTTPError(r.status, text, dict(r.getheaders()), url)
+    return r.status, dict(r.getheaders()), text
+
+
+def request(method, url, data=None, headers=None, timeout=60):
+    """Send a request over a pooled connection and return the decoded JSON body.
+
+    Returns None for empty bodies. Raises HTTPError for 4xx/5xx responses.
+    """
+    _, _, text = _send(method, url, data, headers, timeout)
+    return json.loads(text) if text.strip() else None
+
+
+class Supabase:
+    """PostgREST client bound to the service-role key."""
+
+    def __init__(self, url=None, key=None, timeout=30):
+        self.url = (url or os.environ["NEXT_PUBLIC_SUPABASE_URL"]).rstrip("/") + "/rest/v1/"
+        key = key or os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+        self.headers = {"apikey": key, "Authorization": "Bearer " + key}
+        self.timeout = timeout
+
+    def get(self, path, headers=None):
+        return request("GET", self.url + path, headers=dict(self.headers, **(headers or {})), timeout=self.timeout)
+
+    def post(self, path, data, headers=None):
+        h = dict(self.headers, Prefer="return=representation")
+        h.update(headers or {})
+        return request("POST", self.url + path, data, h, timeout=self.timeout)
+
+    def count(self, path):
+        """Exact row count for a filtered table path, e.g. "hadiths?enriched_at=is.null"."""
+        sep = "&" if "?" in path else "?"
+        h = dict(self.headers, Prefer="count=exact", Range="0-0")
+        _, headers, _ = _send("GET", self.url + path + sep + "select=id", headers=h, timeout=self.timeout)
+        # Content-Range: 0-0/31886 (or */0 when nothing matches)
+        cr = {k.lower(): v for k, v in headers.items()}.get("content-range", "")
+        total = cr.rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else None
+
+    def rpc(self, fn, body):
+        return request("POST", self.url + "rpc/" + fn, body, self.headers, timeout=self.timeout)
+
+
+DEEPINFRA_URL = "https://api.deepinfra.com/v1/openai/chat/completions"
+
+
+def chat(payload, key=None, url=DEEPINFRA_URL, timeout=60):
+    """POST an OpenAI-compatible chat completion and return the full response."""
+    key = key or os.environ["DEEPINFRA_API_KEY"]
+    return request("POST", url, payload, {"Authorization": "Bearer " + key}, timeout=timeout)
@@ -0,0 +1,52 @@
+import json, os
+
+# Keyset cursor for claim_unenriched_hadiths / get_unenriched_hadiths_after,
+# kept on disk so the next run continues where this one stopped.
+#
+# Rows are ordered by (hadith_number NULLS LAST, id). A cursor with both fields
+# None is at the start; one with hadith_number None and an id is in the tail of
+# hadiths without a number.
+#
+# The runner keeps one file per worker slot (enrichment/slots.py), so parallel
+# runs on a host do not overwrite each other's position.
+DEFAULT_PATH = os.environ.get("ENRICH_CURSOR_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_cursor.json"))
+
+
+def key(hadith_number, hadith_id):
+    # Sort key matching ORDER BY hadith_number NULLS LAST, id
+    return (hadith_number is None, hadith_number or 0, hadith_id or "")
+
+
+class Cursor:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.hadith_number = None
+        self.id = None
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                d = json.load(f)
+            self.hadith_number = d.get("hadith_number")
+            self.id = d.get("id")
+
+    @property
+    def started(self):
+        return self.id is not None
+
+    def advance(self, rows):
+        # Rows come back in cursor order; keep the furthest one
+        for r in rows:
+            if not self.started or key(r.get("hadith_number"), r["id"]) > key(self.hadith_number, self.id):
+                self.hadith_number, self.id = r.get("hadith_number"), r["id"]
+
+    def reset(self):
+        self.hadith_number = None
+        self.id = None
+
+    def params(self):
+        return {"p_after_hadith_number": self.hadith_number, "p_after_id": self.id}
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"hadith_number": self.hadith_number, "id": self.id}, f)
+        os.replace(tmp, self.path)
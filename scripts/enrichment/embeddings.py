@@ -0,0 +1,267 @@
+import hashlib, json, math, mmap, operator, os, random
+from array import array
+
+from enrichment import client
+
+# Sentence embeddings and an IVF vector index for semantic hadith lookup,
+# built by scripts/embed_index.py and served from the same script.
+#
+# Embedders:
+#   local   sentence-transformers on CPU (pip install sentence-transformers)
+#   remote  any OpenAI-compatible /embeddings endpoint (DeepInfra by default)
+#
+# Store (scripts/.enrich_vectors/): unit vectors quantised to int8 with a
+# per-row scale, in a flat file that is memory-mapped for search, plus
+# meta.json with ids, content hashes, IVF centroids and their lists. A row is
+# only re-embedded when the hash of its text (and the model) changes.
+# numpy is used when installed; the pure-Python path scores only the probed
+# IVF lists, which keeps it usable for a few tens of thousands of rows.
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_DIR = os.environ.get("ENRICH_VECTORS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_vectors"))
+
+DEEPINFRA_EMBED_URL = "https://api.deepinfra.com/v1/openai/embeddings"
+
+
+class LocalEmbedder:
+    name = "local"
+    default_model = "sentence-transformers/all-MiniLM-L6-v2"
+
+    def __init__(self, model=None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError("local embedder needs sentence-transformers (pip install sentence-transformers), or use --embedder remote")
+        self.model = model or self.default_model
+        self._m = SentenceTransformer(self.model, device="cpu")
+
+    def embed(self, texts):
+        return self._m.encode(list(texts), batch_size=64, normalize_embeddings=True, show_progress_bar=False).tolist()
+
+
+class RemoteEmbedder:
+    name = "remote"
+    default_model = "BAAI/bge-small-en-v1.5"
+
+    def __init__(self, model=None, url=None, key=None, timeout=60):
+        self.model = model or os.environ.get("ENRICH_EMBED_MODEL") or self.default_model
+        self.url = url or os.environ.get("ENRICH_EMBED_URL") or DEEPINFRA_EMBED_URL
+        self.key = key or os.environ.get("ENRICH_EMBED_KEY") or os.environ.get("DEEPINFRA_API_KEY", "")
+        self.timeout = timeout
+
+    def embed(self, texts):
+        headers = {"Authorization": "Bearer " + self.key} if self.key else {}
+        resp = client.request("POST", self.url, {"model": self.model, "input": list(texts)}, headers, timeout=self.timeout)
+        return [d["embedding"] for d in sorted(resp["data"], key=lambda d: d["index"])]
+
+
+EMBEDDERS = {e.name: e for e in (LocalEmbedder, RemoteEmbedder)}
+
+
+def get(name, **kwargs):
+    try:
+        cls = EMBEDDERS[name]
+    except KeyError:
+        raise ValueError(f"unknown embedder {name!r} (choose from {', '.join(EMBEDDERS)})")
+    return cls(**kwargs)
+
+
+def content_hash(model, text):
+    return hashlib.md5((model + "\n" + text).encode("utf-8")).hexdigest()
+
+
+def unit(v):
+    n = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / n for x in v]
+
+
+def quantise(v):
+    """Unit vector -> (int8 array, scale) with v ~= q * scale."""
+    v = unit(v)
+    m = max(abs(x) for x in v) or 1.0
+    return array("b", (round(x / m * 127) for x in v)), m / 127
+
+
+def dot(a, b):
+    return sum(map(operator.mul, a, b))
+
+
+class Store:
+    """int8 vectors + meta, opened for search or update."""
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "vectors.i8")
+        meta = {}
+        p = os.path.join(directory, "meta.json")
+        if os.path.exists(p):
+            with open(p) as f:
+                meta = json.load(f)
+        self.dim = meta.get("dim")
+        self.model = meta.get("model")
+        self.ids = meta.get("ids", [])          # row -> hadith id (None = deleted)
+        self.hashes = meta.get("hashes", [])
+        self.scales = array("f", meta.get("scales", []))
+        self.centroids = meta.get("centroids", [])
+        self.lists = meta.get("lists", [])      # centroid -> rows
+        self.row_of = {h: i for i, h in enumerate(self.ids) if h}
+        self.list_of = {r: c for c, rows in enumerate(self.lists) for r in rows}
+        self._mm = None
+        self._np = None
+
+    # --- persistence -----------------------------------------------------------
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        p = os.path.join(self.directory, "meta.json")
+        with open(p + ".tmp", "w") as f:
+            json.dump({
+                "dim": self.dim, "model": self.model, "ids": self.ids, "hashes": self.hashes,
+                "scales": list(self.scales), "centroids": self.centroids, "lists": self.lists,
+            }, f)
+        os.replace(p + ".tmp", p)
+
+    def _map(self):
+        if self._mm is None and os.path.exists(self.path) and os.path.getsize(self.path):
+            f = open(self.path, "rb")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            f.close()
+            if np is not None:
+                self._np = np.frombuffer(self._mm, dtype=np.int8).reshape(-1, self.dim)
+                self._np_scales = np.array(self.scales, dtype=np.float32)
+        return self._mm
+
+    def vector(self, row):
+        mm = self._map()
+        return memoryview(mm)[row * self.dim:(row + 1) * self.dim].cast("b")
+
+    # --- updates ---------------------------------------------------------------
+
+    def upsert(self, items, model):
+        """items: [(hadith_id, hash, vector)]. Overwrites changed rows in place, appends new ones."""
+        if not items:
+            return
+        if self.dim is None:
+            self.dim, self.model = len(items[0][2]), model
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as f:
+            for hid, h, v in items:
+                q, scale = quantise(v)
+                row = self.row_of.get(hid)
+                if row is None:
+                    row = len(self.ids)
+                    self.ids.append(hid)
+                    self.hashes.append(h)
+                    self.scales.append(scale)
+                    self.row_of[hid] = row
+                else:
+                    self.hashes[row] = h
+                    self.scales[row] = scale
+                    self._unlist(row)
+                f.seek(row * self.dim)
+                q.tofile(f)
+                if self.centroids:
+                    c = self._nearest(q, 1)[0]
+                    self.lists[c].append(row)
+                    self.list_of[row] = c
+        self._mm = self._np = None
+
+    def delete(self, hids):
+        for hid in hids:
+            row = self.row_of.pop(hid, None)
+            if row is not None:
+                self.ids[row] = None
+                self.hashes[row] = None
+                self._unlist(row)
+
+    def _unlist(self, row):
+        c = self.list_of.pop(row, None)
+        if c is not None:
+            self.lists[c].remove(row)
+
+    # --- IVF -------------------------------------------------------------------
+
+    def _nearest(self, q, n):
+        sims = [dot(q, c) for c in self.centroids]
+        return sorted(range(len(sims)), key=sims.__getitem__, reverse=True)[:n]
+
+    def train(self, nlist=None, sample=4000, iterations=8, seed=0):
+        """Spherical k-means on a sample of rows, then assign every row to a list."""
+        live = [r for r, h in enumerate(self.ids) if h]
+        if not live or self._map() is None:
+            return 0
+        nlist = max(1, min(nlist or int(math.sqrt(len(live))), len(live)))
+        rand = random.Random(seed)
+        if np is None:
+            # Every assignment is a Python dot product: keep the sample small
+            sample = min(sample, 20 * nlist)
+        rows = rand.sample(live, min(sample, len(live)))
+        if np is not None:
+            X = self._np[rows].astype(np.float32)
+            X /= np.linalg.norm(X, axis=1, keepdims=True) + 1e-9
+            C = X[rand.sample(range(len(rows)), nlist)]
+            for _ in range(iterations):
+                best = (X @ C.T).argmax(axis=1)
+                for c in range(nlist):
+                    members = X[best == c]
+                    if len(members):
+                        m = members.sum(axis=0)
+                        C[c] = m / (np.linalg.norm(m) + 1e-9)
+            best = (self._np[live].astype(np.float32) @ C.T).argmax(axis=1).tolist()
+            self.centroids = C.round(5).tolist()
+        else:
+            vecs = [list(self.vector(r)) for r in rows]
+            cents = [unit(v) for v in rand.sample(vecs, nlist)]
+            for _ in range(iterations):
+                sums = [[0.0] * self.dim for _ in cents]
+                for v in vecs:
+                    s = sums[max(range(len(cents)), key=lambda c: dot(v, cents[c]))]
+                    for i, x in enumerate(v):
+                        s[i] += x
+                cents = [unit(s) if any(s) else c for s, c in zip(sums, cents)]
+            self.centroids = [[round(x, 5) for x in c] for c in cents]
+            best = [self._nearest(self.vector(r), 1)[0] for r in live]
+        self.lists = [[] for _ in self.centroids]
+        for r, c in zip(live, best):
+            self.lists[c].append(r)
+        self.list_of = dict(zip(live, best))
+        return nlist
+
+    # --- search ----------------------------------------------------------------
+
+    def search(self, query, k=10, nprobe=8, exclude=()):
+        """Top-k (hadith_id, cosine) for a query vector."""
+        if not self.ids or self._map() is None:
+            return []
+        q = unit(query)
+        if self.centroids:
+            rows = [r for c in self._nearest(q, nprobe) for r in self.lists[c]]
+        else:
+            rows = [r for r, h in enumerate(self.ids) if h]
+        if not rows:
+            return []
+        if self._np is not None:
+            idx = np.asarray(rows)
+            scores = (self._np[idx].astype(np.float32) @ np.asarray(q, dtype=np.float32)) * self._np_scales[idx]
+            scored = zip(rows, scores.tolist())
+        else:
+            scored = ((r, dot(q, self.vector(r)) * self.scales[r]) for r in rows)
+        out = []
+        for r, s in sorted(scored, key=lambda x: x[1], reverse=True):
+            hid = self.ids[r]
+            if hid and hid not in exclude:
+                out.append((hid, round(s, 4)))
+                if len(out) >= k:
+                    break
+        return out
+
+    def similar(self, hid, k=10, nprobe=8):
+        row = self.row_of.get(hid)
+        if row is None or self._map() is None:
+            return []
+        v = [x * self.scales[row] for x in self.vector(row)]
+        return self.search(v, k, nprobe, exclude={hid})
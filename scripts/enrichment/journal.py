@@ -0,0 +1,131 @@
+import json, os, threading, time
+
+from enrichment import slots
+
+# Append-only JSONL journal of per-hadith state transitions for an enrichment run.
+#
+#   claimed      -> hadith handed to this worker (carries the hadith fields and worker id)
+#   llm_done     -> LLM answered; carries the row that will be written
+#   db_written   -> hadith_enrichment row written
+#   tags_written -> hadith_tags links written (terminal)
+#   failed       -> LLM/parse failure; the lease is released and the queue retries it
+#   rejected     -> answer failed the quality gate (quality.py), carries the hadith and
+#                   the problem codes; re-run first by the next run, up to MAX_REJECTIONS
+#   write_failed -> DB rejected the row; the row is kept for replay
+#   dropped      -> resumed, but enriched since or leased by another worker (terminal)
+#   skipped      -> not written: the DB already has a reviewed or published enrichment (terminal)
+#
+# insert_enrichments_bulk writes the enrichment and its tags in one statement,
+# so db_written and tags_written are recorded together for bulk writes.
+# Reading the journal back gives the last state per hadith, which is enough to
+# resume a killed run or to replay finished LLM output into the DB offline.
+#
+# Each run writes the journal of its worker slot (slots.py), e.g.
+# .enrich_journal.0.jsonl: a run only resumes, and takes over the leases of,
+# work left by processes that held its slot and have exited.
+
+DEFAULT_PATH = os.environ.get("ENRICH_JOURNAL_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_journal.jsonl"))
+
+PENDING = ("claimed", "llm_done", "write_failed", "rejected")
+
+# After this many rejections a hadith is left to the claim queue (and `enrich.py status`)
+MAX_REJECTIONS = 3
+
+
+class Journal:
+    def __init__(self, path=DEFAULT_PATH, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.f = open(path, "a", encoding="utf-8")
+
+    def record(self, hadith_id, state, **data):
+        line = json.dumps(dict(data, id=hadith_id, state=state, t=round(time.time(), 3)), ensure_ascii=False)
+        with self.lock:
+            self.f.write(line + "\n")
+            self.f.flush()
+            if self.fsync:
+                os.fsync(self.f.fileno())
+
+    def record_many(self, hadith_ids, state):
+        t = round(time.time(), 3)
+        lines = "".join(json.dumps({"id": h, "state": state, "t": t}) + "\n" for h in hadith_ids)
+        with self.lock:
+            self.f.write(lines)
+            self.f.flush()
+            if self.fsync:
+                os.fsync(self.f.fileno())
+
+    def close(self):
+        with self.lock:
+            self.f.close()
+
+
+def load(path=DEFAULT_PATH):
+    """Fold the journal into {hadith_id: entry}.
+
+    entry keeps the latest state plus the most recent hadith/row payloads seen
+    for that id. A torn last line from a killed process is ignored.
+    """
+    out = {}
+    if not os.path.exists(path):
+        return out
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                ev = json.loads(line)
+            except ValueError:
+                continue
+            e = out.setdefault(ev["id"], {})
+            e["state"] = ev["state"]
+            e["t"] = ev.get("t")
+            for k in ("hadith", "row", "error", "problems", "worker"):
+                if k in ev:
+                    e[k] = ev[k]
+            if ev["state"] == "rejected":
+                # A compacted entry carries its count forward
+                e["rejections"] = max(e.get("rejections", 0) + 1, ev.get("rejections", 0))
+    return out
+
+
+def pending(path=DEFAULT_PATH):
+    """Split unfinished work into (rows ready to write, hadiths still needing the LLM)."""
+    rows, hadiths = [], []
+    for hid, e in load(path).items():
+        if e["state"] not in PENDING:
+            continue
+        if e["state"] in ("llm_done", "write_failed") and e.get("row"):
+            rows.append(e["row"])
+        elif e["state"] == "rejected" and e.get("rejections", 0) >= MAX_REJECTIONS:
+            continue
+        elif e.get("hadith"):
+            hadiths.append(e["hadith"])
+    return rows, hadiths
+
+
+def previous_workers(path=DEFAULT_PATH):
+    """Worker ids that claimed the unfinished hadiths, so a resumed run can take over their leases."""
+    return sorted({e["worker"] for e in load(path).values() if e["state"] in PENDING and e.get("worker")})
+
+
+def paths(path=DEFAULT_PATH, idle=False):
+    """Every slot's journal next to path (plus path itself if it exists).
+
+    idle=True leaves out journals whose slot a live run holds.
+    """
+    out = [path] if os.path.exists(path) else []
+    return out + [slots.path_for(path, n) for n in slots.names(path) if not (idle and slots.live(path, n))]
+
+
+def compact(path=DEFAULT_PATH):
+    """Rewrite the journal keeping only the latest entry for unfinished hadiths."""
+    entries = load(path)
+    tmp = path + ".tmp"
+    kept = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for hid, e in entries.items():
+            if e["state"] in PENDING:
+                f.write(json.dumps(dict(e, id=hid), ensure_ascii=False) + "\n")
+                kept += 1
+    os.replace(tmp, path)
+    return kept
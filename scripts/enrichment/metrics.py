@@ -0,0 +1,285 @@
+import json, os, socket, threading, time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from enrichment.client import HTTPError
+
+# Run metrics for the enrichment scripts: per-stage latency histograms, LLM
+# token usage, error counts by class, and an ETA from the live unenriched count.
+#
+#   m = Metrics()
+#   with m.time("llm"):
+#       resp = ...
+#   m.tokens(resp.get("usage"))
+#   m.serve(9108)                       # Prometheus text on /metrics, JSON on /metrics.json
+#   m.dump_every(30, "metrics.json")    # or a periodic JSON snapshot
+
+# Seconds; covers fast DB calls through slow batched LLM requests
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, v):
+        i = 0
+        while i < len(self.buckets) and v > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += v
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+def error_class(ex):
+    """Short label for an exception: http_429, http_5xx, timeout, network, parse, ..."""
+    if isinstance(ex, HTTPError):
+        return "http_429" if ex.status == 429 else f"http_{ex.status // 100}xx"
+    if isinstance(ex, (socket.timeout, TimeoutError)):
+        return "timeout"
+    if isinstance(ex, (ConnectionError, OSError)):
+        return "network"
+    if isinstance(ex, ValueError):
+        return "parse"
+    return type(ex).__name__.lower()
+
+
+class Metrics:
+    def __init__(self, prefix="enrich"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.hist = {}
+        self.counters = {}
+        self.gauges = {}
+        self.remaining = None
+        self.items_at_count = 0
+        self.rate_window = []  # (time, items done) samples for the ETA
+
+    @contextmanager
+    def time(self, stage):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - t0)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            h = self.hist.get(stage)
+            if h is None:
+                h = self.hist[stage] = Histogram()
+            h.observe(seconds)
+
+    def inc(self, name, n=1, **labels):
+        k = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[k] = self.counters.get(k, 0) + n
+
+    def gauge(self, name, fn):
+        # fn() is read at export time, e.g. lambda: limiter.rate
+        self.gauges[name] = fn
+
+    def tokens(self, usage):
+        if not usage:
+            return
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                self.inc("tokens", usage[kind], kind=kind[:-7])
+
+    def error(self, stage, ex):
+        self.inc("errors", stage=stage, cls=error_class(ex))
+
+    def done(self, n=1):
+        self.inc("items", n)
+
+    def count(self, name, **labels):
+        with self.lock:
+            if labels:
+                return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+            return sum(v for (k, _), v in self.counters.items() if k == name)
+
+    def set_remaining(self, n):
+        done = self.count("items")
+        with self.lock:
+            self.remaining = n
+            self.items_at_count = done
+
+    def watch_remaining(self, fn, every=60.0):
+        """Poll fn() (the live count of hadiths left to enrich) on a background thread."""
+        def loop():
+            while True:
+                try:
+                    self.set_remaining(fn())
+                except Exception as ex:
+                    self.error("remaining", ex)
+                time.sleep(every)
+        threading.Thread(target=loop, name="metrics-remaining", daemon=True).start()
+
+    def rate(self, window=300.0):
+        # Items/s over roughly the last `window` seconds (whole run for the first minute)
+        now = time.time()
+        done = self.count("items")
+        with self.lock:
+            w = self.rate_window
+            if not w or now - w[-1][0] >= 10:
+                w.append((now, done))
+            while len(w) > 1 and now - w[0][0] > window:
+                w.pop(0)
+            t0, d0 = w[0] if now - w[0][0] >= 60 else (self.started, 0)
+        return (done - d0) / (now - t0) if now > t0 else 0.0
+
+    def left(self):
+        # Last unenriched count, less what this run finished since it was taken
+        if self.remaining is None:
+            return None
+        return max(0, self.remaining - (self.count("items") - self.items_at_count))
+
+    def eta(self):
+        """Seconds until the unenriched count reaches zero at the recent rate, or None."""
+        r = self.rate()
+        left = self.left()
+        if left is None or r <= 0:
+            return None
+        return left / r
+
+    def snapshot(self):
+        with self.lock:
+            stages = {
+                s: {
+                    "count": h.count,
+                    "seconds": round(h.sum, 3),
+                    "mean": round(h.sum / h.count, 4) if h.count else 0.0,
+                    "p50": h.quantile(0.5),
+                    "p90": h.quantile(0.9),
+                    "p99": h.quantile(0.99),
+                }
+                for s, h in self.hist.items()
+            }
+            counters = {}
+            for (name, labels), v in self.counters.items():
+                key = name + ("{" + ",".join(f"{k}={val}" for k, val in labels) + "}" if labels else "")
+                counters[key] = v
+        eta = self.eta()
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            "items": self.count("items"),
+            "items_per_s": round(self.rate(), 3),
+            "tokens": self.count("tokens"),
+            "remaining": self.left(),
+            "eta_seconds": round(eta) if eta is not None else None,
+            "stages": stages,
+            "counters": counters,
+            "gauges": {k: _read(fn) for k, fn in self.gauges.items()},
+        }
+
+    def prometheus(self):
+        p = self.prefix
+        out = []
+        with self.lock:
+            out.append(f"# TYPE {p}_stage_seconds histogram")
+            for s, h in sorted(self.hist.items()):
+                acc = 0
+                for b, c in zip(h.buckets, h.counts):
+                    acc += c
+                    out.append(f'{p}_stage_seconds_bucket{{stage="{s}",le="{b}"}} {acc}')
+                out.append(f'{p}_stage_seconds_bucket{{stage="{s}",le="+Inf"}} {h.count}')
+                out.append(f'{p}_stage_seconds_sum{{stage="{s}"}} {h.sum:.6f}')
+                out.append(f'{p}_stage_seconds_count{{stage="{s}"}} {h.count}')
+            names = sorted({k for k, _ in self.counters})
+            for name in names:
+                out.append(f"# TYPE {p}_{name}_total counter")
+                for (k, labels), v in sorted(self.counters.items()):
+                    if k != name:
+                        continue
+                    lab = ",".join(f'{lk}="{lv}"' for lk, lv in labels)
+                    out.append(f"{p}_{name}_total{{{lab}}} {v}" if lab else f"{p}_{name}_total {v}")
+        left = self.left()
+        if left is not None:
+            out.append(f"# TYPE {p}_remaining gauge")
+            out.append(f"{p}_remaining {left}")
+        eta = self.eta()
+        if eta is not None:
+            out.append(f"# TYPE {p}_eta_seconds gauge")
+            out.append(f"{p}_eta_seconds {eta:.0f}")
+        for k, fn in sorted(self.gauges.items()):
+            out.append(f"# TYPE {p}_{k} gauge")
+            out.append(f"{p}_{k} {_read(fn)}")
+        return "\n".join(out) + "\n"
+
+    def format(self):
+        """One status line: rate, tokens, ETA and where the time goes."""
+        s = self.snapshot()
+        eta = s["eta_seconds"]
+        eta = f"{eta // 3600}h{eta % 3600 // 60:02d}m" if eta is not None else "?"
+        left = s["remaining"] if s["remaining"] is not None else "?"
+        busy = sorted(s["stages"].items(), key=lambda kv: -kv[1]["seconds"])
+        where = " ".join(f"{k}={v['seconds']:.0f}s/p50 {v['p50']}s" for k, v in busy)
+        errs = sum(v for k, v in s["counters"].items() if k.startswith("errors"))
+        return f"{s['items']} done ({s['items_per_s']:.2f}/s), {s['tokens']} tokens, {errs} errors, {left} remaining, ETA {eta} | {where}"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expose /metrics (Prometheus text) and /metrics.json on a background thread."""
+        m = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(m.snapshot()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, ctype = m.prometheus().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+        return httpd
+
+    def dump(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+    def dump_every(self, every, path=None, out=None):
+        """Every `every` seconds write the JSON snapshot to path and/or print format()."""
+        def loop():
+            while True:
+                time.sleep(every)
+                if path:
+                    self.dump(path)
+                if out is not None:
+                    print(f"  [metrics] {self.format()}", file=out, flush=True)
+        threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
+
+
+def _read(fn):
+    try:
+        return fn() if callable(fn) else fn
+    except Exception:
+        return None
@@ -0,0 +1,90 @@
+import hashlib, re, struct
+from collections import defaultdict
+
+# MinHash signatures + LSH banding for near-duplicate hadith texts.
+#
+# Each shingle (run of `k` consecutive words) is hashed once with SHAKE-128 into
+# NUM_PERM independent 32-bit values, so a signature is the column-wise minimum
+# over the document's shingles, computed without a Python loop per hash function.
+# Two signatures agree in a position with probability equal to the Jaccard
+# similarity of the shingle sets. LSH splits the signature into `bands` bands of
+# `rows` values; documents sharing any band become candidate pairs, which are
+# then checked against the threshold on the full signature.
+
+NUM_PERM = 128
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def english_tokens(text):
+    return _WORD.findall((text or "").lower())
+
+
+def shingles(tokens, k=3):
+    if len(tokens) < k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def signature(shingle_set, num_perm=NUM_PERM):
+    if not shingle_set:
+        return None
+    fmt = f"<{num_perm}I"
+    size = 4 * num_perm
+    rows = [struct.unpack(fmt, hashlib.shake_128(s.encode("utf-8")).digest(size)) for s in shingle_set]
+    return tuple(map(min, zip(*rows)))
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class LSH:
+    def __init__(self, bands=16, rows=8):
+        self.bands = bands
+        self.rows = rows
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+
+    def add(self, key, sig):
+        r = self.rows
+        for b in range(self.bands):
+            self.buckets[b][sig[b * r:(b + 1) * r]].append(key)
+
+    def candidates(self):
+        """Yield each candidate pair (a, b) once."""
+        seen = set()
+        for table in self.buckets:
+            for keys in table.values():
+                if len(keys) < 2:
+                    continue
+                for i in range(len(keys)):
+                    for j in range(i + 1, len(keys)):
+                        pair = (keys[i], keys[j]) if keys[i] < keys[j] else (keys[j], keys[i])
+                        if pair not in seen:
+                            seen.add(pair)
+                            yield pair
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        p = self.parent.setdefault(x, x)
+        while p != self.parent[p]:
+            self.parent[p] = self.parent[self.parent[p]]
+            p = self.parent[p]
+        self.parent[x] = p
+        return p
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+    def groups(self):
+        out = defaultdict(list)
+        for x in self.parent:
+            out[self.find(x)].append(x)
+        return out
@@ -0,0 +1,343 @@
+import json, random, re, threading, time, uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from enrichment.cursor import key as cursor_key
+
+# Local stand-ins for the enrichment pipeline's two backends, for benchmarks.
+#
+#   MockLLM        OpenAI-compatible /chat/completions with configurable latency,
+#                  random 429s and a tokens-per-minute budget
+#   MockPostgREST  /rest/v1 over in-memory hadiths, hadith_enrichment and
+#                  hadith_tags, plus the RPCs the enrichment scripts call
+#
+# Both run on a background thread: s = MockLLM().start(); s.url; s.stop()
+
+CAT_SLUG = "daily-life"
+TAG_SLUG = "good-deeds"
+
+
+def _tokens(text):
+    # Rough count (~4 chars per token) for the budget and usage
+    return max(1, len(text) // 4)
+
+
+class _Server:
+    def __init__(self, port=0):
+        handler = type("Handler", (_Handler,), {"app": self})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    app = None
+
+    def log_message(self, *a):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        raw = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n)) if n else None
+
+    def do_GET(self):
+        self._send(*self.app.handle("GET", self.path, None, self.headers))
+
+    def do_POST(self):
+        self._send(*self.app.handle("POST", self.path, self._body(), self.headers))
+
+
+class MockLLM(_Server):
+    def __init__(self, latency=0.5, per_token=0.0, jitter=0.2, rate_429=0.0, tpm=0, retry_after=1.0, port=0, seed=None):
+        super().__init__(port)
+        self.latency = latency
+        self.per_token = per_token
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.tpm = tpm
+        self.retry_after = retry_after
+        self.rand = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = deque()  # (time, tokens) in the last minute
+        self.requests = 0
+        self.throttled = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _budget(self, tokens):
+        # Sliding one-minute token budget; returns seconds to wait, 0 if admitted
+        if not self.tpm:
+            return 0
+        now = time.monotonic()
+        with self.lock:
+            while self.window and now - self.window[0][0] >= 60:
+                self.window.popleft()
+            used = sum(t for _, t in self.window)
+            if used + tokens > self.tpm and self.window:
+                return max(0.1, 60 - (now - self.window[0][0]))
+            self.window.append((now, tokens))
+        return 0
+
+    def _item(self, key=None):
+        item = {
+            "summary_line": "Kindness to others is rewarded by Allah",
+            "key_teaching_en": "Acts of kindness, however small, carry great reward. Scholars cite this as a basis for good character.",
+            "key_teaching_ar": "أعمال اللطف مهما صغرت لها أجر عظيم.",
+            "summary_ar": "اللطف بالآخرين مأجور",
+            "category_slug": CAT_SLUG,
+            "tag_slugs": [TAG_SLUG],
+            "confidence": 0.85,
+        }
+        if key is not None:
+            item = dict(key=key, **item)
+        return item
+
+    def handle(self, method, path, body, headers):
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            return 404, {"error": "not found"}
+        with self.lock:
+            self.requests += 1
+        prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+        p_tok = _tokens(prompt)
+        if self.rand.random() < self.rate_429:
+            with self.lock:
+                self.throttled += 1
+            return 429, {"error": "rate limited"}, {"Retry-After": f"{self.retry_after:g}"}
+        wait = self._budget(p_tok + int(body.get("max_tokens") or 0))
+        if wait:
+            with self.lock:
+                self.throttled += 1
+            return 429, {"error": "token budget exceeded"}, {"Retry-After": f"{wait:.1f}"}
+
+        keys = re.findall(r"\[key (\d+)\]", prompt)
+        content = json.dumps([self._item(k) for k in keys] if keys else self._item(), ensure_ascii=False)
+        c_tok = _tokens(content)
+        finish = "stop"
+        cap = int(body.get("max_tokens") or 0)
+        if cap and c_tok > cap:
+            # Cut off like a real model: the JSON no longer parses
+            content = content[:int(len(content) * cap / c_tok)]
+            c_tok, finish = cap, "length"
+        delay = (self.latency + self.per_token * c_tok) * self.rand.uniform(1 - self.jitter, 1 + self.jitter)
+        time.sleep(max(0, delay))
+        with self.lock:
+            self.prompt_tokens += p_tok
+            self.completion_tokens += c_tok
+        return 200, {
+            "id": "mock-" + uuid.uuid4().hex[:12],
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish}],
+            "usage": {"prompt_tokens": p_tok, "completion_tokens": c_tok, "total_tokens": p_tok + c_tok},
+        }
+
+
+def sample_hadiths(n, seed=0):
+    rand = random.Random(seed)
+    words = "the prophet said whoever believes in allah and the last day should speak good or remain silent and honour his neighbour".split()
+    out = []
+    for i in range(n):
+        out.append({
+            "id": str(uuid.UUID(int=rand.getrandbits(128), version=4)),
+            "hadith_number": i + 1,
+            "collection": "bench",
+            "english_translation": " ".join(rand.choice(words) for _ in range(rand.randint(30, 200))),
+            "narrator": "Abu Hurairah",
+            "grade": "sahih",
+            "enriched_at": None,
+            "updated_at": "2024-01-01T00:00:00+00:00",
+        })
+    return out
+
+
+class MockPostgREST(_Server):
+    def __init__(self, hadiths, latency=0.0, port=0):
+        super().__init__(port)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.hadiths = sorted(hadiths, key=lambda h: cursor_key(h.get("hadith_number"), h["id"]))
+        self.by_id = {h["id"]: h for h in self.hadiths}
+        self.tables = {
+            "hadiths": self.hadiths,
+            "hadith_enrichment": [],
+            "hadith_tags": [],
+            "hadith_tag_weights": [],
+            "categories": [{"id": str(uuid.uuid4()), "slug": CAT_SLUG}],
+            "tags": [{"id": str(uuid.uuid4()), "slug": TAG_SLUG, "is_active": True}],
+            "tag_aliases": [],
+        }
+        self.enriched = set()
+        self.leases = {}      # hadith_id -> (worker, expires)
+        self.claimed_at = {}  # hadith_id -> first claim time
+        self.rejections = {}  # hadith_id -> quality gate rejections
+        self.written_at = {}  # hadith_id -> write time
+        self.calls = {}
+
+    def latencies(self):
+        """Claim-to-write seconds for every written hadith."""
+        return [self.written_at[h] - self.claimed_at[h] for h in self.written_at if h in self.claimed_at]
+
+    def _select(self, table, query):
+        rows = self.tables.get(table)
+        if rows is None:
+            return 404, {"message": f"relation {table} does not exist"}
+        pairs = parse_qsl(query)
+        q = dict(pairs)
+        for col, cond in pairs:
+            if col in ("select", "order", "limit", "offset") or "." not in cond:
+                continue
+            op, val = cond.split(".", 1)
+            if op == "eq":
+                rows = [r for r in rows if json.dumps(r.get(col)).strip('"') == val]
+            elif op in ("gt", "gte", "lt"):
+                cmp = {"gt": str.__gt__, "gte": str.__ge__, "lt": str.__lt__}[op]
+                rows = [r for r in rows if r.get(col) is not None and cmp(str(r.get(col)), val)]
+            elif op == "in":
+                vals = set(val.strip("()").split(","))
+                rows = [r for r in rows if str(r.get(col)) in vals]
+            elif op == "is" and val == "null":
+                rows = [r for r in rows if r.get(col) is None]
+            elif op == "not" and val == "is.null":
+                rows = [r for r in rows if r.get(col) is not None]
+        if q.get("order", "").startswith("id"):
+            rows = sorted(rows, key=lambda r: r["id"])
+        off = int(q.get("offset", 0))
+        lim = int(q.get("limit", len(rows)))
+        return 200, rows[off:off + lim]
+
+    def _write(self, rows, now):
+        # Shared by insert_enrichment / insert_enrichments_bulk / plain inserts
+        n = 0
+        for r in rows:
+            hid = r.get("hadith_id")
+            if not hid or hid in self.enriched:
+                continue
+            self.enriched.add(hid)
+            if hid in self.by_id:
+                self.by_id[hid]["enriched_at"] = now
+            self.leases.pop(hid, None)
+            self.written_at[hid] = now
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)) + f".{int(now % 1 * 1e6):06d}+00:00"
+            self.tables["hadith_enrichment"].append(dict(r, id=str(uuid.uuid4()), updated_at=stamp))
+            if r.get("tag_ids"):
+                for tid in r["tag_ids"]:
+                    self.tables["hadith_tags"].append({"id": str(uuid.uuid4()), "hadith_id": hid, "tag_id": tid, "status": "published", "created_at": stamp, "updated_at": stamp})
+            else:
+                for slug in r.get("tag_slugs") or []:
+                    self.tables["hadith_tags"].append({"id": str(uuid.uuid4()), "hadith_id": hid, "tag_slug": slug, "status": "published"})
+            n += 1
+        return n
+
+    def _unenriched(self, n, after=None, worker=None, lease=None):
+        now = time.time()
+        out = []
+        for h in self.hadiths:
+            if len(out) >= n:
+                break
+            if h["id"] in self.enriched:
+                continue
+            if after and cursor_key(h.get("hadith_number"), h["id"]) <= after:
+                continue
+            held = self.leases.get(h["id"])
+            if held and held[1] > now:
+                continue
+            if worker is not None:
+                self.leases[h["id"]] = (worker, now + lease)
+                self.claimed_at.setdefault(h["id"], now)
+            out.append({k: h[k] for k in ("id", "english_translation", "narrator", "grade", "hadith_number")})
+        return out
+
+    def _rpc(self, fn, b):
+        now = time.time()
+        if fn == "get_unenriched_hadiths":
+            return 200, self._unenriched(int(b.get("lim", 5)))
+        if fn == "get_unenriched_hadiths_after":
+            after = cursor_key(b.get("after_hadith_number"), b["after_id"]) if b.get("after_id") else None
+            return 200, self._unenriched(int(b.get("lim", 50)), after)
+        if fn == "claim_unenriched_hadiths":
+            after = cursor_key(b.get("p_after_hadith_number"), b["p_after_id"]) if b.get("p_after_id") else None
+            return 200, self._unenriched(int(b.get("n", 50)), after, b["p_worker_id"], int(b.get("lease_seconds", 600)))
+        if fn == "claim_hadiths_by_id":
+            ids, worker, previous = set(b["p_ids"]), b["p_worker_id"], set(b.get("p_previous_workers") or ())
+            out = []
+            for h in self.hadiths:
+                held = self.leases.get(h["id"])
+                if h["id"] not in ids or h["id"] in self.enriched or (held and held[1] > now and held[0] not in previous | {worker}):
+                    continue
+                self.leases[h["id"]] = (worker, now + int(b.get("lease_seconds", 600)))
+                out.append({k: h[k] for k in ("id", "english_translation", "narrator", "grade", "hadith_number")})
+            return 200, out
+        if fn == "count_claimable_hadiths":
+            return 200, sum(h["id"] not in self.enriched and len(h.get("english_translation") or "") > 10 for h in self.hadiths)
+        if fn == "get_taxonomy_version":
+            return 200, 1
+        if fn == "get_taxonomy":
+            t = self.tables
+            return 200, {"version": 1, "categories": t["categories"], "tags": t["tags"], "aliases": t["tag_aliases"]}
+        if fn == "propagate_cluster_enrichments":
+            return 200, 0
+        if fn == "record_enrichment_rejection":
+            n = self.rejections[b["p_hadith_id"]] = self.rejections.get(b["p_hadith_id"], 0) + 1
+            return 200, n
+        if fn == "release_hadith_leases":
+            mine = [h for h, (w, _) in self.leases.items() if w == b.get("p_worker_id")]
+            for h in mine:
+                del self.leases[h]
+            return 200, len(mine)
+        if fn == "insert_enrichment":
+            row = {k[2:]: v for k, v in b.items() if k.startswith("p_")}
+            return 200, self._write([row], now)
+        if fn == "insert_enrichments_bulk":
+            rows = b.get("p_rows") or []
+            skipped = sorted({r["hadith_id"] for r in rows if r.get("hadith_id") in self.enriched})
+            return 200, {"written": self._write(rows, now), "skipped": skipped}
+        return 404, {"message": f"function {fn} does not exist"}
+
+    def handle(self, method, path, body, headers):
+        if self.latency:
+            time.sleep(self.latency)
+        u = urlsplit(path)
+        name = u.path.split("/rest/v1/", 1)[-1].strip("/")
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if name.startswith("rpc/"):
+                return self._rpc(name[4:], body or {})
+            if method == "GET":
+                status, rows = self._select(name, u.query)
+                if status == 200 and "count=exact" in (headers.get("Prefer") or ""):
+                    # Range: 0-0 with a total, as PostgREST answers count=exact
+                    return status, rows[:1], {"Content-Range": f"0-{min(len(rows), 1) - 1}/{len(rows)}" if rows else "*/0"}
+                return status, rows
+            if name in ("hadith_enrichment", "hadith_tags"):
+                rows = body if isinstance(body, list) else [body]
+                if name == "hadith_enrichment":
+                    self._write(rows, time.time())
+                else:
+                    self.tables[name].extend(rows)
+                return 201, rows
+            return 404, {"message": f"relation {name} does not exist"}
@@ -0,0 +1,161 @@
+import queue, sys, threading, time
+
+# Staged producer/consumer pipeline with bounded queues.
+#
+#   p = Pipeline()
+#   p.source("fetch", generator)                  # yields items
+#   p.stage("llm", fn, workers=8, maxsize=16)     # fn(item) -> list of outputs
+#   p.stage("write", fn, workers=1)
+#   p.run()
+#
+# Every stage runs in its own threads. Queues between stages are bounded, so a
+# slow stage pushes back on the one before it and memory stays flat. A reporter
+# thread prints per-stage throughput and queue depth while the pipeline runs.
+
+_END = object()
+
+
+class Stage:
+    def __init__(self, name, fn, workers, inbox, on_error):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.inbox = inbox
+        self.outbox = None
+        self.on_error = on_error
+        self.done = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.finished = 0
+        self.lock = threading.Lock()
+
+    def emit(self, out):
+        if self.outbox is not None and out:
+            for o in out:
+                self.outbox.put(o)
+
+    def _count(self, started, ok):
+        with self.lock:
+            self.busy += time.monotonic() - started
+            if ok:
+                self.done += 1
+            else:
+                self.errors += 1
+
+    def _finish(self, next_stage):
+        # The last worker of this stage to finish closes the next stage's inbox
+        with self.lock:
+            self.finished += 1
+            last = self.finished == self.workers
+        if last and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.inbox.put(_END)
+
+    def work(self, next_stage):
+        while True:
+            item = self.inbox.get()
+            if item is _END:
+                break
+            started = time.monotonic()
+            try:
+                out = self.fn(item)
+                self.emit(out)
+                self._count(started, True)
+            except Exception as ex:
+                self._count(started, False)
+                if self.on_error is not None:
+                    self.on_error(self.name, item, ex)
+        self._finish(next_stage)
+
+
+class Source(Stage):
+    def __init__(self, name, gen, on_error):
+        super().__init__(name, None, 1, None, on_error)
+        self.gen = gen
+
+    def work(self, next_stage):
+        started = time.monotonic()
+        try:
+            for item in self.gen():
+                self.busy += time.monotonic() - started
+                self.outbox.put(item)
+                self.done += 1
+                started = time.monotonic()
+        except Exception as ex:
+            self.errors += 1
+            if self.on_error is not None:
+                self.on_error(self.name, None, ex)
+        self._finish(next_stage)
+
+
+class Pipeline:
+    def __init__(self, report_every=10.0, on_error=None, out=sys.stdout):
+        self.stages = []
+        self.report_every = report_every
+        self.on_error = on_error
+        self.out = out
+        self.started = None
+
+    def source(self, name, gen, maxsize=8):
+        s = Source(name, gen, self.on_error)
+        s.maxsize = maxsize
+        self.stages.append(s)
+        return s
+
+    def stage(self, name, fn, workers=1, maxsize=8):
+        # fn(item) returns an iterable of items for the next stage (or None).
+        # maxsize bounds the queue between this stage and the next one.
+        prev = self.stages[-1]
+        s = Stage(name, fn, workers, queue.Queue(maxsize=prev.maxsize), self.on_error)
+        s.maxsize = maxsize
+        prev.outbox = s.inbox
+        self.stages.append(s)
+        return s
+
+    def snapshot(self):
+        elapsed = max(1e-9, time.monotonic() - self.started)
+        out = []
+        for s in self.stages:
+            out.append({
+                "stage": s.name,
+                "done": s.done,
+                "errors": s.errors,
+                "rate": s.done / elapsed,
+                "busy": s.busy,
+                "queue": s.inbox.qsize() if s.inbox is not None else None,
+            })
+        return out
+
+    def format(self):
+        parts = []
+        for st in self.snapshot():
+            q = f" q={st['queue']}" if st["queue"] is not None else ""
+            err = f" err={st['errors']}" if st["errors"] else ""
+            parts.append(f"{st['stage']}{q} {st['done']} ({st['rate']:.2f}/s){err}")
+        return " | ".join(parts)
+
+    def _reporter(self, stop):
+        while not stop.wait(self.report_every):
+            print(f"  [pipeline] {self.format()}", file=self.out, flush=True)
+
+    def run(self):
+        self.started = time.monotonic()
+        threads = []
+        for i, s in enumerate(self.stages):
+            nxt = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            for w in range(s.workers):
+                t = threading.Thread(target=s.work, args=(nxt,), name=f"{s.name}-{w}", daemon=True)
+                t.start()
+                threads.append(t)
+        stop = threading.Event()
+        rep = None
+        if self.report_every:
+            rep = threading.Thread(target=self._reporter, args=(stop,), daemon=True)
+            rep.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.5)
+        finally:
+            stop.set()
+        return self.snapshot()
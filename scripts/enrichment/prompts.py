@@ -0,0 +1,103 @@
+import json, re
+
+from enrichment import translation
+from enrichment.budget import ITEM_TOKENS, window
+
+SYSTEM = "You are a hadith scholar. Return valid JSON only, no markdown."
+
+FIELDS = (
+    "- summary_line: 5-12 word summary of core teaching\n"
+    "- key_teaching_en: 2-4 sentences. First: plain accessible explanation. Rest: scholarly context with references to scholars or Quran. Do NOT repeat hadith text.\n"
+    "- key_teaching_ar: Arabic translation of key_teaching_en in MSA\n"
+    "- summary_ar: Arabic translation of summary_line (3-10 words)\n"
+)
+
+REQUIRED = ("summary_line", "key_teaching_en", "key_teaching_ar", "summary_ar", "category_slug", "tag_slugs")
+
+
+def _hadith_text(h, limit=ITEM_TOKENS):
+    # Whole sentences up to `limit` tokens rather than a fixed character slice;
+    # rows not yet through repair_translations.py still hold a JSON blob
+    return window(translation.split(h.get("english_translation"))[1], limit).replace('"', "'")
+
+
+def single_prompt(h, cat_slugs, tag_slugs, limit=ITEM_TOKENS):
+    prompt = "Analyze this hadith and return ONLY valid JSON.\n\n"
+    prompt += 'Hadith: "' + _hadith_text(h, limit) + '"\n'
+    prompt += "Narrator: " + (h.get("narrator") or "Unknown") + "\nGrade: " + (h.get("grade") or "Unknown") + "\n\n"
+    prompt += "Return JSON with:\n" + FIELDS
+    prompt += "- category_slug: ONE from " + str(list(cat_slugs)) + "\n"
+    prompt += "- tag_slugs: 1-4 from " + str(list(tag_slugs)) + "\n"
+    prompt += "- confidence: 0-1 float\n"
+    prompt += "\nReturn ONLY the JSON object."
+    return prompt
+
+
+def batch_prompt(hadiths, cat_slugs, tag_slugs, limit=ITEM_TOKENS):
+    """One prompt for several hadiths; the vocabulary lists are sent once.
+
+    Items are keyed by their position ("1".."K") rather than the uuid to keep
+    the prompt short; parse_batch maps them back.
+    """
+    prompt = "Analyze each hadith below and return ONLY a valid JSON array, one object per hadith.\n\n"
+    prompt += "Each object must have:\n- key: the hadith key exactly as given\n" + FIELDS
+    prompt += "- category_slug: ONE from " + str(list(cat_slugs)) + "\n"
+    prompt += "- tag_slugs: 1-4 from " + str(list(tag_slugs)) + "\n"
+    prompt += "- confidence: 0-1 float\n\n"
+    for i, h in enumerate(hadiths, 1):
+        prompt += f"[key {i}]\n"
+        prompt += 'Hadith: "' + _hadith_text(h, limit) + '"\n'
+        prompt += "Narrator: " + (h.get("narrator") or "Unknown") + "\nGrade: " + (h.get("grade") or "Unknown") + "\n\n"
+    prompt += "Return ONLY the JSON array."
+    return prompt
+
+
+def messages(prompt):
+    return [{"role": "system", "content": SYSTEM}, {"role": "user", "content": prompt}]
+
+
+def parse_json(raw):
+    raw = raw.strip()
+    if raw.startswith("```"):
+        lines = raw.split("\n")
+        raw = "\n".join(lines[1:-1]) if len(lines) > 2 else raw
+    return json.loads(raw)
+
+
+def valid_item(obj):
+    if not isinstance(obj, dict):
+        return False
+    for k in REQUIRED:
+        if k not in obj:
+            return False
+    return isinstance(obj.get("tag_slugs"), list) and all(isinstance(obj[k], str) for k in REQUIRED[:5])
+
+
+def parse_batch(raw, hadiths):
+    """Map a batch response back to hadith ids.
+
+    Returns {hadith_id: obj} for items that came back well-formed. Anything
+    missing or malformed is left out so the caller can retry it on its own.
+    """
+    try:
+        data = parse_json(raw)
+    except ValueError:
+        return {}
+    if isinstance(data, dict):
+        # Some models wrap the array: {"results": [...]} or key -> object
+        arrays = [v for v in data.values() if isinstance(v, list)]
+        data = arrays[0] if arrays else [dict(v, key=k) for k, v in data.items() if isinstance(v, dict)]
+    if not isinstance(data, list):
+        return {}
+
+    out = {}
+    for pos, obj in enumerate(data, 1):
+        if not valid_item(obj):
+            continue
+        m = re.search(r"\d+", str(obj.get("key", pos)))
+        if not m:
+            continue
+        idx = int(m.group()) - 1
+        if 0 <= idx < len(hadiths):
+            out.setdefault(hadiths[idx]["id"], obj)
+    return out
@@ -0,0 +1,79 @@
+import os
+
+from enrichment import client
+
+# LLM providers for the enrichment runner. Every provider speaks the OpenAI
+# chat-completions wire format, so one class covers them; the subclasses only
+# fill in the endpoint, key variable and default model. ENRICH_LLM_URL and
+# ENRICH_LLM_MODEL configure the openai-compatible provider only, so a shell
+# set up for a local server does not redirect deepinfra or groq.
+#
+#   p = providers.get("groq")
+#   resp = p.complete(messages, temperature=0.3, max_tokens=1000)
+
+
+class ChatCompletions:
+    name = None
+    url = None
+    key_env = None
+    default_model = None
+
+    def __init__(self, model=None, url=None, key=None, timeout=60):
+        self.url = url or self.url
+        self.model = model or self.default_model
+        self.key = key or os.environ.get(self.key_env, "")
+        self.timeout = timeout
+        if not self.url:
+            raise ValueError(f"{self.name}: set ENRICH_LLM_URL to the chat completions endpoint")
+        if not self.model:
+            raise ValueError(f"{self.name}: set ENRICH_LLM_MODEL or pass --model")
+
+    @property
+    def label(self):
+        # hadith_enrichment.suggested_by, e.g. "deepinfra-llama-3.3-70b"
+        short = self.model.rsplit("/", 1)[-1].lower().replace("-instruct", "").replace("-versatile", "")
+        return f"{self.name}-{short}"
+
+    def complete(self, messages, temperature=0.3, max_tokens=1000):
+        """Return the full chat completion response (choices, usage)."""
+        headers = {"Authorization": "Bearer " + self.key} if self.key else {}
+        return client.request("POST", self.url, {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }, headers, timeout=self.timeout)
+
+
+class OpenAICompatible(ChatCompletions):
+    name = "openai-compatible"
+    key_env = "ENRICH_LLM_KEY"
+
+    def __init__(self, model=None, url=None, **kwargs):
+        super().__init__(model=model or os.environ.get("ENRICH_LLM_MODEL"),
+                         url=url or os.environ.get("ENRICH_LLM_URL"), **kwargs)
+
+
+class DeepInfra(ChatCompletions):
+    name = "deepinfra"
+    url = client.DEEPINFRA_URL
+    key_env = "DEEPINFRA_API_KEY"
+    default_model = "meta-llama/Llama-3.3-70B-Instruct"
+
+
+class Groq(ChatCompletions):
+    name = "groq"
+    url = "https://api.groq.com/openai/v1/chat/completions"
+    key_env = "GROQ_API_KEY"
+    default_model = "llama-3.3-70b-versatile"
+
+
+PROVIDERS = {p.name: p for p in (DeepInfra, Groq, OpenAICompatible)}
+
+
+def get(name, **kwargs):
+    try:
+        cls = PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"unknown provider {name!r} (choose from {', '.join(PROVIDERS)})")
+    return cls(**kwargs)
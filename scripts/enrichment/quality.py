@@ -0,0 +1,107 @@
+import re
+
+from enrichment import minhash, translation
+
+# Quality gate for LLM answers, run on each chunk before anything is written.
+#
+# Rows used to be coerced into shape: unknown categories became daily-life,
+# unknown tags were dropped, and over-long text was cut to a fixed number of
+# characters, and the result was still published. Now an answer that fails
+# any check is not written. The runner evicts it from the response cache,
+# retries the hadith once on its own, and otherwise journals it as "rejected"
+# for the next run to pick up.
+#
+# Problem codes (also the `reason` label on the rejected metric):
+#   schema    missing field, wrong type, confidence not a number in [0, 1]
+#   length    a text field outside LENGTHS, or summary_line outside SUMMARY_WORDS
+#   script    *_ar fields not mostly Arabic letters, *_en fields mostly Arabic
+#   category  category_slug not in the taxonomy
+#   tags      no tags, more than MAX_TAGS, or a slug that is neither a tag nor an alias
+#   echo      key_teaching_en / summary_line copied from the hadith text
+
+# (min, max) characters after stripping
+LENGTHS = {
+    "summary_line": (10, 120),
+    "summary_ar": (5, 160),
+    "key_teaching_en": (40, 900),
+    "key_teaching_ar": (15, 1200),
+}
+SUMMARY_WORDS = (3, 16)
+MAX_TAGS = 4
+# Share of letters that must be Arabic in *_ar fields
+ARABIC_SHARE = 0.6
+# Share of the teaching's word 4-grams found in the hadith text that counts as an echo
+ECHO_SHARE = 0.5
+ECHO_SHINGLE = 4
+
+_ARABIC = re.compile(r"[\u0600-\u06ff\u0750-\u077f\ufb50-\ufdff\ufe70-\ufeff]")
+_LATIN = re.compile(r"[A-Za-z]")
+
+ARABIC_FIELDS = ("summary_ar", "key_teaching_ar")
+ENGLISH_FIELDS = ("summary_line", "key_teaching_en")
+
+
+def arabic_share(text):
+    ar = len(_ARABIC.findall(text))
+    letters = ar + len(_LATIN.findall(text))
+    return ar / letters if letters else 0.0
+
+
+def _schema(r):
+    if not isinstance(r, dict):
+        return False
+    if any(not isinstance(r.get(k), str) for k in LENGTHS) or not isinstance(r.get("category_slug"), str):
+        return False
+    if not isinstance(r.get("tag_slugs"), list) or not all(isinstance(t, str) for t in r["tag_slugs"]):
+        return False
+    c = r.get("confidence", 0.8)
+    return isinstance(c, (int, float)) and not isinstance(c, bool) and 0 <= c <= 1
+
+
+class Gate:
+    def __init__(self, tax):
+        self.tax = tax
+
+    def problems(self, hadith, r):
+        """Problem codes for one answer; empty when it may be written."""
+        if not _schema(r):
+            return ["schema"]
+        out = []
+        text = {k: r[k].strip() for k in LENGTHS}
+        words = len(text["summary_line"].split())
+        if any(not lo <= len(text[k]) <= hi for k, (lo, hi) in LENGTHS.items()) \
+                or not SUMMARY_WORDS[0] <= words <= SUMMARY_WORDS[1]:
+            out.append("length")
+        if any(arabic_share(text[k]) < ARABIC_SHARE for k in ARABIC_FIELDS) \
+                or any(arabic_share(text[k]) > 0.5 for k in ENGLISH_FIELDS):
+            out.append("script")
+        if r["category_slug"] not in self.tax.categories:
+            out.append("category")
+        tags = r["tag_slugs"]
+        if not tags or len(tags) > MAX_TAGS or any(self.tax.tag(t) is None for t in tags):
+            out.append("tags")
+        if self.echo(hadith, text):
+            out.append("echo")
+        return out
+
+    def echo(self, hadith, text):
+        _, source = translation.split(hadith.get("english_translation"))
+        src = minhash.english_tokens(source)
+        if len(src) < ECHO_SHINGLE:
+            return False
+        source_shingles = minhash.shingles(src, ECHO_SHINGLE)
+        # A summary that is a run of the hadith's own words
+        summary = minhash.english_tokens(text["summary_line"])
+        if len(summary) >= ECHO_SHINGLE and f" {' '.join(summary)} " in f" {' '.join(src)} ":
+            return True
+        teaching = minhash.shingles(minhash.english_tokens(text["key_teaching_en"]), ECHO_SHINGLE)
+        return bool(teaching) and len(teaching & source_shingles) / len(teaching) >= ECHO_SHARE
+
+    def check(self, pairs):
+        """{hadith_id: problem codes} for the failing (hadith, answer) pairs of a chunk."""
+        out = {}
+        for h, r in pairs:
+            p = self.problems(h, r)
+            if p:
+                out[h["id"]] = p
+        return out
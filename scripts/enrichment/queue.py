@@ -0,0 +1,14 @@
+import os, socket, uuid
+
+# Default lease: long enough for one batch of LLM calls plus writes. Leases that
+# outlive a crashed worker expire and the hadiths are handed out again.
+LEASE_SECONDS = int(os.environ.get("ENRICH_LEASE_SECONDS", "600"))
+
+
+def worker_id():
+    # Stable per process, unique across machines and parallel runs
+    return os.environ.get("ENRICH_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def claim_body(worker, n, lease_seconds=LEASE_SECONDS):
+    return {"p_worker_id": worker, "n": n, "lease_seconds": lease_seconds}
@@ -0,0 +1,64 @@
+import threading, time
+
+
+class TokenBucket:
+    """Thread-safe token bucket. `rate` tokens refill per second up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if now < self.updated:
+            return
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, n=1):
+        # Block until n tokens are available. A rate of 0 or less disables limiting.
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = max(0.0, self.updated - time.monotonic()) + (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket that tunes its own rate to the provider's observed limit.
+
+    Additive increase on success, multiplicative decrease on a 429 (AIMD), kept
+    between min_rate and max_rate. A Retry-After hint also pauses refills so
+    every worker backs off together instead of each burning a request.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=0.2, max_rate=None, step=0.05, backoff=0.5):
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.step = step
+        self.backoff = backoff
+
+    def success(self):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+    def throttled(self, retry_after=None):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            self.tokens = 0.0
+            if retry_after:
+                # Refill resumes only after the server's requested pause
+                self.updated = time.monotonic() + retry_after
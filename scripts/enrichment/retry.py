@@ -0,0 +1,127 @@
+import email.utils, http.client, random, socket, threading, time
+
+from enrichment.client import HTTPError
+
+# Shared retry policy for Supabase and LLM calls: exponential backoff with full
+# jitter, Retry-After support, a circuit breaker, and feedback into an adaptive
+# rate limiter so a burst of 429s slows every worker down instead of losing items.
+
+# 409 from PostgREST is a unique/foreign-key violation: retrying cannot fix it
+TRANSIENT_STATUS = (408, 425, 429, 500, 502, 503, 504)
+NETWORK_ERRORS = (OSError, socket.timeout, http.client.HTTPException)
+
+
+def retry_after(err):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    headers = {k.lower(): v for k, v in (getattr(err, "headers", None) or {}).items()}
+    v = headers.get("retry-after")
+    if not v:
+        return None
+    try:
+        return max(0.0, float(v))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(v).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def transient(err):
+    if isinstance(err, HTTPError):
+        return err.status in TRANSIENT_STATUS
+    return isinstance(err, NETWORK_ERRORS)
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; callers wait out `cooldown`.
+
+    After the cooldown one trial call goes through (half-open); success closes
+    the circuit, another failure re-opens it.
+    """
+
+    def __init__(self, threshold=8, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def wait(self, max_wait=None):
+        while True:
+            with self.lock:
+                if self.opened_at is None:
+                    return
+                left = self.opened_at + self.cooldown - time.monotonic()
+                if left <= 0:
+                    # Half-open: let this caller try; others keep waiting
+                    self.opened_at = time.monotonic()
+                    return
+            if max_wait is not None and left > max_wait:
+                raise CircuitOpen(f"circuit open for another {left:.0f}s")
+            time.sleep(min(left, 1.0))
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    print(f"  circuit open after {self.failures} consecutive failures, pausing {self.cooldown:.0f}s")
+                self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    def __init__(self, attempts=6, base=0.5, cap=60.0, limiter=None, breaker=None):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.limiter = limiter
+        self.breaker = breaker
+        self.retries = 0
+
+    def delay(self, attempt, err):
+        hinted = retry_after(err)
+        if hinted is not None:
+            return min(self.cap, hinted)
+        return random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+
+    def call(self, fn, *args, **kwargs):
+        for attempt in range(self.attempts):
+            if self.breaker is not None:
+                self.breaker.wait()
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                res = fn(*args, **kwargs)
+            except Exception as err:
+                if not transient(err):
+                    raise
+                if self.breaker is not None:
+                    self.breaker.failure()
+                # An unlimited limiter (rate <= 0) never waits in acquire(), so it
+                # cannot carry the pause: back off here instead
+                throttled = (self.limiter is not None and getattr(err, "status", None) == 429
+                             and hasattr(self.limiter, "throttled") and self.limiter.rate > 0)
+                if throttled:
+                    # The limiter now holds every worker back; acquire() does the waiting
+                    self.limiter.throttled(retry_after(err))
+                if attempt == self.attempts - 1:
+                    raise
+                self.retries += 1
+                if not throttled:
+                    time.sleep(self.delay(attempt, err))
+                continue
+            if self.breaker is not None:
+                self.breaker.success()
+            if self.limiter is not None and hasattr(self.limiter, "success"):
+                self.limiter.success()
+            return res
@@ -0,0 +1,458 @@
+import json, os, sys, threading
+
+from enrichment import client, cursor, journal, prompts, providers, quality, taxonomy
+from enrichment.budget import ITEM_TOKENS, Budget
+from enrichment.cache import ResponseCache, key as cache_key
+from enrichment.journal import Journal, pending, previous_workers
+from enrichment.slots import Slot
+from enrichment.metrics import Metrics
+from enrichment.pipeline import Pipeline
+from enrichment.queue import LEASE_SECONDS, worker_id, claim_body
+from enrichment.ratelimit import AdaptiveTokenBucket
+from enrichment.retry import CircuitBreaker, RetryPolicy
+from enrichment.writer import BatchWriter
+
+# The enrichment run: claim hadiths from the lease queue, ask the LLM provider
+# (batched, cached, rate-limited), check answers against the quality gate
+# (quality.py), and bulk-write, as a four-stage pipeline. scripts/enrich.py is the CLI; this is the one place the hot path lives.
+
+METHODOLOGY = "v1.1"
+TEMPERATURE = 0.3
+
+
+def add_arguments(ap):
+    env = os.environ.get
+    ap.add_argument("--provider", default=env("ENRICH_PROVIDER", "deepinfra"), choices=sorted(providers.PROVIDERS), help="LLM provider")
+    ap.add_argument("--model", help="model name (default: the provider's; ENRICH_LLM_MODEL for openai-compatible)")
+    ap.add_argument("--batch", type=int, default=int(env("ENRICH_BATCH", "20")), help="hadiths to process this run (0 = until the queue is empty)")
+    ap.add_argument("--claim", type=int, default=int(env("ENRICH_CLAIM", "50")), help="hadiths claimed per queue round trip")
+    ap.add_argument("--workers", type=int, default=int(env("ENRICH_WORKERS", "8")), help="max in-flight LLM requests")
+    ap.add_argument("--rps", type=float, default=float(env("ENRICH_RPS", "3")), help="LLM requests per second (0 = unlimited)")
+    ap.add_argument("--max-rps", type=float, default=float(env("ENRICH_MAX_RPS", "0")) or None, help="ceiling for the adaptive rate (default: 4x --rps)")
+    ap.add_argument("--burst", type=float, default=None, help="token bucket burst size (default: rps)")
+    ap.add_argument("--retries", type=int, default=int(env("ENRICH_RETRIES", "6")), help="attempts per request on 429/5xx/network errors")
+    ap.add_argument("--per-request", type=int, default=int(env("ENRICH_PER_REQUEST", "10")), help="max hadiths packed into one LLM prompt")
+    ap.add_argument("--prompt-tokens", type=int, default=int(env("ENRICH_PROMPT_TOKENS", "3000")), help="hadith text tokens per LLM prompt; short hadiths share a request")
+    ap.add_argument("--item-tokens", type=int, default=int(env("ENRICH_ITEM_TOKENS", str(ITEM_TOKENS))), help="input window per hadith, cut at a sentence boundary")
+    ap.add_argument("--write-batch", type=int, default=int(env("ENRICH_WRITE_BATCH", "50")), help="enrichments per bulk insert")
+    ap.add_argument("--queue", type=int, default=int(env("ENRICH_QUEUE", "16")), help="max items buffered between stages")
+    ap.add_argument("--report", type=float, default=float(env("ENRICH_REPORT", "10")), help="seconds between pipeline stats lines (0 = off)")
+    ap.add_argument("--no-resume", action="store_true", help="ignore unfinished work in this slot's .enrich_journal.<slot>.jsonl")
+    ap.add_argument("--no-cache", action="store_true", help="always call the LLM, ignoring .enrich_cache.sqlite")
+    ap.add_argument("--metrics-port", type=int, default=int(env("ENRICH_METRICS_PORT", "0")), help="serve /metrics (Prometheus) and /metrics.json on this port (0 = off)")
+    ap.add_argument("--metrics-file", default=env("ENRICH_METRICS_FILE"), help="write a JSON metrics snapshot here every --report seconds")
+    return ap
+
+
+class Runner:
+    def __init__(self, args, sb=None, provider=None):
+        self.args = args
+        self.sb = sb or client.Supabase()
+        self.provider = provider or providers.get(args.provider, model=args.model)
+        # The limiter starts at --rps and adapts: it backs off on 429s and creeps up
+        # while requests succeed, so it settles just under the provider's real limit.
+        self.limiter = AdaptiveTokenBucket(args.rps, args.burst, max_rate=args.max_rps)
+        self.llm_policy = RetryPolicy(attempts=args.retries, limiter=self.limiter, breaker=CircuitBreaker())
+        self.db_policy = RetryPolicy(attempts=args.retries, breaker=CircuitBreaker())
+        self.cache = None if args.no_cache else ResponseCache()
+        self.metrics = Metrics()
+        self.budget = Budget(args.item_tokens, args.prompt_tokens, args.per_request)
+        self.worker = worker_id()
+        # Cursor and journal belong to this process's slot; see enrichment/slots.py
+        self.slot = Slot(journal.DEFAULT_PATH)
+        self.cursor = cursor.Cursor(self.slot.path(cursor.DEFAULT_PATH))
+        self.journal_path = self.slot.path(journal.DEFAULT_PATH)
+        self.ok = 0
+        self.fail = 0
+        self.lock = threading.Lock()
+        self.tax = None
+        self.gate = None
+        self.propagate = True
+        self.track_rejections = True
+        self.resume_hadiths = []
+        self.journal = None
+        self.writer = None
+
+    # --- I/O -----------------------------------------------------------------
+
+    def db(self, fn, *a):
+        # Supabase call with retries; a final HTTP error is logged and returns None
+        try:
+            return self.db_policy.call(fn, *a)
+        except client.HTTPError as e:
+            self.metrics.error("db", e)
+            print(f"  HTTP {e.status}: {e.body[:200]}")
+            return None
+
+    def rpc(self, fn, body):
+        return self.db(self.sb.rpc, fn, body)
+
+    def complete(self, prompt, max_tokens, items=1):
+        # Returns (content, cache_key). Cached completions skip the API and the limiter.
+        # max_tokens is left out of the key: it moves with the observed output
+        # sizes, and a response cut off by it fails to parse and is evicted.
+        msgs = prompts.messages(prompt)
+        k = cache_key(self.provider.model, msgs, TEMPERATURE, None, METHODOLOGY)
+        if self.cache is not None:
+            hit = self.cache.get(k)
+            if hit is not None:
+                self.metrics.inc("cache", result="hit")
+                return hit, k
+        try:
+            with self.metrics.time("llm"):
+                resp = self.llm_policy.call(self.provider.complete, msgs, TEMPERATURE, max_tokens)
+        except client.HTTPError as e:
+            self.metrics.error("llm", e)
+            print(f"  HTTP {e.status}: {e.body[:200]}")
+            return None, k
+        if not resp or "choices" not in resp:
+            return None, k
+        self.metrics.tokens(resp.get("usage"))
+        choice = resp["choices"][0]
+        self.budget.observe(prompt, resp.get("usage"), items, choice.get("finish_reason"), max_tokens)
+        if choice.get("finish_reason") == "length":
+            self.metrics.inc("truncated")
+        content = choice["message"]["content"]
+        if self.cache is not None:
+            self.cache.put(k, content, self.provider.model, resp.get("usage"))
+        return content, k
+
+    # --- LLM -----------------------------------------------------------------
+
+    def parsed(self, content, k, parse):
+        # A cached response that no longer parses is evicted so the retry is a fresh call
+        try:
+            with self.metrics.time("parse"):
+                return parse(content)
+        except ValueError:
+            if self.cache is not None:
+                self.cache.delete(k)
+            raise
+
+    def single_prompt(self, hadith):
+        return prompts.single_prompt(hadith, self.tax.category_slugs, self.tax.tag_slugs, self.budget.item_tokens)
+
+    def single_key(self, hadith):
+        return cache_key(self.provider.model, prompts.messages(self.single_prompt(hadith)), TEMPERATURE, None, METHODOLOGY)
+
+    def enrich(self, hadith):
+        raw, k = self.complete(self.single_prompt(hadith), self.budget.max_tokens(1))
+        return self.parsed(raw, k, prompts.parse_json) if raw is not None else None
+
+    def gated(self, hadiths, got):
+        # Drop answers that fail the quality gate; returns {hadith_id: problems}
+        with self.metrics.time("gate"):
+            bad = self.gate.check([(h, got[h["id"]]) for h in hadiths if h["id"] in got])
+        for hid in bad:
+            del got[hid]
+        return bad
+
+    def enrich_many(self, chunk):
+        # One request for the whole chunk; items that come back missing,
+        # malformed or failing the quality gate are retried one at a time.
+        # Returns ({hadith_id: answer or None}, {hadith_id: problems}) where
+        # problems lists the gate failures of the final attempt.
+        cache = self.cache
+        got = {}
+        if cache is not None:
+            # Items answered by an earlier run (alone or in another batch) are
+            # stored under their single-hadith key, so chunk composition can change.
+            for h in chunk:
+                hit = cache.get(self.single_key(h))
+                if hit is not None:
+                    try:
+                        got[h["id"]] = prompts.parse_json(hit)
+                    except ValueError:
+                        cache.delete(self.single_key(h))
+            stale = self.gated(chunk, got)
+            for h in chunk:
+                if h["id"] in stale:
+                    cache.delete(self.single_key(h))
+        todo = [h for h in chunk if h["id"] not in got]
+        if len(todo) > 1:
+            prompt = prompts.batch_prompt(todo, self.tax.category_slugs, self.tax.tag_slugs, self.budget.item_tokens)
+            raw, k = self.complete(prompt, self.budget.max_tokens(len(todo)), len(todo))
+            with self.metrics.time("parse"):
+                items = prompts.parse_batch(raw, todo) if raw is not None else {}
+            # A batch answer with rejected items must not be replayed from the cache
+            if raw is not None and (not items or self.gated(todo, items)) and cache is not None:
+                cache.delete(k)
+            for h in todo:
+                if h["id"] in items and cache is not None:
+                    cache.put(self.single_key(h), json.dumps(items[h["id"]], ensure_ascii=False), self.provider.model)
+            got.update(items)
+        problems = {}
+        for h in todo:
+            if h["id"] not in got:
+                try:
+                    got[h["id"]] = self.enrich(h)
+                except ValueError:
+                    got[h["id"]] = None
+                    continue
+                if got[h["id"]] is not None:
+                    bad = self.gated([h], got)
+                    if bad:
+                        problems.update(bad)
+                        got[h["id"]] = None
+                        if cache is not None:
+                            cache.delete(self.single_key(h))
+        return got, problems
+
+    def normalise(self, h, r):
+        # Turn one gated LLM answer into an insert_enrichments_bulk row. Slugs and
+        # aliases are resolved here, so the RPC gets ids and skips its lookups.
+        # The gate has already checked lengths, category and tags: nothing is
+        # cut or replaced with a fallback.
+        tags = list(dict.fromkeys(self.tax.tag(t) for t in r["tag_slugs"]))
+        return {
+            "hadith_id": h["id"],
+            "summary_line": r["summary_line"].strip(),
+            "summary_ar": r["summary_ar"].strip(),
+            "key_teaching_en": r["key_teaching_en"].strip(),
+            "key_teaching_ar": r["key_teaching_ar"].strip(),
+            "category_slug": r["category_slug"],
+            "category_id": self.tax.categories[r["category_slug"]],
+            "tag_slugs": tags,
+            "tag_ids": self.tax.tag_ids(tags),
+            "status": "published",
+            "confidence": min(1.0, max(0.0, float(r.get("confidence", 0.8)))),
+            "rationale": f"Auto-enriched via {self.provider.name} {self.provider.model}",
+            "suggested_by": self.provider.label,
+            "methodology_version": METHODOLOGY,
+        }
+
+    # --- pipeline stages ------------------------------------------------------
+
+    def claim(self, n):
+        with self.metrics.time("fetch"):
+            return self.rpc("claim_unenriched_hadiths", dict(claim_body(self.worker, n), **self.cursor.params())) or []
+
+    def fetch(self):
+        # Stage 1: resumed hadiths, then claims from the lease queue until the run
+        # budget is used, packed into LLM-request-sized chunks by token budget
+        batch, cursor = self.args.batch, self.cursor
+        total = len(self.resume_hadiths)
+        yield from self.budget.pack(self.resume_hadiths)
+        wrapped = False
+        while not batch or total < batch:
+            n = self.args.claim if not batch else min(self.args.claim, batch - total)
+            rows = self.claim(n)
+            if not rows and cursor.started and not wrapped:
+                # Reached the end of the corpus: wrap around to pick up released/failed rows
+                cursor.reset()
+                wrapped = True
+                rows = self.claim(n)
+            if not rows:
+                break
+            cursor.advance(rows)
+            cursor.save()
+            for h in rows:
+                self.journal.record(h["id"], "claimed", hadith=h, worker=self.worker)
+            total += len(rows)
+            yield from self.budget.pack(rows)
+
+    def llm(self, chunk):
+        # Stage 2: one (batched) LLM request per chunk, gated per item
+        got, problems = self.enrich_many(chunk)
+        return [(h, got.get(h["id"]), problems.get(h["id"])) for h in chunk]
+
+    def validate(self, item):
+        # Stage 3: turn gated LLM answers into rows; rejected ones go back to the queue
+        h, r, problems = item
+        if problems:
+            for p in problems:
+                self.metrics.inc("rejected", reason=p)
+            with self.lock:
+                self.fail += 1
+            self.journal.record(h["id"], "rejected", hadith=h, problems=problems)
+            self.reject(h["id"], problems)
+            print(f"[{self.ok + self.fail}] {h['id'][:8]}... REJECT: {', '.join(problems)}")
+            return []
+        try:
+            if not r:
+                raise ValueError("no AI response")
+            row = self.normalise(h, r)
+        except (ValueError, TypeError) as ex:
+            self.metrics.inc("errors", stage="validate", cls="invalid")
+            with self.lock:
+                self.fail += 1
+            self.journal.record(h["id"], "failed", error=str(ex)[:200])
+            print(f"[{self.ok + self.fail}] {h['id'][:8]}... SKIP: {ex}")
+            return []
+        with self.lock:
+            self.ok += 1
+        self.journal.record(h["id"], "llm_done", row=row)
+        print(f"[{self.ok + self.fail}] {h['id'][:8]}... OK: {(r.get('summary_line') or '?')[:50]}")
+        return [row]
+
+    def flushed(self, good, bad, skipped=()):
+        # The bulk RPC writes the enrichment and its tag links in one statement
+        ids = [r["hadith_id"] for r in good]
+        self.metrics.done(len(good))
+        self.metrics.inc("tags", sum(len(r["tag_slugs"]) for r in good))
+        self.journal.record_many(ids, "db_written")
+        self.journal.record_many(ids, "tags_written")
+        for r in bad:
+            self.journal.record(r["hadith_id"], "write_failed", row=r)
+        if skipped:
+            # Already reviewed or published in the DB; the existing row stays
+            self.metrics.inc("skipped", len(skipped))
+            self.journal.record_many([r["hadith_id"] for r in skipped], "skipped")
+        print(f"  wrote {len(good)} enrichments" + (f", {len(bad)} failed" if bad else "")
+              + (f", {len(skipped)} already enriched" if skipped else ""))
+        if ids and self.propagate:
+            self.share(ids)
+
+    def share(self, ids):
+        # Copy fresh enrichments to the near-duplicates these hadiths represent (119)
+        try:
+            n = self.db_policy.call(self.sb.rpc, "propagate_cluster_enrichments", {"p_representative_ids": ids})
+        except client.HTTPError as e:
+            if e.status == 404:
+                # Database without hadith_clusters: nothing to share
+                self.propagate = False
+                return
+            self.metrics.error("db", e)
+            print(f"  propagate failed: HTTP {e.status}: {e.body[:200]}")
+            return
+        if n:
+            self.metrics.inc("propagated", n)
+            print(f"  shared with {n} near-duplicate hadiths")
+
+    def reject(self, hadith_id, problems):
+        # Count rejections in the database (119) so the claim queue can hand a
+        # cluster to another member once its representative keeps failing
+        if not self.track_rejections:
+            return
+        try:
+            self.db_policy.call(self.sb.rpc, "record_enrichment_rejection",
+                                {"p_hadith_id": hadith_id, "p_problems": problems})
+        except client.HTTPError as e:
+            if e.status == 404:
+                # Database without enrichment_rejections: the journal still has them
+                self.track_rejections = False
+                return
+            self.metrics.error("db", e)
+            print(f"  recording rejection failed: HTTP {e.status}: {e.body[:200]}")
+
+    def write_rpc(self, fn, body):
+        # Enrichment rows and their tag links go in the same statement, so this
+        # one timing covers both the DB write and the tag write
+        with self.metrics.time("db_write"):
+            return self.rpc(fn, body)
+
+    def write(self, row):
+        # Stage 4: buffer into bulk inserts
+        self.writer.add(row)
+
+    def stage_error(self, stage, item, ex):
+        print(f"  {stage} error: {ex}")
+        self.metrics.error(stage, ex)
+        if stage == "llm":
+            for h in item:
+                self.journal.record(h["id"], "failed", error=str(ex)[:200])
+            with self.lock:
+                self.fail += len(item)
+
+    # --- run ------------------------------------------------------------------
+
+    def reclaim(self, rows, hadiths):
+        # Resumed work goes through the lease queue like fresh claims (123): hadiths
+        # enriched since the last run, or leased by another live worker, are dropped
+        ids = list(dict.fromkeys([r["hadith_id"] for r in rows] + [h["id"] for h in hadiths]))
+        if not ids:
+            return rows, hadiths
+        body = {"p_worker_id": self.worker, "p_ids": ids, "lease_seconds": LEASE_SECONDS,
+                "p_previous_workers": previous_workers(self.journal_path)}
+        try:
+            with self.metrics.time("fetch"):
+                got = self.db_policy.call(self.sb.rpc, "claim_hadiths_by_id", body) or []
+        except client.HTTPError as e:
+            if e.status == 404:
+                print("  claim_hadiths_by_id missing (run 123): resuming without leases")
+                return rows, hadiths
+            self.metrics.error("db", e)
+            print(f"  resume claim failed, leaving the journal for the next run: HTTP {e.status}: {e.body[:200]}")
+            return [], []
+        fresh = {h["id"]: h for h in got}
+        dropped = [i for i in ids if i not in fresh]
+        self.journal.record_many(dropped, "dropped")
+        hadiths = [fresh[h["id"]] for h in hadiths if h["id"] in fresh]
+        for h in hadiths:
+            self.journal.record(h["id"], "claimed", hadith=h, worker=self.worker)
+        if dropped:
+            print(f"Resume: dropped {len(dropped)} hadiths enriched or leased elsewhere since the last run")
+        return [r for r in rows if r["hadith_id"] in fresh], hadiths
+
+    def remaining(self):
+        # What the claim queue can still hand out (124), not every unenriched hadith:
+        # short translations, covered cluster members and exhausted rejections are never claimed
+        try:
+            return self.db_policy.call(self.sb.rpc, "count_claimable_hadiths", {})
+        except client.HTTPError as e:
+            if e.status != 404:
+                raise
+        return self.db_policy.call(self.sb.count, "hadiths?enriched_at=is.null")
+
+    def setup_metrics(self):
+        # Per-stage timings (fetch, llm, parse, gate, db_write), tokens, error classes
+        # and an ETA from the live count of claimable hadiths
+        m, args = self.metrics, self.args
+        m.gauge("llm_rate", lambda: round(self.limiter.rate, 3))
+        m.gauge("llm_retries", lambda: self.llm_policy.retries)
+        m.gauge("db_retries", lambda: self.db_policy.retries)
+        m.gauge("output_tokens_p95", self.budget.per_item)
+        m.watch_remaining(self.remaining)
+        if args.metrics_port:
+            m.serve(args.metrics_port)
+            print(f"Metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+        if args.report:
+            m.dump_every(args.report, args.metrics_file, out=sys.stdout)
+
+    def run(self):
+        args = self.args
+        print(f"Starting enrichment via {self.provider.name} ({self.provider.model})...")
+        self.tax = taxonomy.load(
+            lambda path: self.db_policy.call(self.sb.get, path),
+            lambda fn, body: self.db_policy.call(self.sb.rpc, fn, body),
+        )
+        print(f"Taxonomy v{self.tax.version or '?'}: {len(self.tax.categories)} categories, {len(self.tax.tags)} tags, {len(self.tax.aliases)} aliases")
+        self.gate = quality.Gate(self.tax)
+        self.setup_metrics()
+
+        # Unfinished work from a previous (crashed or killed) run comes first
+        self.journal = Journal(self.journal_path)
+        resume_rows, self.resume_hadiths = ([], []) if args.no_resume else self.reclaim(*pending(self.journal_path))
+        if resume_rows or self.resume_hadiths:
+            print(f"Resuming: {len(resume_rows)} rows to write, {len(self.resume_hadiths)} hadiths to re-run")
+        print(f"Worker {self.worker}: {args.workers} LLM workers at {args.rps or 'unlimited'} req/s, up to {self.budget.capacity()} hadiths / {args.prompt_tokens} tokens per request")
+
+        self.writer = BatchWriter(self.write_rpc, size=args.write_batch, on_flush=self.flushed)
+        pipe = Pipeline(report_every=args.report, on_error=self.stage_error)
+        pipe.source("fetch", self.fetch, maxsize=args.queue)
+        pipe.stage("llm", self.llm, workers=args.workers, maxsize=args.queue)
+        pipe.stage("validate", self.validate, maxsize=args.queue)
+        pipe.stage("write", self.write)
+
+        try:
+            for row in resume_rows:
+                self.writer.add(row)
+            pipe.run()
+            self.writer.close()
+        finally:
+            # Hand back anything we did not finish so other workers can pick it up
+            self.rpc("release_hadith_leases", {"p_worker_id": self.worker})
+            self.journal.close()
+            self.slot.release()
+            self.budget.save()
+
+        print(f"  [pipeline] {pipe.format()}")
+        print(f"  [metrics] {self.metrics.format()}")
+        print(f"  [budget] {self.budget.format()}")
+        if args.metrics_file:
+            self.metrics.dump(args.metrics_file)
+        print(f"\n=== DONE: {self.ok} enriched, {self.fail} failed, {self.writer.written} written, {self.writer.failed} write errors ===")
+        print(f"Retries: {self.llm_policy.retries} LLM, {self.db_policy.retries} DB; final rate {self.limiter.rate:.2f} req/s")
+        if self.cache is not None:
+            print(f"LLM cache: {self.cache.hits} hits, {self.cache.misses} misses")
+        return self.writer.failed == 0
@@ -0,0 +1,410 @@
+import heapq, json, math, mmap, os, re, sys, threading, time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from enrichment import arabic, translation
+
+# BM25 full-text index over the hadith corpus, kept on disk under
+# scripts/.enrich_search/ and served by scripts/search_service.py.
+#
+# A document is one hadith: English text (translation, narrator, summary line
+# and key teaching) through the English analyzer, plus arabic_text through the
+# Arabic one (arabic.stems). Both land in one term space; the two scripts never
+# share tokens.
+#
+# The index is a list of immutable segments. Each segment is a JSON header
+# (doc ids, filter fields, lengths, term -> [offset, df]) plus a binary file of
+# postings: for each term, df uint32 doc ordinals then df uint16 term
+# frequencies, read through mmap. Refreshes write a small new segment with the
+# changed hadiths; a hadith in a newer segment hides its older copies. Hadiths
+# deleted upstream are listed in the manifest ("deleted") and masked until
+# compact() merges everything back into one segment without them.
+
+DEFAULT_DIR = os.environ.get("ENRICH_SEARCH_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_search"))
+
+K1 = 1.2
+B = 0.75
+COMMON = 0.05  # terms in more than this share of documents score candidates only
+FILTERS = ("collection", "grade", "category", "tags")
+
+_WORD = re.compile(r"[a-z0-9]+")
+_ARABIC = re.compile(r"[\u0600-\u06ff]")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by did do does for from had has have he her him his i if in into is it its
+me my no not of on or our she so than that the their them then there these they this those to upon us was
+we were what when which who whom will with would you your
+narrated said reported
+""".split())
+
+
+def english_stem(w):
+    """Light suffix stripping (Porter step 1 and the common derivational endings)."""
+    if len(w) <= 3 or w.isdigit():
+        return w
+    if w.endswith("sses"):
+        w = w[:-2]
+    elif w.endswith("ies") and len(w) > 4:
+        w = w[:-3] + "y"
+    elif w.endswith("s") and not w.endswith(("ss", "us", "is")):
+        w = w[:-1]
+    for suf, rep in (("ational", "ate"), ("fulness", "ful"), ("iveness", "ive"), ("ousness", "ous"),
+                     ("ization", "ize"), ("ation", "ate"), ("ness", ""), ("ment", ""), ("ingly", ""),
+                     ("edly", ""), ("ing", ""), ("ed", ""), ("ly", "")):
+        if w.endswith(suf) and len(w) - len(suf) >= 3:
+            w = w[:-len(suf)] + rep
+            if suf in ("ing", "ed", "ingly", "edly") and len(w) > 3 and w[-1] == w[-2] and w[-1] not in "lsz":
+                w = w[:-1]  # running -> run
+            break
+    return w
+
+
+def english_terms(text):
+    return [english_stem(w) for w in _WORD.findall((text or "").lower()) if w not in STOPWORDS]
+
+
+def analyze(text):
+    """Query/document terms: Arabic tokens light-stemmed, the rest English-stemmed."""
+    if not text:
+        return []
+    if _ARABIC.search(text):
+        # arabic.stems keeps Latin letters and digits; those go through the English analyzer
+        return [t for t in arabic.stems(text) if _ARABIC.match(t)] + english_terms(_ARABIC.sub(" ", text))
+    return english_terms(text)
+
+
+def documents(hadiths, enrichments=(), weights=(), tags=(), category_slugs=None, tag_slugs=None):
+    """Join hadith rows with their published enrichment and tags into index docs.
+
+    category_slugs / tag_slugs map ids to slugs (Taxonomy rows inverted).
+    """
+    category_slugs = category_slugs or {}
+    tag_slugs = tag_slugs or {}
+    enr = {e["hadith_id"]: e for e in enrichments if e.get("status") == "published"}
+    tagged = defaultdict(set)
+    for w in weights:
+        tagged[w["hadith_id"]].add(w["tag_id"])
+    for t in tags:
+        if t.get("status") == "published":
+            tagged[t["hadith_id"]].add(t["tag_id"])
+    for h in hadiths:
+        e = enr.get(h["id"]) or {}
+        narrator, text = translation.split(h.get("english_translation"))
+        yield {
+            "id": h["id"],
+            "collection": h.get("collection") or "",
+            "grade": (h.get("grade") or "").lower(),
+            "category": category_slugs.get(e.get("category_id"), ""),
+            "tags": sorted(tag_slugs[t] for t in tagged.get(h["id"], ()) if t in tag_slugs),
+            # The summary line is short and chosen to name the topic: count it twice
+            "text": " ".join(filter(None, (
+                text, h.get("narrator") or narrator,
+                e.get("summary_line"), e.get("summary_line"), e.get("key_teaching_en"),
+                h.get("arabic_text"),
+            ))),
+        }
+
+
+def _has(docs, o):
+    k = bisect_left(docs, o)
+    return k < len(docs) and docs[k] == o
+
+
+class Segment:
+    def __init__(self, directory, name):
+        self.name = name
+        with open(os.path.join(directory, name + ".json")) as f:
+            d = json.load(f)
+        self.ids = d["ids"]
+        self.fields = d["fields"]
+        self.lengths = d["lengths"]
+        self.terms = d["terms"]
+        self.swap = d.get("byteorder", sys.byteorder) != sys.byteorder
+        self.file = open(os.path.join(directory, name + ".bin"), "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(self.file.name) else b""
+        self.dead = set()  # ordinals superseded by a newer segment
+        # field -> value -> set of ordinals, for filters
+        self.by = {}
+        for f in FILTERS:
+            idx = defaultdict(set)
+            for i, v in enumerate(self.fields[f]):
+                for x in (v if isinstance(v, list) else [v]):
+                    idx[x].add(i)
+            self.by[f] = idx
+
+    def postings(self, term):
+        entry = self.terms.get(term)
+        if entry is None:
+            return (), ()
+        off, df = entry
+        docs, tfs = array("I"), array("H")
+        docs.frombytes(self.mm[off:off + 4 * df])
+        tfs.frombytes(self.mm[off + 4 * df:off + 6 * df])
+        if self.swap:
+            docs.byteswap()
+            tfs.byteswap()
+        return docs, tfs
+
+    def close(self):
+        if not isinstance(self.mm, bytes):
+            self.mm.close()
+        self.file.close()
+
+
+def write_segment(directory, name, docs):
+    """Write docs (from documents()) as a new segment. Returns the doc count."""
+    ids, lengths, postings = [], [], defaultdict(list)
+    fields = {f: [] for f in FILTERS}
+    for d in docs:
+        terms = Counter(analyze(d["text"]))
+        o = len(ids)
+        ids.append(d["id"])
+        lengths.append(sum(terms.values()))
+        for f in FILTERS:
+            fields[f].append(d.get(f) or ([] if f == "tags" else ""))
+        for t, n in terms.items():
+            postings[t].append((o, min(n, 65535)))
+    _write(directory, name, ids, fields, lengths, postings)
+    return len(ids)
+
+
+def _write(directory, name, ids, fields, lengths, postings):
+    os.makedirs(directory, exist_ok=True)
+    term_index = {}
+    tmp = os.path.join(directory, name + ".bin.tmp")
+    with open(tmp, "wb") as f:
+        for t in sorted(postings):
+            plist = postings[t]
+            term_index[t] = [f.tell(), len(plist)]
+            array("I", (o for o, _ in plist)).tofile(f)
+            array("H", (n for _, n in plist)).tofile(f)
+    os.replace(tmp, os.path.join(directory, name + ".bin"))
+    tmp = os.path.join(directory, name + ".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"ids": ids, "fields": fields, "lengths": lengths, "terms": term_index, "byteorder": sys.byteorder}, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(directory, name + ".json"))
+
+
+def load_manifest(directory=DEFAULT_DIR):
+    p = os.path.join(directory, "manifest.json")
+    if not os.path.exists(p):
+        return {"segments": [], "marks": {}, "at_mark": {}, "deleted": []}
+    with open(p) as f:
+        return json.load(f)
+
+
+def save_manifest(m, directory=DEFAULT_DIR):
+    p = os.path.join(directory, "manifest.json")
+    with open(p + ".tmp", "w") as f:
+        json.dump(m, f, indent=2)
+    os.replace(p + ".tmp", p)
+
+
+def next_segment(manifest):
+    return "seg-%06d" % (max([int(s[4:]) for s in manifest["segments"]] or [0]) + 1)
+
+
+class Index:
+    """Read-only view over the manifest's segments. Thread-safe for search()."""
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self.manifest = load_manifest(directory)
+        self.segments = [Segment(directory, s) for s in self.manifest["segments"]]
+        # Newest copy of each hadith wins; older ones and deleted hadiths are masked out
+        seen, deleted = set(), set(self.manifest.get("deleted") or ())
+        for seg in reversed(self.segments):
+            for o, i in enumerate(seg.ids):
+                if i in seen or i in deleted:
+                    seg.dead.add(o)
+                else:
+                    seen.add(i)
+        self.n = len(seen)
+        total = sum(sum(seg.lengths) - sum(seg.lengths[o] for o in seg.dead) for seg in self.segments)
+        self.avgdl = total / self.n if self.n else 1.0
+        # BM25 length normalisation per document, precomputed once
+        for seg in self.segments:
+            seg.norm = [K1 * (1 - B + B * dl / self.avgdl) for dl in seg.lengths]
+        self.loaded_at = time.time()
+
+    def _allowed(self, seg, filters):
+        allowed = None
+        for f, v in filters.items():
+            if not v:
+                continue
+            s = seg.by[f].get(v.lower() if f == "grade" else v, set())
+            allowed = s if allowed is None else allowed & s
+        return allowed
+
+    def search(self, query, limit=20, offset=0, **filters):
+        """Returns (matches, [(hadith_id, score), ...]) ranked by BM25.
+
+        filters: collection, grade, category, tags (one value each).
+
+        Terms are scored rarest first. Once a rarer term has matched, a term in
+        more than COMMON of the corpus only adds to those candidates (bisecting
+        its postings) instead of walking its whole posting list, so queries that
+        mix rare and very frequent words stay fast. Documents matching nothing
+        but such frequent words are then not returned.
+        """
+        terms = list(dict.fromkeys(analyze(query)))
+        if not terms or not self.n:
+            return 0, []
+        segs = self.segments
+        allowed = [self._allowed(seg, filters) for seg in segs]
+        plists = []
+        for t in terms:
+            found = [seg.postings(t) for seg in segs]
+            # idf from the whole live corpus, not the filtered subset
+            df = sum(len(docs) - sum(_has(docs, o) for o in seg.dead) for seg, (docs, _) in zip(segs, found))
+            if df:
+                plists.append((df, found))
+        plists.sort(key=lambda p: p[0])
+
+        # Dense per-segment accumulators; rare-term matches become the candidates
+        acc = [[0.0] * len(seg.ids) for seg in segs]
+        cand = [set() for _ in segs]
+        common = COMMON * self.n
+        for df, found in plists:
+            w = math.log(1 + (self.n - df + 0.5) / (df + 0.5)) * (K1 + 1)
+            restrict = df > common and any(cand)
+            for si, (docs, tfs) in enumerate(found):
+                if not docs:
+                    continue
+                a, norm = acc[si], segs[si].norm
+                pool = cand[si] if restrict else allowed[si]
+                if pool is not None and len(pool) * 4 < len(docs):
+                    # Few documents can match: bisect for each instead of a full walk
+                    hit = []
+                    for o in pool:
+                        k = bisect_left(docs, o)
+                        if k < len(docs) and docs[k] == o:
+                            n = tfs[k]
+                            a[o] += w * n / (n + norm[o])
+                            hit.append(o)
+                elif pool is None:
+                    for o, n in zip(docs, tfs):
+                        a[o] += w * n / (n + norm[o])
+                    hit = docs
+                else:
+                    hit = []
+                    for o, n in zip(docs, tfs):
+                        if o in pool:
+                            a[o] += w * n / (n + norm[o])
+                            hit.append(o)
+                if not restrict and df <= common:
+                    cand[si].update(hit)
+
+        k = offset + limit
+        ranked, matches = [], 0
+        for si, a in enumerate(acc):
+            for o in segs[si].dead:
+                a[o] = 0.0
+            matches += len(a) - a.count(0.0)
+            ranked.extend((a[o], si, o) for o in heapq.nlargest(k, range(len(a)), key=a.__getitem__) if a[o])
+        ranked = heapq.nlargest(k, ranked)[offset:]
+        return matches, [(segs[si].ids[o], round(v, 4)) for v, si, o in ranked]
+
+    def close(self):
+        for seg in self.segments:
+            seg.close()
+
+
+def rebuild(directory, docs, marks=None, at_mark=None):
+    """Replace the whole index with one segment of docs.
+
+    marks is the refresh watermark per table, at_mark the ids of the rows that
+    carry it (already indexed, so a refresh reading from the mark can skip them).
+    """
+    manifest = load_manifest(directory)
+    old = manifest["segments"]
+    name = next_segment(manifest)
+    n = write_segment(directory, name, docs)
+    save_manifest({"segments": [name], "marks": marks or {}, "at_mark": at_mark or {}, "deleted": []}, directory)
+    _remove(directory, old)
+    return n
+
+
+def add(directory, docs, marks=None, at_mark=None, deleted=()):
+    """Append docs as a new segment, mask deleted ids and record the refresh watermarks."""
+    manifest = load_manifest(directory)
+    docs = list(docs)
+    name = next_segment(manifest)
+    n = write_segment(directory, name, docs)
+    if n:
+        manifest["segments"].append(name)
+    else:
+        _remove(directory, [name])
+    # A re-indexed id is live again
+    manifest["deleted"] = sorted((set(manifest.get("deleted") or ()) | set(deleted)) - {d["id"] for d in docs})
+    manifest["marks"].update(marks or {})
+    manifest.setdefault("at_mark", {}).update(at_mark or {})
+    save_manifest(manifest, directory)
+    return n
+
+
+def compact(directory=DEFAULT_DIR):
+    """Merge all segments into one, dropping hidden (superseded or deleted) documents."""
+    index = Index(directory)
+    if len(index.segments) <= 1 and not index.manifest.get("deleted"):
+        index.close()
+        return len(index.segments)
+    ids, lengths, postings = [], [], defaultdict(list)
+    fields = {f: [] for f in FILTERS}
+    remap = []
+    for seg in index.segments:
+        m = {}
+        for o in range(len(seg.ids)):
+            if o not in seg.dead:
+                m[o] = len(ids)
+                ids.append(seg.ids[o])
+                lengths.append(seg.lengths[o])
+                for f in FILTERS:
+                    fields[f].append(seg.fields[f][o])
+        remap.append(m)
+    for seg, m in zip(index.segments, remap):
+        for t in seg.terms:
+            docs, tfs = seg.postings(t)
+            postings[t].extend((m[o], n) for o, n in zip(docs, tfs) if o in m)
+    manifest = index.manifest
+    name = next_segment(manifest)
+    _write(directory, name, ids, fields, lengths, postings)
+    old = manifest["segments"]
+    manifest["segments"] = [name]
+    manifest["deleted"] = []
+    save_manifest(manifest, directory)
+    index.close()
+    _remove(directory, old)
+    return len(old)
+
+
+def _remove(directory, names):
+    # A running Searcher may still have these mapped; that is fine on POSIX
+    for s in names:
+        for ext in (".json", ".bin"):
+            try:
+                os.remove(os.path.join(directory, s + ext))
+            except OSError:
+                pass
+
+
+class Searcher:
+    """Holds the current Index and swaps in a fresh one after updates."""
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.index = Index(directory)
+
+    def reload(self):
+        # In-flight searches keep their reference to the old Index; its mmaps
+        # close when it is garbage collected
+        fresh = Index(self.directory)
+        with self.lock:
+            self.index = fresh
+
+    def search(self, *a, **kw):
+        with self.lock:
+            index = self.index
+        return index.search(*a, **kw)
@@ -0,0 +1,83 @@
+import glob, os, re
+
+try:
+    import fcntl
+except ImportError:  # Windows: slots are not locked, set ENRICH_WORKER_ID per process
+    fcntl = None
+
+# Per-process slots for enrichment run state on one host (cursor, journal).
+#
+# A slot names the state files: .enrich_cursor.<slot>.json, .enrich_journal.<slot>.jsonl.
+# With ENRICH_WORKER_ID set the slot is that id; otherwise each process takes
+# the first numbered slot (0, 1, ...) not flock-ed by another process. The lock
+# is held until the process exits, so two live runs never share state files,
+# and a later run takes over a free slot and resumes what it left unfinished.
+# Everything in a free slot's journal belonged to a process that has exited.
+
+
+def path_for(base, name):
+    root, ext = os.path.splitext(base)
+    return f"{root}.{name}{ext}"
+
+
+def _lock(path):
+    # Open file holding an exclusive lock on path, or None when another process has it
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class Slot:
+    def __init__(self, base, worker=None):
+        # base: the unslotted state file the lock files sit next to
+        self.base = base
+        self.lock = None
+        worker = worker if worker is not None else os.environ.get("ENRICH_WORKER_ID")
+        if worker:
+            self.name = re.sub(r"[^A-Za-z0-9_-]", "_", worker)
+            if fcntl is not None:
+                self.lock = _lock(path_for(base, self.name) + ".lock")
+                if self.lock is None:
+                    raise SystemExit(f"Another run is using ENRICH_WORKER_ID={worker}")
+        elif fcntl is None:
+            self.name = str(os.getpid())
+        else:
+            i = 0
+            while self.lock is None:
+                self.name = str(i)
+                self.lock = _lock(path_for(base, self.name) + ".lock")
+                i += 1
+
+    def path(self, base):
+        return path_for(base, self.name)
+
+    def release(self):
+        if self.lock is not None:
+            self.lock.close()
+            self.lock = None
+
+
+def live(base, name):
+    """True while another process holds the slot."""
+    if fcntl is None:
+        return False
+    f = _lock(path_for(base, name) + ".lock")
+    if f is None:
+        return True
+    f.close()
+    return False
+
+
+def names(path):
+    """Slot names that have a state file for path (e.g. every slotted journal)."""
+    root, ext = os.path.splitext(path)
+    out = []
+    for p in sorted(glob.glob(glob.escape(root) + ".*" + glob.escape(ext))):
+        name = p[len(root) + 1:len(p) - len(ext)]
+        if name and "." not in name:
+            out.append(name)
+    return out
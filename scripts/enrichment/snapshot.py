@@ -0,0 +1,184 @@
+import gzip, json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+# Local columnar snapshot of the corpus tables.
+# Each table is read by N parallel workers, each keyset-paging its own slice of
+# the uuid space, and written as one compressed file under DEFAULT_DIR:
+#
+#   parquet  zstd-compressed, smallest on disk (default)
+#   arrow    Arrow IPC/Feather (lz4), memory-mappable by load()
+#   jsonl    gzip JSONL, used when pyarrow is not installed
+#
+# manifest.json records each table's high-water mark so refresh() only pulls
+# rows changed since the last export. Deletes are not seen by a refresh; run a
+# full export to drop them.
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DEFAULT_DIR = os.environ.get("ENRICH_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_snapshot"))
+
+# table -> column used as the refresh high-water mark
+TABLES = {
+    "hadiths": "updated_at",
+    "hadith_enrichment": "updated_at",
+    "hadith_tags": "updated_at",
+    "hadith_tag_weights": "updated_at",
+}
+
+EXT = {"parquet": ".parquet", "arrow": ".arrow", "jsonl": ".jsonl.gz"}
+
+
+def uuid_ranges(n):
+    """Split the uuid space into n [lo, hi) slices on the leading 32 bits."""
+    n = max(1, n)
+    step = (1 << 32) // n
+    bounds = [f"{i * step:08x}-0000-0000-0000-000000000000" for i in range(1, n)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def read_range(get, table, lo, hi, page=1000, mark=None, since=None):
+    """Keyset-page one uuid slice of a table. Yields lists of rows."""
+    base = f"{table}?select=*&order=id.asc&limit={page}"
+    if hi is not None:
+        base += f"&id=lt.{hi}"
+    if since is not None:
+        base += f"&{mark}=gte.{quote(since)}"
+    last = None
+    while True:
+        q = base
+        if last is not None:
+            q += f"&id=gt.{last}"
+        elif lo is not None:
+            q += f"&id=gte.{lo}"
+        rows = get(q)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page:
+            return
+        last = rows[-1]["id"]
+
+
+def read_table(get, table, workers=4, page=1000, since=None, progress=None):
+    mark = TABLES.get(table)
+
+    def one(rng):
+        out = []
+        for rows in read_range(get, table, rng[0], rng[1], page, mark, since):
+            out.extend(rows)
+            if progress is not None:
+                progress(table, len(rows))
+        return out
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        for part in ex.map(one, uuid_ranges(workers)):
+            rows.extend(part)
+    return rows
+
+
+def default_format():
+    return "parquet" if pa is not None else "jsonl"
+
+
+def path_for(table, fmt, directory=DEFAULT_DIR):
+    return os.path.join(directory, table + EXT[fmt])
+
+
+def write(path, rows, fmt):
+    tmp = path + ".tmp"
+    if fmt == "jsonl":
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    else:
+        if pa is None:
+            raise RuntimeError(f"{fmt} snapshots need pyarrow (pip install pyarrow)")
+        t = pa.Table.from_pylist(rows)
+        if fmt == "parquet":
+            pq.write_table(t, tmp, compression="zstd")
+        else:
+            feather.write_feather(t, tmp, compression="lz4")
+    os.replace(tmp, path)
+
+
+def read(path, fmt, memory_map=True):
+    """Load a snapshot file: a pyarrow Table, or a list of dicts for jsonl."""
+    if fmt == "jsonl":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    if fmt == "parquet":
+        return pq.read_table(path, memory_map=memory_map)
+    return feather.read_table(path, memory_map=memory_map)
+
+
+def rows_of(data):
+    return data if isinstance(data, list) else data.to_pylist()
+
+
+def load_manifest(directory=DEFAULT_DIR):
+    p = os.path.join(directory, "manifest.json")
+    if not os.path.exists(p):
+        return {}
+    with open(p) as f:
+        return json.load(f)
+
+
+def save_manifest(m, directory=DEFAULT_DIR):
+    p = os.path.join(directory, "manifest.json")
+    with open(p + ".tmp", "w") as f:
+        json.dump(m, f, indent=2)
+    os.replace(p + ".tmp", p)
+
+
+def load(table, directory=DEFAULT_DIR, memory_map=True):
+    """Open a table from the last export, e.g. load("hadiths")."""
+    entry = load_manifest(directory).get(table)
+    if entry is None:
+        raise FileNotFoundError(f"{table} is not in the snapshot at {directory}")
+    return read(os.path.join(directory, entry["file"]), entry["format"], memory_map)
+
+
+def export(get, table, directory=DEFAULT_DIR, fmt=None, workers=4, page=1000, full=False, progress=None):
+    """Export or refresh one table. Returns (rows in snapshot, rows fetched)."""
+    fmt = fmt or default_format()
+    os.makedirs(directory, exist_ok=True)
+    manifest = load_manifest(directory)
+    entry = manifest.get(table)
+    mark = TABLES.get(table)
+    since = None
+    if not full and entry and entry.get("format") == fmt and entry.get("mark") and mark:
+        since = entry["mark"]
+
+    fetched = read_table(get, table, workers, page, since, progress)
+    rows = fetched
+    if since is not None:
+        # Changed rows replace their old versions by id
+        merged = {r["id"]: r for r in rows_of(read(os.path.join(directory, entry["file"]), fmt, False))}
+        for r in fetched:
+            merged[r["id"]] = r
+        rows = list(merged.values())
+
+    high = entry.get("mark") if since is not None else None
+    for r in fetched:
+        v = r.get(mark) if mark else None
+        if v and (high is None or v > high):
+            high = v
+
+    path = path_for(table, fmt, directory)
+    write(path, rows, fmt)
+    manifest[table] = {
+        "file": os.path.basename(path),
+        "format": fmt,
+        "rows": len(rows),
+        "mark": high,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    save_manifest(manifest, directory)
+    return len(rows), len(fetched)
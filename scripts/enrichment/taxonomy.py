@@ -0,0 +1,98 @@
+import json, os
+
+from enrichment.client import HTTPError
+
+# Category / tag vocabulary for prompts and row validation, loaded from the DB
+# once per run instead of the hard-coded uuid dicts the old scripts carried.
+#
+# The vocabulary is cached in scripts/.enrich_taxonomy.json together with the
+# DB's taxonomy_version (118). At startup only get_taxonomy_version() is called;
+# the full download happens when the version moved. Slugs and aliases are then
+# resolved in memory and rows go to insert_enrichments_bulk with ids.
+
+DEFAULT_PATH = os.environ.get("ENRICH_TAXONOMY_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".enrich_taxonomy.json"))
+
+FALLBACK_CATEGORY = "daily-life"
+
+
+class Taxonomy:
+    def __init__(self, categories, tags, aliases=(), version=None):
+        """categories/tags: rows with id, slug; aliases: rows with alias_slug, tag_id."""
+        self.version = version
+        self.rows = {"categories": list(categories), "tags": list(tags), "aliases": list(aliases)}
+        self.categories = {c["slug"]: c["id"] for c in categories}
+        self.tags = {t["slug"]: t["id"] for t in tags}
+        slug_by_id = {t["id"]: t["slug"] for t in tags}
+        # alias slug -> canonical tag slug
+        self.aliases = {a["alias_slug"]: slug_by_id[a["tag_id"]] for a in aliases if a["tag_id"] in slug_by_id}
+
+    @property
+    def category_slugs(self):
+        return sorted(self.categories)
+
+    @property
+    def tag_slugs(self):
+        return sorted(self.tags)
+
+    def category(self, slug):
+        return slug if slug in self.categories else FALLBACK_CATEGORY
+
+    def category_id(self, slug):
+        return self.categories.get(self.category(slug))
+
+    def tag(self, slug):
+        """Canonical tag slug for slug or one of its aliases, or None."""
+        if slug in self.tags:
+            return slug
+        return self.aliases.get(slug)
+
+    def tag_ids(self, slugs):
+        return [self.tags[s] for s in slugs if s in self.tags]
+
+    def save(self, path=DEFAULT_PATH):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(dict(self.rows, version=self.version), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def read(cls, path=DEFAULT_PATH):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                d = json.load(f)
+            return cls(d["categories"], d["tags"], d.get("aliases") or [], d.get("version"))
+        except (ValueError, KeyError):
+            return None
+
+
+def fetch(get):
+    """Download the vocabulary with plain table reads (no version)."""
+    cats = get("categories?select=id,slug&order=slug.asc")
+    tags = get("tags?select=id,slug,category_id&is_active=eq.true&order=slug.asc&limit=10000")
+    aliases = get("tag_aliases?select=alias_slug,tag_id&limit=10000")
+    return Taxonomy(cats or [], tags or [], aliases or [])
+
+
+def load(get, rpc=None, path=DEFAULT_PATH):
+    """Return the Taxonomy, from the local cache when its version is current.
+
+    get(path) returns decoded PostgREST rows; rpc(fn, body) calls a function.
+    Without rpc, or on a database without 118, the tables are read directly.
+    """
+    if rpc is None:
+        return fetch(get)
+    try:
+        version = rpc("get_taxonomy_version", {})
+    except HTTPError as e:
+        if e.status != 404:
+            raise
+        return fetch(get)
+    cached = Taxonomy.read(path)
+    if cached is not None and version is not None and cached.version == version:
+        return cached
+    d = rpc("get_taxonomy", {})
+    tax = Taxonomy(d["categories"], d["tags"], d["aliases"], d["version"])
+    tax.save(path)
+    return tax
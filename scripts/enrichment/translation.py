@@ -0,0 +1,49 @@
+import json, re
+
+# english_translation as imported from some sources is a JSON blob,
+# '{"narrator": "Narrated Anas:", "text": "The Prophet said ..."}', rather than
+# plain text. split() reads either form; scripts/repair_translations.py uses
+# repair() to rewrite such rows into plain english_translation + narrator so
+# readers (the chat route, prompts, search) no longer parse per row.
+#
+# Rules match parseEnglishTranslation in lib/hadith-utils.ts.
+
+_NARRATED = re.compile(r"^Narrated\s+", re.I)
+
+
+def is_json(raw):
+    return bool(raw) and raw.startswith("{") and '"text"' in raw
+
+
+def clean_narrator(name):
+    return _NARRATED.sub("", name or "").strip().rstrip(":").strip()
+
+
+def split(raw):
+    """(narrator, text) from english_translation; ("", raw) for plain text or bad JSON."""
+    raw = raw or ""
+    if is_json(raw):
+        try:
+            d = json.loads(raw)
+        except ValueError:
+            return "", raw
+        if isinstance(d, dict):
+            # Some blobs were double-escaped: literal \n and \" inside the text
+            text = str(d.get("text") or "").replace("\\n", "\n").replace('\\"', '"').strip()
+            return clean_narrator(str(d.get("narrator") or "")), text
+    return "", raw
+
+
+def repair(row):
+    """Column updates for a hadith row with a JSON english_translation, else None.
+
+    The narrator column wins when already set; the blob's narrator only fills
+    an empty one.
+    """
+    raw = row.get("english_translation")
+    if not is_json(raw):
+        return None
+    narrator, text = split(raw)
+    if text == raw or not text:
+        return None
+    return {"english_translation": text, "narrator": row.get("narrator") or narrator or None}
@@ -0,0 +1,73 @@
+import threading
+
+
+class BatchWriter:
+    """Buffers enrichment rows and writes them with insert_enrichments_bulk.
+
+    `rpc` is the calling script's own helper, called as rpc(fn_name, body) and
+    expected to return the decoded response (None on failure). Safe to share
+    between worker threads.
+
+    on_flush(good, bad, skipped) gets the rows written, the rows that failed, and
+    the rows the database refused to overwrite (an existing enrichment that is
+    no longer a draft, 114).
+    """
+
+    def __init__(self, rpc, size=50, on_flush=None):
+        self.rpc = rpc
+        self.size = max(1, size)
+        self.on_flush = on_flush
+        self.rows = []
+        self.written = 0
+        self.failed = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+    def add(self, row):
+        with self.lock:
+            self.rows.append(row)
+            full = len(self.rows) >= self.size
+        if full:
+            self.flush()
+
+    def flush(self):
+        # flush_lock keeps batches in order and stops two threads double-sending
+        with self.flush_lock:
+            with self.lock:
+                batch, self.rows = self.rows, []
+            if not batch:
+                return 0
+            refused = set()
+            res = self._send(batch)
+            if res is not None:
+                good, bad = batch, []
+                refused.update(res)
+            else:
+                # One bad row (e.g. a CHECK violation) fails the whole statement;
+                # retry row by row so the rest of the batch still lands.
+                good, bad = [], []
+                for row in batch:
+                    res = self._send([row]) if len(batch) > 1 else None
+                    (good if res is not None else bad).append(row)
+                    refused.update(res or ())
+            skipped = [r for r in good if r["hadith_id"] in refused]
+            good = [r for r in good if r["hadith_id"] not in refused]
+            with self.lock:
+                self.written += len(good)
+                self.failed += len(bad)
+                self.skipped += len(skipped)
+            if self.on_flush is not None:
+                self.on_flush(good, bad, skipped)
+            return len(good)
+
+    def _send(self, rows):
+        # Skipped hadith ids, or None when the statement failed. Databases
+        # before 114's skip rule return a bare count.
+        res = self.rpc("insert_enrichments_bulk", {"p_rows": rows})
+        if res is None:
+            return None
+        return set(res.get("skipped") or ()) if isinstance(res, dict) else set()
+
+    def close(self):
+        return self.flush()
@@ -0,0 +1,52 @@
+import argparse, sys, threading, time
+
+from enrichment import client, snapshot
+from enrichment.retry import RetryPolicy
+
+# Export hadiths, hadith_enrichment, hadith_tags and hadith_tag_weights to a
+# local columnar snapshot, so tagging/dedup/QA/prompt jobs can read the corpus
+# from disk instead of paging it through PostgREST.
+#
+#   python scripts/export_snapshot.py                  # refresh rows changed since the last export
+#   python scripts/export_snapshot.py --full           # re-read everything (picks up deletes)
+#   python scripts/export_snapshot.py --format arrow   # memory-mappable Arrow IPC
+#
+# Reading it back:
+#   from enrichment import snapshot
+#   hadiths = snapshot.load("hadiths")
+
+ap = argparse.ArgumentParser(description="Export corpus tables to a local Parquet/Arrow snapshot")
+ap.add_argument("--tables", default=",".join(snapshot.TABLES), help="comma-separated tables")
+ap.add_argument("--dir", default=snapshot.DEFAULT_DIR)
+ap.add_argument("--format", choices=sorted(snapshot.EXT), default=snapshot.default_format())
+ap.add_argument("--workers", type=int, default=4, help="parallel range readers per table")
+ap.add_argument("--page", type=int, default=1000, help="rows per request")
+ap.add_argument("--full", action="store_true", help="ignore the manifest and export every row")
+args = ap.parse_args()
+
+if args.format != "jsonl" and snapshot.pa is None:
+    sys.exit(f"--format {args.format} needs pyarrow (pip install pyarrow), or use --format jsonl")
+
+sb = client.Supabase()
+policy = RetryPolicy()
+lock = threading.Lock()
+seen = {}
+
+
+def get(path):
+    return policy.call(sb.get, path)
+
+
+def progress(table, n):
+    with lock:
+        seen[table] = seen.get(table, 0) + n
+        if seen[table] % (args.page * 10) < n:
+            print(f"  {table}: {seen[table]} rows", file=sys.stderr)
+
+
+for table in [t.strip() for t in args.tables.split(",") if t.strip()]:
+    t0 = time.time()
+    total, fetched = snapshot.export(get, table, args.dir, args.format, args.workers, args.page, args.full, progress)
+    print(f"{table}: {fetched} fetched, {total} in snapshot ({time.time() - t0:.1f}s)")
+
+print(f"Snapshot in {args.dir} ({args.format}); {policy.retries} retries")
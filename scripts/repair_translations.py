@@ -0,0 +1,83 @@
+import argparse, difflib, hashlib, json, sys, time
+
+from enrichment import client, translation
+from enrichment.retry import RetryPolicy
+
+# Rewrite english_translation values stored as JSON blobs (121) into plain
+# english_translation + narrator, streaming through the corpus in id order.
+#
+#   python scripts/repair_translations.py --dry-run             # diff of the first 20 changes + totals
+#   python scripts/repair_translations.py --dry-run --show 0 --report repair.jsonl
+#   python scripts/repair_translations.py                       # write in bulk batches
+#
+# Each write carries the md5 of the value that was read, so a row edited while
+# the job runs is skipped rather than overwritten; re-running picks it up.
+# Rows whose blob does not parse are reported and left as they are.
+
+ap = argparse.ArgumentParser(description="Split JSON-encoded english_translation into text and narrator")
+ap.add_argument("--page", type=int, default=1000, help="hadiths fetched per request")
+ap.add_argument("--chunk", type=int, default=500, help="rows per bulk update")
+ap.add_argument("--dry-run", action="store_true", help="report the changes, write nothing")
+ap.add_argument("--show", type=int, default=20, help="dry run: print a diff for the first N rows")
+ap.add_argument("--report", help="write every change (and unparseable row) as JSON lines to this file")
+args = ap.parse_args()
+
+sb = client.Supabase()
+policy = RetryPolicy()
+report = open(args.report, "w") if args.report else None
+
+
+def diff(h, fix):
+    before = [f"narrator: {h.get('narrator') or ''}"] + (h["english_translation"] or "").splitlines()
+    after = [f"narrator: {fix['narrator'] or ''}"] + fix["english_translation"].splitlines()
+    return "\n".join(difflib.unified_diff(before, after, h["id"], h["id"], lineterm="", n=1))
+
+
+t0 = time.time()
+seen = fixed = written = narrators = bad = 0
+last = None
+pending = []
+
+
+def flush():
+    global written, pending
+    for i in range(0, len(pending), args.chunk):
+        written += policy.call(sb.rpc, "repair_translations_bulk", {"p_rows": pending[i:i + args.chunk]}) or 0
+    pending = []
+
+
+while True:
+    rows = policy.call(sb.rpc, "get_json_translations", {"p_after_id": last, "n": args.page}) or []
+    if not rows:
+        break
+    for h in rows:
+        seen += 1
+        fix = translation.repair(h)
+        if fix is None:
+            bad += 1
+            if report:
+                report.write(json.dumps({"id": h["id"], "error": "unparseable", "before": h["english_translation"]}, ensure_ascii=False) + "\n")
+            continue
+        fixed += 1
+        narrators += bool(fix["narrator"]) and not h.get("narrator")
+        if args.dry_run and fixed <= args.show:
+            print(diff(h, fix))
+        if report:
+            report.write(json.dumps({"id": h["id"], "before": {k: h.get(k) for k in fix}, "after": fix}, ensure_ascii=False) + "\n")
+        pending.append(dict(fix, id=h["id"], source_hash=hashlib.md5(h["english_translation"].encode("utf-8")).hexdigest()))
+    if args.dry_run:
+        pending = []
+    elif len(pending) >= args.chunk:
+        flush()
+    last = rows[-1]["id"]
+    print(f"  {seen} scanned, {fixed} repairable ({seen / (time.time() - t0):.0f}/s)", file=sys.stderr)
+    if len(rows) < args.page:
+        break
+if not args.dry_run:
+    flush()
+if report:
+    report.close()
+
+result = f"would repair {fixed}" if args.dry_run else f"repaired {written} of {fixed}"
+print(f"Scanned {seen} JSON translations: {result} ({narrators} narrators filled), "
+      f"{bad} unparseable ({time.time() - t0:.1f}s)")
@@ -0,0 +1,54 @@
+import argparse, sys, time
+
+from enrichment import arabic, client
+from enrichment.retry import RetryPolicy
+
+# Build hadith_search_keys (120): normalised, diacritic-free arabic_text and its
+# token array per hadith, so search/dedup/tagging can use indexed trigram or
+# token lookups instead of ILIKE on the raw text.
+#
+# Only hadiths without a key (new, or arabic_text changed since) or with a key
+# from an older arabic.VERSION are processed, so re-running is cheap.
+#
+#   python scripts/search_keys.py              # fill missing/stale keys
+#   python scripts/search_keys.py --rebuild    # recompute every key
+#   python scripts/search_keys.py --dry-run    # normalise and report, write nothing
+
+ap = argparse.ArgumentParser(description="Precompute normalised Arabic search keys")
+ap.add_argument("--page", type=int, default=1000, help="hadiths fetched per request")
+ap.add_argument("--chunk", type=int, default=500, help="key rows per upsert")
+ap.add_argument("--rebuild", action="store_true", help="recompute keys even when current")
+ap.add_argument("--dry-run", action="store_true")
+args = ap.parse_args()
+
+sb = client.Supabase()
+policy = RetryPolicy()
+# Every stored key is older than this, so --rebuild selects them all
+version = 2 ** 31 - 1 if args.rebuild else arabic.VERSION
+
+t0 = time.time()
+done = tokens = empty = 0
+last = None
+while True:
+    rows = policy.call(sb.rpc, "get_stale_search_keys", {"p_version": version, "p_after_id": last, "n": args.page}) or []
+    if not rows:
+        break
+    keys = []
+    for h in rows:
+        k = arabic.search_key(h.get("arabic_text"))
+        k["hadith_id"] = h["id"]
+        keys.append(k)
+        tokens += len(k["arabic_tokens"])
+        empty += not k["arabic_norm"]
+    if not args.dry_run:
+        for i in range(0, len(keys), args.chunk):
+            policy.call(sb.post, "hadith_search_keys?on_conflict=hadith_id", keys[i:i + args.chunk],
+                        {"Prefer": "resolution=merge-duplicates,return=minimal"})
+    done += len(rows)
+    last = rows[-1]["id"]
+    print(f"  {done} keys ({done / (time.time() - t0):.0f}/s)", file=sys.stderr)
+    if len(rows) < args.page:
+        break
+
+verb = "Normalised" if args.dry_run else "Wrote"
+print(f"{verb} {done} search keys (v{arabic.VERSION}): {tokens} tokens, {empty} without Arabic text ({time.time() - t0:.1f}s)")
@@ -0,0 +1,258 @@
+import argparse, json, sys, threading, time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from enrichment import client, search, snapshot, taxonomy
+from enrichment.retry import RetryPolicy
+
+# BM25 search over the hadith corpus (enrichment/search.py), replacing the
+# ILIKE '%q%' scans in /api/search and the chat searchHadiths tool.
+#
+#   python scripts/search_service.py build               # full index from the API
+#   python scripts/search_service.py build --snapshot    # ... or from export_snapshot.py output
+#   python scripts/search_service.py refresh             # add changed hadiths, mask deleted ones
+#   python scripts/search_service.py serve --port 8790 --refresh 60
+#   python scripts/search_service.py query "intention deeds" --grade sahih
+#
+# serve answers GET /search?q=...&collection=&grade=&category=&tag=&limit=&offset=
+# with {"results": [{"id", "score"}], "matches", "took_ms"}, and GET /health with
+# index size and recent latency percentiles. With --refresh it polls for rows
+# changed since the last run (new enrichments included) and swaps in the new
+# segment without a restart. Set SEARCH_SERVICE_URL for the Next.js routes.
+#
+# Refreshes read each table from its watermark inclusive (several rows can share
+# a timestamp) and skip only the rows already seen at that exact mark. When the
+# live hadith count drops below the index's, the missing ids are masked.
+
+TABLES = ("hadiths", "hadith_enrichment", "hadith_tags", "hadith_tag_weights")
+# Watermark for tables that are empty at build time
+EPOCH = "1970-01-01T00:00:00+00:00"
+
+ap = argparse.ArgumentParser(description="Build and serve the BM25 hadith search index")
+ap.add_argument("command", choices=["build", "refresh", "compact", "serve", "query"])
+ap.add_argument("query", nargs="?", help="query text (query command)")
+ap.add_argument("--dir", default=search.DEFAULT_DIR)
+ap.add_argument("--snapshot", action="store_true", help="build from the local snapshot instead of the API")
+ap.add_argument("--workers", type=int, default=4, help="parallel range readers per table")
+ap.add_argument("--max-segments", type=int, default=8, help="compact after a refresh leaves more segments than this")
+ap.add_argument("--host", default="127.0.0.1")
+ap.add_argument("--port", type=int, default=8790)
+ap.add_argument("--refresh", type=float, default=0, help="serve: seconds between incremental refreshes (0 = off)")
+ap.add_argument("--limit", type=int, default=10)
+for f in ("collection", "grade", "category", "tag"):
+    ap.add_argument("--" + f, help=f"query: filter by {f}")
+args = ap.parse_args()
+
+policy = RetryPolicy()
+# Created on first use: serve/query work without Supabase credentials
+_sb = []
+
+
+def sb():
+    if not _sb:
+        _sb.append(client.Supabase())
+    return _sb[0]
+
+
+def get(path):
+    return policy.call(sb().get, path)
+
+
+def rpc(fn, body):
+    return policy.call(sb().rpc, fn, body)
+
+
+def slugs():
+    tax = taxonomy.load(get, rpc)
+    return ({c["id"]: c["slug"] for c in tax.rows["categories"]},
+            {t["id"]: t["slug"] for t in tax.rows["tags"]})
+
+
+def marks_of(tables, seed=None):
+    """Latest watermark per table and the ids of the rows at it; seed fills tables without one."""
+    marks, at = {}, {}
+    for table, rows in tables.items():
+        mark = snapshot.TABLES[table]
+        vals = [r[mark] for r in rows if r.get(mark)]
+        if vals:
+            marks[table] = max(vals)
+            at[table] = sorted(r["id"] for r in rows if r.get(mark) == marks[table])
+        elif seed:
+            marks[table], at[table] = seed, []
+    return marks, at
+
+
+def build():
+    t0 = time.time()
+    if args.snapshot:
+        tables = {t: snapshot.rows_of(snapshot.load(t)) for t in TABLES}
+    else:
+        tables = {t: snapshot.read_table(get, t, args.workers) for t in TABLES}
+    cats, tags = slugs()
+    docs = search.documents(tables["hadiths"], tables["hadith_enrichment"], tables["hadith_tag_weights"], tables["hadith_tags"], cats, tags)
+    n = search.rebuild(args.dir, docs, *marks_of(tables, seed=EPOCH))
+    print(f"Indexed {n} hadiths in {args.dir} ({time.time() - t0:.1f}s)")
+
+
+def by_ids(table, col, ids):
+    rows = []
+    for i in range(0, len(ids), 100):
+        rows.extend(get(f"{table}?select=*&{col}=in.({','.join(ids[i:i + 100])})") or [])
+    return rows
+
+
+def live_ids(page=1000):
+    out, last = set(), None
+    while True:
+        rows = get(f"hadiths?select=id&order=id.asc&limit={page}" + (f"&id=gt.{last}" if last else ""))
+        out.update(r["id"] for r in rows or ())
+        if not rows or len(rows) < page:
+            return out
+        last = rows[-1]["id"]
+
+
+def deleted(indexed):
+    # A cheap count first: the full id scan only runs when rows have gone
+    live = policy.call(sb().count, "hadiths")
+    if live is None or live >= len(indexed):
+        return set()
+    return indexed - live_ids()
+
+
+def refresh():
+    """Index hadiths whose row, enrichment or tags changed since the last marks; mask deleted ones."""
+    manifest = search.load_manifest(args.dir)
+    marks, at_mark = manifest.get("marks") or {}, manifest.get("at_mark") or {}
+    if not manifest["segments"]:
+        raise SystemExit("No index yet; run `search_service.py build` first")
+    changed, seen = set(), {}
+    for table in TABLES:
+        since, mark = marks.get(table), snapshot.TABLES[table]
+        done = set(at_mark.get(table) or ()) if since else set()
+        rows = [r for r in snapshot.read_table(get, table, 1, since=since) if not (r.get(mark) == since and r["id"] in done)]
+        seen[table] = rows
+        changed.update(r["id"] if table == "hadiths" else r["hadith_id"] for r in rows)
+    index = search.Index(args.dir)
+    indexed = {i for seg in index.segments for o, i in enumerate(seg.ids) if o not in seg.dead}
+    index.close()
+    gone = deleted(indexed | changed)
+    if not changed and not gone:
+        return 0
+    ids = sorted(changed - gone)
+    cats, tags = slugs()
+    docs = search.documents(
+        by_ids("hadiths", "id", ids), by_ids("hadith_enrichment", "hadith_id", ids),
+        by_ids("hadith_tag_weights", "hadith_id", ids), by_ids("hadith_tags", "hadith_id", ids), cats, tags,
+    )
+    # Rows at the new mark are added to the ones already seen there
+    new_marks, new_at = marks_of(seen)
+    for table, m in new_marks.items():
+        if m == marks.get(table):
+            new_at[table] = sorted(set(new_at[table]) | set(at_mark.get(table) or ()))
+    n = search.add(args.dir, docs, new_marks, new_at, gone)
+    if len(search.load_manifest(args.dir)["segments"]) > args.max_segments:
+        search.compact(args.dir)
+    return n + len(gone)
+
+
+def filters(q):
+    return {"collection": q.get("collection"), "grade": q.get("grade"), "category": q.get("category"), "tags": q.get("tag")}
+
+
+if args.command == "build":
+    build()
+    sys.exit(0)
+
+if args.command == "refresh":
+    print(f"Indexed or removed {refresh()} changed hadiths")
+    sys.exit(0)
+
+if args.command == "compact":
+    print(f"Merged {search.compact(args.dir)} segments")
+    sys.exit(0)
+
+if args.command == "query":
+    t0 = time.perf_counter()
+    matches, hits = search.Index(args.dir).search(args.query or "", args.limit, **filters(vars(args)))
+    print(f"{matches} matches ({(time.perf_counter() - t0) * 1000:.1f}ms)")
+    for hid, score in hits:
+        print(f"  {score:8.3f}  {hid}")
+    sys.exit(0)
+
+searcher = search.Searcher(args.dir)
+latencies = deque(maxlen=1000)
+refreshing = threading.Lock()
+
+
+def do_refresh():
+    if not refreshing.acquire(blocking=False):
+        return
+    try:
+        n = refresh()
+        if n:
+            searcher.reload()
+            print(f"  refresh: {n} hadiths re-indexed, {len(searcher.index.segments)} segments")
+    except Exception as e:
+        print(f"  refresh failed: {e}", file=sys.stderr)
+    finally:
+        refreshing.release()
+
+
+def pct(p):
+    xs = sorted(latencies)
+    return round(xs[min(len(xs) - 1, int(len(xs) * p))], 2) if xs else None
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *a):
+        pass
+
+    def reply(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        u = urlsplit(self.path)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        if u.path == "/search":
+            t0 = time.perf_counter()
+            try:
+                limit = min(100, int(q.get("limit") or 20))
+                offset = int(q.get("offset") or 0)
+            except ValueError:
+                return self.reply(400, {"error": "limit/offset must be integers"})
+            matches, hits = searcher.search(q.get("q") or "", limit, offset, **filters(q))
+            took = (time.perf_counter() - t0) * 1000
+            latencies.append(took)
+            return self.reply(200, {"results": [{"id": i, "score": s} for i, s in hits], "matches": matches, "took_ms": round(took, 2)})
+        if u.path == "/health":
+            ix = searcher.index
+            return self.reply(200, {"docs": ix.n, "segments": len(ix.segments), "loaded_at": ix.loaded_at, "p50_ms": pct(0.5), "p99_ms": pct(0.99)})
+        self.reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlsplit(self.path).path == "/refresh":
+            threading.Thread(target=do_refresh, daemon=True).start()
+            return self.reply(202, {"status": "refreshing"})
+        self.reply(404, {"error": "not found"})
+
+
+if args.refresh:
+    def loop():
+        while True:
+            time.sleep(args.refresh)
+            do_refresh()
+    threading.Thread(target=loop, name="search-refresh", daemon=True).start()
+
+httpd = ThreadingHTTPServer((args.host, args.port), Handler)
+httpd.daemon_threads = True
+print(f"Serving {searcher.index.n} hadiths ({len(searcher.index.segments)} segments) on http://{args.host}:{args.port}/search")
+try:
+    httpd.serve_forever()
+except KeyboardInterrupt:
+    pass
@@ -0,0 +1,93 @@
+import argparse, csv, sys, time
+
+from enrichment import client
+from enrichment.retry import RetryPolicy
+from enrichment.tagger import KeywordTagger
+
+# Recompute keyword-based hadith_tag_weights for the whole corpus in one pass.
+# Replaces the per-tag INSERT ... SELECT ... ILIKE scripts (081, 101-105), which
+# scan hadiths once per tag and stop at LIMIT 500 per tag.
+#
+#   python scripts/tag_weights.py                  # upsert into hadith_tag_weights
+#   python scripts/tag_weights.py --csv w.csv      # write rows for \copy instead
+#   python scripts/tag_weights.py --dry-run        # count only
+
+ap = argparse.ArgumentParser(description="Keyword-tag every hadith and bulk-load hadith_tag_weights")
+ap.add_argument("--page", type=int, default=1000, help="hadiths fetched per request")
+ap.add_argument("--chunk", type=int, default=2000, help="weight rows per upsert")
+ap.add_argument("--source", default="enrichment", choices=["ai", "enrichment"], help="hadith_tag_weights.source value")
+ap.add_argument("--overwrite", action="store_true", help="replace existing weights instead of keeping them")
+ap.add_argument("--csv", help="write hadith_id,tag_id,weight,source to this file instead of upserting")
+ap.add_argument("--dry-run", action="store_true")
+args = ap.parse_args()
+
+sb = client.Supabase()
+policy = RetryPolicy()
+
+
+def get(path):
+    return policy.call(sb.get, path)
+
+
+def pages(path, key="id", page=1000):
+    # Keyset pagination: constant cost per page, unlike offset=
+    last = None
+    while True:
+        q = f"{path}&order={key}.asc&limit={page}" + (f"&{key}=gt.{last}" if last else "")
+        rows = get(q)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page:
+            return
+        last = rows[-1][key]
+
+
+tags = [t for rows in pages("tags?select=id,slug,name_en,synonyms&is_active=eq.true") for t in rows]
+aliases = [a for rows in pages("tag_aliases?select=id,alias_slug,tag_id") for a in rows]
+t0 = time.time()
+tagger = KeywordTagger(tags, aliases)
+print(f"Automaton: {len(tags)} tags, {len(aliases)} aliases, {tagger.patterns} patterns ({time.time() - t0:.2f}s)")
+
+prefer = "resolution=merge-duplicates" if args.overwrite else "resolution=ignore-duplicates"
+out = None
+if args.csv:
+    f = open(args.csv, "w", newline="")
+    out = csv.writer(f)
+    out.writerow(["hadith_id", "tag_id", "weight", "source"])
+
+buf = []
+scanned = tagged = written = 0
+
+
+def flush():
+    global buf, written
+    if not buf:
+        return
+    if out is not None:
+        out.writerows([r["hadith_id"], r["tag_id"], r["weight"], r["source"]] for r in buf)
+    elif not args.dry_run:
+        policy.call(sb.post, "hadith_tag_weights?on_conflict=hadith_id,tag_id", buf, {"Prefer": prefer + ",return=minimal"})
+    written += len(buf)
+    buf = []
+
+
+t0 = time.time()
+for rows in pages("hadiths?select=id,english_translation", page=args.page):
+    for h in rows:
+        weights = tagger.tag(h.get("english_translation"))
+        scanned += 1
+        if weights:
+            tagged += 1
+        for tag_id, w in weights.items():
+            buf.append({"hadith_id": h["id"], "tag_id": tag_id, "weight": w, "source": args.source})
+    if len(buf) >= args.chunk:
+        flush()
+    print(f"  {scanned} hadiths scanned, {tagged} tagged, {written + len(buf)} rows ({scanned / max(1e-9, time.time() - t0):.0f}/s)", file=sys.stderr)
+flush()
+
+if args.csv:
+    f.close()
+    print(f"Wrote {written} rows to {args.csv}; load with: \\copy hadith_tag_weights(hadith_id,tag_id,weight,source) FROM '{args.csv}' CSV HEADER")
+else:
+    print(f"Done: {scanned} hadiths, {tagged} tagged, {written} weight rows" + (" (dry run)" if args.dry_run else ""))
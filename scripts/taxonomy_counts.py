@@ -0,0 +1,31 @@
+import argparse, sys
+
+from enrichment import client
+from enrichment.retry import RetryPolicy
+
+# Check or repair tags.weighted_count / categories.hadith_count.
+# The counters are maintained by the triggers in 116; this compares them with a
+# full recount (verify_taxonomy_counts) and rebuilds them when they drift.
+#
+#   python scripts/taxonomy_counts.py verify      # list mismatches, exit 1 if any
+#   python scripts/taxonomy_counts.py repair      # recount and fix
+
+ap = argparse.ArgumentParser(description="Verify or repair tag and category hadith counters")
+ap.add_argument("command", choices=["verify", "repair"])
+ap.add_argument("--limit", type=int, default=50, help="mismatches to print")
+args = ap.parse_args()
+
+sb = client.Supabase()
+policy = RetryPolicy()
+
+if args.command == "verify":
+    rows = policy.call(sb.rpc, "verify_taxonomy_counts", {}) or []
+    for r in rows[:args.limit]:
+        print(f"  {r['kind']:<8} {r['slug']:<40} stored={r['stored']} actual={r['actual']}")
+    if len(rows) > args.limit:
+        print(f"  ... {len(rows) - args.limit} more")
+    print(f"{len(rows)} mismatched counters")
+    sys.exit(1 if rows else 0)
+
+fixed = policy.call(sb.rpc, "repair_taxonomy_counts", {})
+print(f"Repaired {fixed or 0} counters")
@@ -0,0 +1,30 @@
+import os, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment.cursor import Cursor
+
+# python -m unittest discover -s scripts/tests
+
+
+class CursorTest(unittest.TestCase):
+    def setUp(self):
+        self.base = os.path.join(tempfile.mkdtemp(), ".enrich_cursor.json")
+
+    def test_hadiths_without_a_number_sort_last(self):
+        c = Cursor(self.base)
+        c.advance([{"hadith_number": 7, "id": "b"}, {"hadith_number": None, "id": "a"}])
+        self.assertEqual((c.hadith_number, c.id), (None, "a"))
+        c.advance([{"hadith_number": 9, "id": "c"}])
+        self.assertEqual(c.params(), {"p_after_hadith_number": None, "p_after_id": "a"})
+
+    def test_position_survives_a_restart(self):
+        c = Cursor(self.base)
+        c.advance([{"hadith_number": 3, "id": "x"}])
+        c.save()
+        self.assertEqual(Cursor(self.base).params(), {"p_after_hadith_number": 3, "p_after_id": "x"})
+        self.assertFalse(Cursor(self.base + ".other").started)
+
+
+if __name__ == "__main__":
+    unittest.main()
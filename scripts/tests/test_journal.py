@@ -0,0 +1,77 @@
+import argparse, os, sys, tempfile, unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment import cursor, journal, runner, slots
+from enrichment.journal import pending, previous_workers
+
+# python -m unittest discover -s scripts/tests
+
+
+class FakeDB:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, fn, body):
+        self.calls.append((fn, body))
+        return [hadith(i) for i in body["p_ids"]]
+
+
+def hadith(i):
+    return {"id": i, "english_translation": "text", "narrator": "", "grade": "", "hadith_number": 1}
+
+
+@unittest.skipIf(slots.fcntl is None, "no flock")
+@mock.patch.dict(os.environ, {"ENRICH_WORKER_ID": ""})
+class ConcurrentRunsTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        for mod, name in ((journal, ".enrich_journal.jsonl"), (cursor, ".enrich_cursor.json")):
+            p = mock.patch.object(mod, "DEFAULT_PATH", os.path.join(tmp, name))
+            p.start()
+            self.addCleanup(p.stop)
+        self.args = runner.add_arguments(argparse.ArgumentParser()).parse_args(["--no-cache", "--provider", "deepinfra"])
+
+    def start(self):
+        r = runner.Runner(self.args, sb=FakeDB(), provider=object())
+        r.journal = journal.Journal(r.journal_path)
+        self.addCleanup(r.slot.release)
+        self.addCleanup(r.journal.close)
+        return r
+
+    def test_live_run_keeps_its_claims(self):
+        a = self.start()
+        a.journal.record("h1", "claimed", hadith=hadith("h1"), worker=a.worker)
+        b = self.start()
+        self.assertNotEqual(a.journal_path, b.journal_path)
+        self.assertEqual(previous_workers(b.journal_path), [])
+        self.assertEqual(b.reclaim(*pending(b.journal_path)), ([], []))
+        self.assertEqual(b.sb.calls, [])
+
+    def test_exited_run_is_taken_over(self):
+        a = self.start()
+        a.journal.record("h1", "claimed", hadith=hadith("h1"), worker=a.worker)
+        a.journal.close()
+        a.slot.release()
+        c = self.start()
+        self.assertEqual(c.journal_path, a.journal_path)
+        rows, hadiths = c.reclaim(*pending(c.journal_path))
+        self.assertEqual([h["id"] for h in hadiths], ["h1"])
+        fn, body = c.sb.calls[0]
+        self.assertEqual((fn, body["p_previous_workers"]), ("claim_hadiths_by_id", [a.worker]))
+
+
+class SlotsTest(unittest.TestCase):
+    def test_named_slot_is_exclusive(self):
+        base = os.path.join(tempfile.mkdtemp(), ".enrich_journal.jsonl")
+        s = slots.Slot(base, worker="w1")
+        self.addCleanup(s.release)
+        self.assertEqual(s.path(base), base[:-len(".jsonl")] + ".w1.jsonl")
+        if slots.fcntl is not None:
+            with self.assertRaises(SystemExit):
+                slots.Slot(base, worker="w1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os, sys, unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment.client import HTTPError
+from enrichment.ratelimit import AdaptiveTokenBucket
+from enrichment.retry import RetryPolicy
+
+# python -m unittest discover -s scripts/tests
+
+
+def throttled_then_ok(fails, retry_after="5"):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= fails:
+            raise HTTPError(429, "slow down", {"Retry-After": retry_after})
+        return "ok"
+    return fn, calls
+
+
+class RetryAfterTest(unittest.TestCase):
+    def test_unlimited_limiter_still_sleeps_retry_after(self):
+        fn, calls = throttled_then_ok(2)
+        policy = RetryPolicy(attempts=6, limiter=AdaptiveTokenBucket(0))
+        with mock.patch("enrichment.retry.time.sleep") as sleep:
+            self.assertEqual(policy.call(fn), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [5.0, 5.0])
+
+    def test_rate_limited_limiter_carries_the_pause(self):
+        fn, calls = throttled_then_ok(1)
+        limiter = AdaptiveTokenBucket(2)
+        policy = RetryPolicy(attempts=6, limiter=limiter)
+        with mock.patch("enrichment.retry.time.sleep") as sleep, \
+                mock.patch.object(limiter, "acquire"), mock.patch.object(limiter, "throttled") as throttled:
+            self.assertEqual(policy.call(fn), "ok")
+        throttled.assert_called_once_with(5.0)
+        sleep.assert_not_called()
+
+    def test_conflict_is_not_retried(self):
+        calls = []
+
+        def fn():
+            calls.append(1)
+            raise HTTPError(409, "duplicate key")
+        with mock.patch("enrichment.retry.time.sleep"):
+            with self.assertRaises(HTTPError):
+                RetryPolicy(attempts=6).call(fn)
+        self.assertEqual(len(calls), 1)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import os, sys, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment.writer import BatchWriter
+
+# python -m unittest discover -s scripts/tests
+
+
+class WriterTest(unittest.TestCase):
+    def test_rows_the_database_refused_are_reported_as_skipped(self):
+        flushes = []
+        writer = BatchWriter(lambda fn, body: {"written": 1, "skipped": ["b"]},
+                             on_flush=lambda *a: flushes.append(a))
+        writer.add({"hadith_id": "a"})
+        writer.add({"hadith_id": "b"})
+        writer.close()
+        good, bad, skipped = flushes[0]
+        self.assertEqual(([r["hadith_id"] for r in good], bad, [r["hadith_id"] for r in skipped]), (["a"], [], ["b"]))
+        self.assertEqual((writer.written, writer.skipped), (1, 1))
+
+    def test_bare_count_from_an_older_database(self):
+        writer = BatchWriter(lambda fn, body: 2)
+        writer.add({"hadith_id": "a"})
+        writer.add({"hadith_id": "b"})
+        self.assertEqual(writer.close(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()